@@ -0,0 +1,64 @@
+from __future__ import annotations
+import argparse
+import threading
+import time
+import core.classes.transaction as t
+from core.concurrentdatabase import ConcurrentPayrollDatabase
+from core.ingest import make_transaction
+from benchmarks.workforce import PAY_DATE, generate_records
+
+
+def ingest(database: ConcurrentPayrollDatabase, records: list, lock: threading.Lock = None) -> float:
+    start = time.perf_counter()
+    for record in records:
+        if lock is None:
+            database.execute(make_transaction(record, database))
+        else:
+            with lock:
+                make_transaction(record, database).execute()
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Ingest throughput alone, beside payday on a snapshot, and beside a stop-the-world payday')
+    parser.add_argument('--employees', type=int, default=20000)
+    parser.add_argument('--tail', type=int, default=5000, help='employees ingested while payday runs')
+    parser.add_argument('--documents', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    records = list(generate_records(args.employees + args.tail, documents=args.documents, seed=args.seed))
+    split = next(row for row, record in enumerate(records) if record.get('emp_id') == args.employees + 1 and record['type'].startswith('add_'))
+
+    for mode in ('alone', 'snapshot', 'locked'):
+        database = ConcurrentPayrollDatabase()
+        ingest(database, records[:split])
+        lock = threading.Lock() if mode == 'locked' else None
+        done = threading.Event()
+        paydays = []
+
+        def payday() -> None:
+            while not done.is_set():
+                start = time.perf_counter()
+                if lock is None:
+                    with database.snapshot() as snapshot:
+                        t.PaydayTransaction(snapshot, PAY_DATE, keep_paychecks=False).execute()
+                else:
+                    with lock:
+                        t.PaydayTransaction(database, PAY_DATE, keep_paychecks=False).execute()
+                paydays.append(time.perf_counter() - start)
+
+        thread = None
+        if mode != 'alone':
+            thread = threading.Thread(target=payday)
+            thread.start()
+        elapsed = ingest(database, records[split:], lock)
+        done.set()
+        if thread is not None:
+            thread.join()
+        transactions = len(records) - split
+        print(f'{mode:<9} {transactions:>8} transactions in {elapsed:6.2f}s  {transactions / elapsed:9.0f} transactions/s'
+              f'  {len(paydays)} paydays')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+from __future__ import annotations
+import argparse
+from datetime import date
+import tempfile
+import time
+from core.classes.doc import Paycheck
+from core.classes.paymentmethod import DirectMethod
+from core.directdeposit import DirectDepositWriter
+
+
+PAY_DATE = date(2001, 11, 30)
+
+
+def routing_number(prefix: int) -> str:
+    digits = [int(digit) for digit in f'{prefix:08d}']
+    check_digit = -(3 * (digits[0] + digits[3] + digits[6]) + 7 * (digits[1] + digits[4] + digits[7]) + digits[2] + digits[5]) % 10
+    return f'{prefix:08d}{check_digit}'
+
+
+def make_paychecks(count: int, banks: int) -> list:
+    methods = [DirectMethod(routing_number(12100000 + bank), f'{bank:04d}-{account:06d}') for bank in range(banks) for account in range(100)]
+    paychecks = []
+    for emp_id in range(count):
+        paycheck = Paycheck(PAY_DATE, date(2001, 11, 1))
+        paycheck.gross_pay = 1000.00 + emp_id % 997
+        paycheck.deductions = 9.42
+        paycheck.net_pay = paycheck.gross_pay - paycheck.deductions
+        methods[emp_id % len(methods)].pay(paycheck)
+        paychecks.append((emp_id, paycheck))
+    return paychecks
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Per-bank direct deposit file generation throughput')
+    parser.add_argument('--deposits', type=int, default=500000)
+    parser.add_argument('--banks', type=int, default=20)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 4])
+    args = parser.parse_args()
+    paychecks = make_paychecks(args.deposits, args.banks)
+    for workers in args.workers:
+        with tempfile.TemporaryDirectory() as directory:
+            writer = DirectDepositWriter(directory, origin='091000019', company_id='1234567890', workers=workers)
+            start = time.perf_counter()
+            for emp_id, paycheck in paychecks:
+                writer.write(emp_id, paycheck)
+            collected = time.perf_counter()
+            files = writer.write_files()
+            finished = time.perf_counter()
+        print(
+            f'{workers:>2} workers {sum(file.entry_count for file in files):>9} deposits in {len(files):>3} files'
+            f'  collect {collected - start:6.2f}s  write {finished - collected:6.2f}s'
+            f'  {args.deposits / (finished - start):12.0f} deposits/s'
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,46 @@
+from __future__ import annotations
+from datetime import date, timedelta
+import timeit
+from core.classes.dateutils import count_fridays, count_weekdays, FRIDAY
+
+
+MEMBERS = 50000
+PAY_PERIODS = [
+    (date(2001, 11, 1), date(2001, 11, 30)),
+    (date(2001, 11, 24), date(2001, 11, 30)),
+    (date(2001, 11, 17), date(2001, 11, 30)),
+]
+
+
+def walk_fridays(start_date: date, end_date: date) -> int:
+    fridays_count = 0
+    day = start_date
+    while day <= end_date:
+        if day.weekday() == FRIDAY:
+            fridays_count += 1
+        day += timedelta(days=1)
+    return fridays_count
+
+
+def payday(counter) -> None:
+    for member in range(MEMBERS):
+        start_date, end_date = PAY_PERIODS[member % len(PAY_PERIODS)]
+        counter(start_date, end_date)
+
+
+def main() -> None:
+    count_fridays.cache_clear()
+    cases = [
+        ('day walk', walk_fridays),
+        ('closed form', lambda start_date, end_date: count_weekdays(start_date, end_date, FRIDAY)),
+        ('closed form + cache', count_fridays),
+    ]
+    print(f'{MEMBERS} union members, {len(PAY_PERIODS)} distinct pay periods')
+    for name, counter in cases:
+        seconds = min(timeit.repeat(lambda: payday(counter), number=1, repeat=5))
+        print(f'{name:<22}{seconds * 1000:10.2f} ms{seconds / MEMBERS * 1e9:10.0f} ns/member')
+    print(count_fridays.cache_info())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+from __future__ import annotations
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STATEMENTS = {
+    'payroll': 'import payroll',
+    'payday': 'import payroll; payroll.PaydayTransaction',
+    'transaction': 'import core.classes.transaction',
+    'ingest': 'import core.ingest',
+}
+# Matches unit_tests/test_imports.py; the transaction module took over thirteen times the startup imports before the
+# import path was trimmed
+IMPORT_BUDGET_RATIO = 6
+
+
+def import_times(statement: str) -> list:
+    # A fresh interpreter per run keeps sys.modules cold; -X importtime reports microseconds
+    completed = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', statement], capture_output=True, text=True, check=True, cwd=ROOT
+    )
+    times = []
+    for line in completed.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_time, cumulative, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        times.append((depth, name.strip(), int(self_time), int(cumulative)))
+    return times
+
+
+def total_time(times: list, startup_modules: set) -> int:
+    return sum(cumulative for depth, name, _, cumulative in times if depth == 0 and name not in startup_modules)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Import time of the payroll entry points, measured with -X importtime')
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--top', type=int, default=8, help='slowest modules to list per entry point')
+    parser.add_argument('--budget', type=float, nargs='?', const=IMPORT_BUDGET_RATIO,
+                        help=f'fail when an entry point median exceeds this multiple of the startup imports ({IMPORT_BUDGET_RATIO} if no value is given)')
+    args = parser.parse_args()
+    startup_modules = {name for _, name, _, _ in import_times('pass')}
+    startup = statistics.median(total_time(import_times('pass'), set()) / 1000 for _ in range(args.runs))
+    print(f'{"startup":<12}{startup:8.2f} ms median')
+    exceeded = []
+    for label, statement in STATEMENTS.items():
+        runs = [import_times(statement) for _ in range(args.runs)]
+        totals = [total_time(times, startup_modules) / 1000 for times in runs]
+        median = statistics.median(totals)
+        modules = [entry for entry in runs[-1] if entry[1] not in startup_modules]
+        print(f'{label:<12}{median:8.2f} ms median {min(totals):8.2f} ms best {len(modules):>5} modules')
+        for _, name, self_time, _ in sorted(modules, key=lambda entry: entry[2], reverse=True)[:args.top]:
+            print(f'    {name:<44}{self_time / 1000:8.2f} ms self')
+        if args.budget is not None and median > args.budget * startup:
+            exceeded.append(label)
+    if exceeded:
+        raise SystemExit(f'Import budget of {args.budget} times the startup imports exceeded by: {", ".join(exceeded)}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,48 @@
+from __future__ import annotations
+import argparse
+import tempfile
+import time
+import core.classes.transaction as t
+from core.ingest import make_transaction
+from core.journal import TransactionJournal, open_database, restore
+from benchmarks.workforce import PAY_DATE, MemoryPayrollDatabase, generate_records
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Journal append throughput and restart time from snapshot plus tail')
+    parser.add_argument('--employees', type=int, default=200000)
+    parser.add_argument('--tail', type=int, default=50000, help='employees journaled after the snapshot')
+    parser.add_argument('--documents', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    records = list(generate_records(args.employees + args.tail, documents=args.documents, seed=args.seed))
+    split = next(row for row, record in enumerate(records) if record.get('emp_id') == args.employees + 1 and record['type'].startswith('add_'))
+    with tempfile.TemporaryDirectory() as directory:
+        database = MemoryPayrollDatabase()
+        with TransactionJournal(directory, database) as journal:
+            start = time.perf_counter()
+            for record in records[:split]:
+                journal.execute(make_transaction(record, database))
+            journaled = time.perf_counter()
+            journal.snapshot()
+            snapshotted = time.perf_counter()
+            for record in records[split:]:
+                journal.execute(make_transaction(record, database))
+        finished = time.perf_counter()
+        print(f'journal   {split:>9} transactions in {journaled - start:6.2f}s  {split / (journaled - start):10.0f} transactions/s')
+        print(f'snapshot  {args.employees:>9} employees    in {snapshotted - journaled:6.2f}s')
+        print(f'tail      {len(records) - split:>9} transactions in {finished - snapshotted:6.2f}s')
+        start = time.perf_counter()
+        replayed = restore(directory, MemoryPayrollDatabase())
+        print(f'restore   {args.employees:>9} employees + {replayed} replayed in {time.perf_counter() - start:6.2f}s')
+        start = time.perf_counter()
+        with open_database(directory) as database:
+            opened = time.perf_counter()
+            materialized = database.materialized
+            paychecks = sum(1 for _ in t.PaydayTransaction(database, PAY_DATE, keep_paychecks=False).iter_paychecks())
+            print(f'open      {materialized:>9} employees materialized in {opened - start:6.2f}s'
+                  f'  payday {paychecks} paychecks in {time.perf_counter() - opened:6.2f}s')
+
+
+if __name__ == '__main__':
+    main()
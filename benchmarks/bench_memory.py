@@ -0,0 +1,83 @@
+from __future__ import annotations
+import argparse
+from datetime import date, timedelta
+import gc
+import tracemalloc
+from core.classes.affiliation import UnionAffiliation
+from core.classes.doc import SalesReceipt, ServiceCharge, TimeCard
+from core.classes.employee import Employee
+from core.classes.paymentclassification import CommissionedClassification, HourlyClassification, SalariedClassification
+from core.classes.paymentmethod import HoldMethod
+from core.classes.paymentschedule import BeweeklySchedule, MonthlySchedule, WeeklySchedule
+
+
+START_DATE = date(2001, 1, 5)
+
+
+def make_employees(count: int) -> list:
+    employees = []
+    for emp_id in range(count):
+        employee = Employee(emp_id, f'Employee {emp_id}', 'Home')
+        kind = emp_id % 3
+        if kind == 0:
+            employee.classification = SalariedClassification(1000.00)
+            employee.schedule = MonthlySchedule()
+        elif kind == 1:
+            employee.classification = HourlyClassification(15.25)
+            employee.schedule = WeeklySchedule()
+        else:
+            employee.classification = CommissionedClassification(0.1, 1500.00)
+            employee.schedule = BeweeklySchedule(START_DATE)
+        employee.method = HoldMethod()
+        if emp_id % 4 == 0:
+            employee.affiliation = UnionAffiliation(emp_id, 9.42)
+        employees.append(employee)
+    return employees
+
+
+def add_documents(employees: list, per_employee: int) -> int:
+    count = 0
+    for employee in employees:
+        classification = employee.classification
+        for day in range(per_employee):
+            document_date = START_DATE + timedelta(days=day)
+            if isinstance(classification, HourlyClassification):
+                classification.add_time_card(TimeCard(document_date, 8.0))
+            elif isinstance(classification, CommissionedClassification):
+                classification.add_sales_receipt(SalesReceipt(document_date, 150.00))
+            elif employee.affiliation is not None:
+                employee.affiliation.add_service_charge(ServiceCharge(document_date, 19.42))
+            else:
+                continue
+            count += 1
+    return count
+
+
+def measure(employees_count: int, documents_per_employee: int) -> None:
+    gc.collect()
+    tracemalloc.start()
+    employees = make_employees(employees_count)
+    employees_bytes = tracemalloc.get_traced_memory()[0]
+    documents_count = add_documents(employees, documents_per_employee)
+    documents_bytes = tracemalloc.get_traced_memory()[0] - employees_bytes
+    peak_bytes = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    print(
+        f'{employees_count:>9} employees {employees_bytes / employees_count:8.0f} B/employee'
+        f'{documents_count:>11} documents {documents_bytes / max(documents_count, 1):8.0f} B/document'
+        f'  peak {peak_bytes / 2 ** 20:8.1f} MiB'
+    )
+    del employees
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Bytes per employee and per document of the domain model')
+    parser.add_argument('--employees', type=int, nargs='+', default=[100000, 1000000])
+    parser.add_argument('--documents', type=int, default=10, help='documents per employee')
+    args = parser.parse_args()
+    for employees_count in args.employees:
+        measure(employees_count, args.documents)
+
+
+if __name__ == '__main__':
+    main()
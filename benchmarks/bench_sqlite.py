@@ -0,0 +1,71 @@
+from __future__ import annotations
+import argparse
+from datetime import date, timedelta
+import os
+import tempfile
+import time
+import core.classes.transaction as t
+from core.sqlitedatabase import SqlitePayrollDatabase
+
+
+PAY_DATE = date(2001, 11, 30)
+
+
+def add_employees(db: SqlitePayrollDatabase, count: int) -> None:
+    for emp_id in range(count):
+        kind = emp_id % 3
+        if kind == 0:
+            t.AddSalariedEmployeeTransaction(emp_id, 'Bob', 'Home', db, 1000.00).execute()
+        elif kind == 1:
+            t.AddHourlyEmployeeTransaction(emp_id, 'Bill', 'Home', db, 15.25).execute()
+        else:
+            t.AddCommissionedEmployeeTransaction(emp_id, 'Sam', 'Home', db, 0.1, 1500.00, date(2001, 11, 17)).execute()
+
+
+def add_documents(db: SqlitePayrollDatabase, count: int) -> None:
+    for emp_id in range(1, count, 3):
+        t.AddTimeCardTransaction(PAY_DATE - timedelta(days=emp_id % 7), 8.0, emp_id, db).execute()
+    for emp_id in range(2, count, 3):
+        t.AddSalesReceiptTransaction(db, PAY_DATE - timedelta(days=emp_id % 14), 150.00, emp_id).execute()
+
+
+def add_history(db: SqlitePayrollDatabase, count: int) -> None:
+    # Every time card goes to one employee, so the cost per insert shows whether it grows with the history
+    t.AddHourlyEmployeeTransaction(-1, 'Bill', 'Home', db, 15.25).execute()
+    for day in range(count):
+        t.AddTimeCardTransaction(date(1970, 1, 1) + timedelta(days=day), 8.0, -1, db).execute()
+
+
+def get_employees(db: SqlitePayrollDatabase, count: int) -> None:
+    for emp_id in range(count):
+        db.get_employee(emp_id)
+
+
+def payday(db: SqlitePayrollDatabase) -> None:
+    t.PaydayTransaction(db, PAY_DATE).execute()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='SqlitePayrollDatabase throughput')
+    parser.add_argument('--employees', type=int, default=100000)
+    parser.add_argument('--history', type=int, default=20000, help='time cards added to a single employee')
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as directory:
+        db = SqlitePayrollDatabase(os.path.join(directory, 'payroll.db'))
+        print(f'{args.employees} employees')
+        for name, operations, run in (
+            ('add employee', args.employees, lambda: add_employees(db, args.employees)),
+            ('add document', args.employees * 2 // 3, lambda: add_documents(db, args.employees)),
+            ('add history', args.history, lambda: add_history(db, args.history)),
+            ('get employee', args.employees, lambda: get_employees(db, args.employees)),
+            ('payday', args.employees, lambda: payday(db)),
+        ):
+            start = time.perf_counter()
+            run()
+            seconds = time.perf_counter() - start
+            print(f'{name:<14}{seconds:10.2f} s{operations / seconds:12.0f} ops/s')
+        db.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,275 @@
+from __future__ import annotations
+import argparse
+import cProfile
+from datetime import date
+from functools import wraps
+import os
+import pstats
+import sys
+import threading
+from time import perf_counter
+import tracemalloc
+import core.classes.transaction as t
+from core.classes.affiliation import UnionAffiliation
+from core.classes.batchpayroll import BatchPayrollEngine
+from core.classes.employee import Employee
+from core.classes.paymentclassification import PaymentClassificationABC
+from core.classes.paymentmethod import PaymentMethodABC
+from core.metrics import DATABASE, InstrumentedDatabase, MetricsRegistry
+from benchmarks.workforce import PAY_DATE, MemoryPayrollDatabase, generate_records
+
+
+PHASES = (
+    'id listing', 'employee fetch', 'is_pay_date', 'period computation',
+    'calculate_pay', 'calcualte_deductions', 'method.pay', 'profiler overhead', 'other',
+)
+# The batch engine computes gross pay and deductions per classification group, calling calculate_pay and
+# calcualte_deductions only for classifications it has no group for
+BATCH_PHASES = (
+    'id listing', 'employee fetch', 'is_pay_date', 'period computation',
+    'batch gross pay', 'batch deductions', 'method.pay', 'profiler overhead', 'other',
+)
+DATABASE_PHASES = {
+    'get_employee_ids_paid_on': 'id listing',
+    'get_all_employee_ids': 'id listing',
+    'get_employee': 'employee fetch',
+    'get_employees': 'employee fetch',
+}
+DEFAULT_SAMPLE_INTERVAL = 0.001
+CALIBRATION_CALLS = 10000
+CALIBRATION_ROUNDS = 7
+
+
+class PaydayProfile():
+    def __init__(self, seconds: float, paychecks: int, phases: dict, peak_memory: int, stats: pstats.Stats, stacks: dict,
+                 overhead_range: tuple = (0.0, 0.0)) -> None:
+        self.__seconds = seconds
+        self.__paychecks = paychecks
+        self.__phases = phases
+        self.__peak_memory = peak_memory
+        self.__stats = stats
+        self.__stacks = stacks
+        self.__overhead_range = overhead_range
+
+    @property
+    def seconds(self) -> float:
+        return self.__seconds
+
+    @property
+    def paychecks(self) -> int:
+        return self.__paychecks
+
+    @property
+    def phases(self) -> dict:
+        return self.__phases
+
+    @property
+    def peak_memory(self) -> int:
+        return self.__peak_memory
+
+    @property
+    def stats(self) -> pstats.Stats:
+        return self.__stats
+
+    @property
+    def stacks(self) -> dict:
+        return self.__stacks
+
+    @property
+    def overhead_range(self) -> tuple:
+        return self.__overhead_range
+
+    def write_collapsed(self, path: str) -> None:
+        if self.__stacks is None:
+            raise Exception('Profile was recorded without the sampling profiler')
+        with open(path, 'w', encoding='utf-8') as file:
+            for stack, count in sorted(self.__stacks.items()):
+                file.write(f'{stack} {count}\n')
+
+    def report(self) -> str:
+        lines = [f'{self.__paychecks} paychecks in {self.__seconds:.3f}s']
+        for phase, (seconds, calls) in self.__phases.items():
+            share = seconds / self.__seconds * 100 if self.__seconds > 0 else 0.0
+            if phase == 'profiler overhead':
+                low, high = self.__overhead_range
+                lines.append(f'  {phase:<22}{seconds:10.3f}s{share:7.1f}%  estimated, calibration spread {low:.3f}s to {high:.3f}s')
+            else:
+                lines.append(f'  {phase:<22}{seconds:10.3f}s{share:7.1f}%{calls:>10} calls')
+        if self.__peak_memory is not None:
+            lines.append(f'  tracemalloc peak {self.__peak_memory / 2 ** 20:.1f} MiB')
+        return '\n'.join(lines)
+
+
+def profile_payday(database, pay_date: date = PAY_DATE, batch: bool = False, cprofile: bool = False,
+                   sample_interval: float = None, trace_memory: bool = True) -> PaydayProfile:
+    phases = {phase: [0.0, 0] for phase in (BATCH_PHASES if batch else PHASES)}
+    registry = MetricsRegistry()
+    payday_t = t.PaydayTransaction(InstrumentedDatabase(database, registry), pay_date, batch=batch, keep_paychecks=False)
+    profiler = cProfile.Profile() if cprofile else None
+    sampler = _Sampler(threading.get_ident(), sample_interval) if sample_interval else None
+    patches = _patch_phases(phases, batch)
+    if trace_memory:
+        tracemalloc.start()
+    try:
+        if sampler is not None:
+            sampler.start()
+        if profiler is not None:
+            profiler.enable()
+        start = perf_counter()
+        paychecks = sum(1 for _ in payday_t.iter_paychecks())
+        seconds = perf_counter() - start
+    finally:
+        if profiler is not None:
+            profiler.disable()
+        if sampler is not None:
+            sampler.stop()
+        peak_memory = tracemalloc.get_traced_memory()[1] if trace_memory else None
+        if trace_memory:
+            tracemalloc.stop()
+        for owner, name, original in patches:
+            setattr(owner, name, original)
+
+    for method, metric in registry.snapshot()[DATABASE].items():
+        phase = phases[DATABASE_PHASES.get(method, 'employee fetch')]
+        phase[0] += metric['seconds']
+        phase[1] += metric['count']
+    calls = sum(phase[1] for phase in phases.values())
+    # The overhead is estimated from calibration runs, not measured, so it is kept between zero and the unattributed
+    # time and reported with the spread of the calibration
+    overheads = _timer_overheads()
+    unattributed = max(0.0, seconds - sum(phase[0] for phase in phases.values()))
+    phases['profiler overhead'] = [min(calls * overheads[len(overheads) // 2], unattributed), 0]
+    phases['other'] = [unattributed - phases['profiler overhead'][0], 0]
+    return PaydayProfile(
+        seconds, paychecks, phases, peak_memory,
+        pstats.Stats(profiler) if profiler is not None else None,
+        sampler.stacks if sampler is not None else None,
+        (calls * overheads[0], calls * overheads[-1]),
+    )
+
+
+def _patch_phases(phases: dict, batch: bool) -> list:
+    gross_pay = 'batch gross pay' if batch else 'calculate_pay'
+    deductions = 'batch deductions' if batch else 'calcualte_deductions'
+    targets = [
+        (Employee, 'is_pay_date', 'is_pay_date'),
+        (Employee, 'get_pay_period_start_date', 'period computation'),
+        (UnionAffiliation, 'calcualte_deductions', deductions),
+    ]
+    targets.extend((owner, 'calculate_pay', gross_pay) for owner in _subclasses(PaymentClassificationABC))
+    targets.extend((owner, 'pay', 'method.pay') for owner in _subclasses(PaymentMethodABC))
+    if batch:
+        targets.extend([
+            (BatchPayrollEngine, '_BatchPayrollEngine__salaried_gross_pay', gross_pay),
+            (BatchPayrollEngine, '_BatchPayrollEngine__hourly_gross_pay', gross_pay),
+            (BatchPayrollEngine, '_BatchPayrollEngine__commissioned_gross_pay', gross_pay),
+            (BatchPayrollEngine, '_BatchPayrollEngine__deductions', deductions),
+        ])
+    patches = []
+    for owner, name, phase in targets:
+        if name in owner.__dict__:
+            original = owner.__dict__[name]
+            patches.append((owner, name, original))
+            setattr(owner, name, _timed(original, phases[phase]))
+    return patches
+
+
+def _timed(function, phase: list):
+    @wraps(function)
+    def timed(*args, **kwargs):
+        start = perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            phase[0] += perf_counter() - start
+            phase[1] += 1
+    return timed
+
+
+def _timer_overheads() -> list:
+    overheads = []
+    for _ in range(CALIBRATION_ROUNDS):
+        phase = [0.0, 0]
+        timed = _timed(lambda: None, phase)
+        start = perf_counter()
+        for _ in range(CALIBRATION_CALLS):
+            timed()
+        overheads.append(max(0.0, perf_counter() - start - phase[0]) / CALIBRATION_CALLS)
+    return sorted(overheads)
+
+
+def _subclasses(cls) -> list:
+    subclasses = []
+    for subclass in cls.__subclasses__():
+        subclasses.append(subclass)
+        subclasses.extend(_subclasses(subclass))
+    return subclasses
+
+
+class _Sampler(threading.Thread):
+    def __init__(self, thread_id: int, interval: float) -> None:
+        super().__init__(daemon=True)
+        self.__thread_id = thread_id
+        self.__interval = interval
+        self.__stopped = threading.Event()
+        self.__switch_interval = sys.getswitchinterval()
+        self.stacks = {}
+
+    def start(self) -> None:
+        # The sampler can only run when the profiled thread releases the GIL
+        sys.setswitchinterval(min(self.__switch_interval, self.__interval))
+        super().start()
+
+    def run(self) -> None:
+        while not self.__stopped.wait(self.__interval):
+            frame = sys._current_frames().get(self.__thread_id, None)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f'{os.path.basename(code.co_filename)}:{code.co_qualname}')
+                frame = frame.f_back
+            if stack:
+                key = ';'.join(reversed(stack))
+                self.stacks[key] = self.stacks.get(key, 0) + 1
+
+    def stop(self) -> None:
+        self.__stopped.set()
+        self.join()
+        sys.setswitchinterval(self.__switch_interval)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Profile a payday run with a per-phase breakdown')
+    parser.add_argument('--sqlite', help='profile against this SQLite database instead of a generated workforce')
+    parser.add_argument('--employees', type=int, default=100000, help='size of the generated workforce')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--pay-date', type=date.fromisoformat, default=PAY_DATE)
+    parser.add_argument('--batch', action='store_true', help='use the batch engine')
+    parser.add_argument('--cprofile', metavar='PATH', help='run under cProfile and dump the stats to PATH')
+    parser.add_argument('--collapsed', metavar='PATH', help='run the sampling profiler and write collapsed stacks to PATH')
+    parser.add_argument('--interval', type=float, default=DEFAULT_SAMPLE_INTERVAL, help='sampling interval in seconds')
+    parser.add_argument('--no-memory', action='store_true', help='skip tracemalloc, which slows the run down')
+    args = parser.parse_args()
+
+    if args.sqlite:
+        from core.sqlitedatabase import SqlitePayrollDatabase
+        database = SqlitePayrollDatabase(args.sqlite)
+    else:
+        from core.ingest import ingest_records
+        database = MemoryPayrollDatabase()
+        ingest_records(generate_records(args.employees, seed=args.seed), database)
+    profile = profile_payday(
+        database, args.pay_date, args.batch, cprofile=args.cprofile is not None,
+        sample_interval=args.interval if args.collapsed else None, trace_memory=not args.no_memory,
+    )
+    if args.collapsed:
+        profile.write_collapsed(args.collapsed)
+    if args.cprofile:
+        profile.stats.dump_stats(args.cprofile)
+    print(profile.report())
+    if args.cprofile:
+        profile.stats.sort_stats('cumulative').print_stats(15)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,155 @@
+from __future__ import annotations
+import argparse
+from datetime import date, timedelta
+import json
+import platform
+import sys
+import time
+import core.classes.transaction as t
+from core.classes.paymentschedule import BeweeklySchedule, MonthlySchedule, WeeklySchedule
+from core.ingest import ingest_records
+from benchmarks.workforce import DEFAULT_MIX, PAY_DATE, WORK_START_DATE, MemoryPayrollDatabase, generate_records
+
+
+SCHEDULE_DAYS = 10000
+QUARTER_DAYS = 91
+
+
+def measure(function, repeat: int) -> float:
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        seconds = time.perf_counter() - start
+        best = seconds if best is None else min(best, seconds)
+    return best
+
+
+def result(name: str, size: int, operations: int, seconds: float, **extra) -> dict:
+    return dict(name=name, size=size, operations=operations, seconds=seconds,
+                operations_per_second=operations / seconds if seconds > 0 else None, **extra)
+
+
+def bench_ingest(records: list, repeat: int) -> tuple:
+    databases = []
+
+    def run():
+        database = MemoryPayrollDatabase()
+        report = ingest_records(records, database)
+        if report.rejected:
+            raise Exception(f'{report.rejected} generated records were rejected')
+        databases.append(database)
+
+    seconds = measure(run, repeat)
+    return seconds, databases[-1]
+
+
+def bench_payday(database: MemoryPayrollDatabase, size: int, repeat: int) -> list:
+    results = []
+    for name, options in (('payday', {}), ('payday_batch', {'batch': True})):
+        paid = []
+
+        def run():
+            payday_t = t.PaydayTransaction(database, PAY_DATE, keep_paychecks=False, **options)
+            paid.append(sum(1 for _ in payday_t.iter_paychecks()))
+
+        seconds = measure(run, repeat)
+        results.append(result(name, size, paid[-1], seconds))
+    return results
+
+
+def bench_quarter(database: MemoryPayrollDatabase, size: int, repeat: int) -> list:
+    start_date = PAY_DATE - timedelta(days=QUARTER_DAYS - 1)
+    paid = []
+
+    def run_daily():
+        paychecks = 0
+        for day in range(QUARTER_DAYS):
+            payday_t = t.PaydayTransaction(database, start_date + timedelta(days=day), keep_paychecks=False)
+            paychecks += sum(1 for _ in payday_t.iter_paychecks())
+        paid.append(paychecks)
+
+    def run_range():
+        range_t = t.PayrollRangeRun(database, start_date, PAY_DATE, keep_paychecks=False)
+        paid.append(sum(1 for _ in range_t.iter_paychecks()))
+
+    results = []
+    for name, run in (('payday_quarter_daily', run_daily), ('payday_quarter_range', run_range)):
+        seconds = measure(run, repeat)
+        results.append(result(name, size, paid[-1], seconds))
+    return results
+
+
+def bench_schedules(repeat: int) -> list:
+    results = []
+    days = [PAY_DATE + timedelta(days=day) for day in range(SCHEDULE_DAYS)]
+    for schedule in (MonthlySchedule(), WeeklySchedule(), BeweeklySchedule(WORK_START_DATE)):
+        pay_dates = [day for day in days if schedule.is_pay_date(day)]
+        for method, arguments in (
+            ('is_pay_date', days),
+            ('get_pay_period_start_date', pay_dates),
+            ('get_pay_period_end_date', days),
+        ):
+            function = getattr(schedule, method)
+            seconds = measure(lambda: [function(argument) for argument in arguments], repeat)
+            results.append(result(f'{type(schedule).__name__}.{method}', None, len(arguments), seconds))
+    return results
+
+
+def compare(results: list, baseline_path: str) -> None:
+    with open(baseline_path, encoding='utf-8') as file:
+        baseline = {(item['name'], item['size']): item for item in json.load(file)['results']}
+    for item in results:
+        previous = baseline.get((item['name'], item['size']), None)
+        if previous is not None and previous['seconds'] > 0:
+            print(f'{item["name"]:<45}{str(item["size"]):>8}{item["seconds"] / previous["seconds"]:8.2f}x', file=sys.stderr)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Payday, ingest and schedule benchmarks with JSON output')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--hourly', type=float, default=DEFAULT_MIX['hourly'])
+    parser.add_argument('--salaried', type=float, default=DEFAULT_MIX['salaried'])
+    parser.add_argument('--commissioned', type=float, default=DEFAULT_MIX['commissioned'])
+    parser.add_argument('--union-ratio', type=float, default=0.25)
+    parser.add_argument('--documents', type=int, default=5, help='documents per employee')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--output', help='write results to this JSON file instead of stdout')
+    parser.add_argument('--compare', help='print time ratios against a previous JSON result file')
+    args = parser.parse_args()
+    mix = {'hourly': args.hourly, 'salaried': args.salaried, 'commissioned': args.commissioned}
+
+    results = []
+    for size in args.sizes:
+        records = list(generate_records(size, mix, args.union_ratio, args.documents, args.seed))
+        seconds, database = bench_ingest(records, args.repeat)
+        results.append(result('ingest', size, len(records), seconds))
+        results.extend(bench_payday(database, size, args.repeat))
+        results.extend(bench_quarter(database, size, args.repeat))
+    results.extend(bench_schedules(args.repeat))
+    for item in results:
+        print(f'{item["name"]:<45}{str(item["size"]):>8}{item["seconds"] * 1000:12.2f} ms'
+              f'{item["operations_per_second"] or 0:14.0f} ops/s', file=sys.stderr)
+
+    report = {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'date': date.today().isoformat(),
+        'parameters': {
+            'mix': mix, 'union_ratio': args.union_ratio, 'documents': args.documents,
+            'seed': args.seed, 'repeat': args.repeat,
+        },
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            json.dump(report, file, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == '__main__':
+    main()
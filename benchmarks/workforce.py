@@ -0,0 +1,79 @@
+from __future__ import annotations
+from array import array
+from datetime import date, timedelta
+import random
+from core.classes.employee import Employee
+from core.databasesabc import PayrollDatabaseABC
+from core.paydateindex import PayDateIndex
+
+
+PAY_DATE = date(2001, 11, 30)
+WORK_START_DATE = date(2001, 11, 17)
+DEFAULT_MIX = {'hourly': 0.4, 'salaried': 0.3, 'commissioned': 0.3}
+
+
+class MemoryPayrollDatabase(PayrollDatabaseABC):
+    def __init__(self) -> None:
+        self.__employees = {}
+        self.__union_members = {}
+        self.__pay_date_index = PayDateIndex()
+
+    def add_emplyee(self, id: int, employee: Employee) -> None:
+        self.__employees[id] = employee
+        self.__pay_date_index.add(id, employee.schedule)
+
+    def get_employee(self, id: int) -> Employee:
+        return self.__employees.get(id, None)
+
+    def delete_employee(self, id: int) -> None:
+        if id in self.__employees:
+            del self.__employees[id]
+            self.__pay_date_index.remove(id)
+
+    def add_union_member(self, id: int, employee: Employee) -> None:
+        self.__union_members[id] = employee
+
+    def get_union_member(self, id: int) -> Employee:
+        return self.__union_members.get(id, None)
+
+    def delete_union_member(self, id: int) -> None:
+        self.__union_members.pop(id, None)
+
+    def get_all_employee_ids(self) -> array:
+        return array('q', self.__employees)
+
+    def get_employee_ids_paid_on(self, pay_date: date) -> array:
+        return self.__pay_date_index.get_employee_ids(pay_date)
+
+
+def generate_records(size: int, mix: dict = None, union_ratio: float = 0.25, documents: int = 5, seed: int = 0,
+                     pay_date: date = PAY_DATE):
+    rng = random.Random(seed)
+    mix = mix or DEFAULT_MIX
+    kinds = list(mix)
+    weights = [mix[kind] for kind in kinds]
+    days = min(documents, 28)
+    for emp_id in range(1, size + 1):
+        kind = rng.choices(kinds, weights)[0]
+        record = {'type': f'add_{kind}', 'emp_id': emp_id, 'name': f'Employee {emp_id}', 'address': 'Home'}
+        if kind == 'hourly':
+            record['hourly_rate'] = round(rng.uniform(10.0, 60.0), 2)
+        elif kind == 'salaried':
+            record['salary'] = round(rng.uniform(1000.0, 9000.0), 2)
+        else:
+            record['salary'] = round(rng.uniform(500.0, 3000.0), 2)
+            record['commission_rate'] = round(rng.uniform(0.01, 0.2), 3)
+            record['work_start_date'] = WORK_START_DATE.isoformat()
+        yield record
+        member_id = None
+        if rng.random() < union_ratio:
+            member_id = size + emp_id
+            yield {'type': 'change_member', 'emp_id': emp_id, 'member_id': member_id, 'dues': round(rng.uniform(5.0, 15.0), 2)}
+        for offset in sorted(rng.sample(range(28), days), reverse=True):
+            document_date = (pay_date - timedelta(days=offset)).isoformat()
+            if kind == 'hourly':
+                yield {'type': 'time_card', 'emp_id': emp_id, 'date': document_date, 'hours': round(rng.uniform(2.0, 12.0), 2)}
+            elif kind == 'commissioned':
+                yield {'type': 'sales_receipt', 'emp_id': emp_id, 'date': document_date, 'amount': round(rng.uniform(10.0, 900.0), 2)}
+            if member_id is not None and rng.random() < 0.2:
+                yield {'type': 'service_charge', 'member_id': member_id, 'date': document_date, 'amount': round(rng.uniform(1.0, 30.0), 2)}
@@ -0,0 +1,77 @@
+from __future__ import annotations
+from abc import ABC, abstractmethod
+from array import array
+from datetime import date
+from core.classes.employee import Employee
+
+
+DEFAULT_CONCURRENCY = 100
+
+
+async def gather_limited(coroutines, concurrency: int = DEFAULT_CONCURRENCY) -> list:
+    # Imported here because asyncio is costly to load and synchronous callers never need it
+    import asyncio
+    if concurrency < 1:
+        raise ValueError('Invalid value of argument \"concurrency\".')
+    # A fixed pool of workers pulls from one shared iterator, so coroutines are created lazily
+    # and at most `concurrency` of them are in flight
+    pending = enumerate(coroutines)
+    results = {}
+
+    async def work():
+        for index, coroutine in pending:
+            results[index] = await coroutine
+
+    workers = [asyncio.ensure_future(work()) for _ in range(concurrency)]
+    try:
+        await asyncio.gather(*workers)
+    except BaseException:
+        for worker in workers:
+            worker.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        # Coroutines no worker reached are closed, so they are not reported as never awaited
+        for _, coroutine in pending:
+            coroutine.close()
+        raise
+    return [results[index] for index in range(len(results))]
+
+
+class AsyncPayrollDatabaseABC(ABC):
+    @abstractmethod
+    async def add_emplyee(self, id: int, employee: Employee) -> None:
+        pass
+
+    @abstractmethod
+    async def get_employee(self, id: int) -> Employee:
+        pass
+
+    @abstractmethod
+    async def delete_employee(self, id: int) -> None:
+        pass
+
+    @abstractmethod
+    async def add_union_member(self, id: int, employee: Employee) -> None:
+        pass
+
+    @abstractmethod
+    async def get_union_member(self, id: int) -> Employee:
+        pass
+
+    @abstractmethod
+    async def delete_union_member(self, id: int) -> None:
+        pass
+
+    @abstractmethod
+    async def get_all_employee_ids(self) -> array:
+        pass
+
+    async def get_employees(self, ids, concurrency: int = DEFAULT_CONCURRENCY) -> dict:
+        ids = list(dict.fromkeys(ids))
+        employees = await gather_limited((self.get_employee(id) for id in ids), concurrency)
+        return dict(zip(ids, employees))
+
+    async def add_employees(self, items, concurrency: int = DEFAULT_CONCURRENCY) -> None:
+        await gather_limited((self.add_emplyee(id, employee) for id, employee in items), concurrency)
+
+    async def get_employee_ids_paid_on(self, pay_date: date) -> array:
+        return await self.get_all_employee_ids()
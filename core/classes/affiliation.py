@@ -1,13 +1,26 @@
 from __future__ import annotations
+from copy import copy
 from datetime import date, timedelta
 import core.classes.doc as doc
+from core.classes.dateutils import count_fridays
+from core.classes.docindex import DocIndex
+from core.classes.periodtotals import PeriodTotals
 
 
 class UnionAffiliation():
+    __slots__ = ('__member_id', '__dues', '__service_charges', '__period_totals')
+
     def __init__(self, member_id: int, dues: float) -> None:
         self.__member_id = member_id
         self.__dues = dues
-        self.__service_charges = {}
+        self.__service_charges = DocIndex()
+        self.__period_totals = None
+
+    def __copy__(self) -> UnionAffiliation:
+        affiliation = UnionAffiliation(self.__member_id, self.__dues)
+        affiliation.__service_charges = copy(self.__service_charges)
+        affiliation.__period_totals = copy(self.__period_totals)
+        return affiliation
 
     @property
     def member_id(self):
@@ -18,12 +31,30 @@ class UnionAffiliation():
         return self.__dues    
 
     def get_service_charge(self, date: date) -> doc.ServiceCharge:
-        return self.__service_charges.get(date, None)
+        return self.__service_charges.get(date)
+
+    def service_charges_between(self, start_date: date, end_date: date) -> list:
+        return self.__service_charges.between(start_date, end_date)
 
     def add_service_charge(self, service_charge: doc.ServiceCharge) -> None:
         if service_charge.date in self.__service_charges:
             raise Exception('Service charge for this date alredy excits')
-        self.__service_charges[service_charge.date] = service_charge
+        self.__service_charges.add(service_charge)
+        if self.__period_totals is not None:
+            self.__period_totals.add(service_charge.date, service_charge.amount, self.__service_charge_between)
+
+    def compact(self, before_date: date) -> list:
+        if self.__period_totals is not None:
+            self.__period_totals.discard_before(before_date)
+        return self.__service_charges.remove_before(before_date)
+
+    def track_pay_periods(self, schedule) -> None:
+        if schedule is None:
+            self.__period_totals = None
+        elif self.__period_totals is None or self.__period_totals.schedule is not schedule:
+            self.__period_totals = PeriodTotals(
+                schedule, 0.0, self.__service_charges.last_date(), self.__service_charge_between
+            )
 
     def calcualte_deductions(self, paycheck: doc.Paycheck) -> float:
         total_dues = self.__calcualte_dues(paycheck)
@@ -35,20 +66,17 @@ class UnionAffiliation():
         return self.__dues * fridays_count
     
     def __number_of_fridays_in_pay_period(self, start_date, end_date):
-        fridays_count = 0
-        day = start_date
-        while day <= end_date:
-            if day.weekday() == 4: #Friday
-                fridays_count += 1
-            day += timedelta(days=1)
-        return fridays_count
+        return count_fridays(start_date, end_date)
 
     def __calcualte_service_charge(self, paycheck):
+        if self.__period_totals is not None:
+            total_service_charge = self.__period_totals.get(paycheck.pay_period.start_date, paycheck.pay_period.end_date)
+            if total_service_charge is not None:
+                return total_service_charge
+        return self.__service_charge_between(paycheck.pay_period.start_date, paycheck.pay_period.end_date)
+
+    def __service_charge_between(self, start_date, end_date):
         total_service_charge = 0.0
-        service_charge_date = paycheck.pay_period.start_date
-        while service_charge_date <= paycheck.pay_period.end_date:
-            service_charge = self.get_service_charge(service_charge_date)
-            if service_charge is not None:
-                total_service_charge += service_charge.amount
-            service_charge_date += timedelta(days=1)
+        for service_charge in self.service_charges_between(start_date, end_date):
+            total_service_charge += service_charge.amount
         return total_service_charge
\ No newline at end of file
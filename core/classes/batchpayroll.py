@@ -0,0 +1,155 @@
+from __future__ import annotations
+from datetime import date
+from core.classes.dateutils import count_fridays
+from core.classes.doc import Paycheck
+from core.classes.paymentclassification import CommissionedClassification, HourlyClassification, SalariedClassification
+from core.classes.timecardstore import OVERTIME_RATE, OVERTIME_THRESHOLD, _numpy
+
+
+class BatchPayrollEngine():
+    def __init__(self, pay_date: date) -> None:
+        self.__pay_date = pay_date
+
+    @property
+    def pay_date(self) -> date:
+        return self.__pay_date
+
+    def run(self, employees) -> dict:
+        paychecks = {}
+        groups = {
+            SalariedClassification: [],
+            HourlyClassification: [],
+            CommissionedClassification: [],
+        }
+        for employee in employees:
+            if not employee.is_pay_date(self.__pay_date):
+                continue
+            paycheck = Paycheck(self.__pay_date, employee.get_pay_period_start_date(self.__pay_date))
+            paychecks[employee.emp_id] = paycheck
+            group = groups.get(type(employee.classification), None)
+            if group is None:
+                employee.payday(paycheck)
+            else:
+                group.append((employee, paycheck))
+
+        batch = []
+        gross_pay = []
+        for group, calculate_gross_pay in (
+            (groups[SalariedClassification], self.__salaried_gross_pay),
+            (groups[HourlyClassification], self.__hourly_gross_pay),
+            (groups[CommissionedClassification], self.__commissioned_gross_pay),
+        ):
+            batch.extend(group)
+            gross_pay.extend(calculate_gross_pay(group))
+        deductions = self.__deductions(batch)
+        net_pay = _subtract(gross_pay, deductions)
+        for (employee, paycheck), gross, deduction, net in zip(batch, gross_pay, deductions, net_pay):
+            paycheck.gross_pay = gross
+            paycheck.deductions = deduction
+            paycheck.net_pay = net
+            paycheck.payee = employee.name
+            employee.method.pay(paycheck)
+        return paychecks
+
+    def __salaried_gross_pay(self, group) -> list:
+        return [employee.classification.salary for employee, paycheck in group]
+
+    def __hourly_gross_pay(self, group) -> list:
+        segments = []
+        rates = []
+        hours = []
+        for segment, (employee, paycheck) in enumerate(group):
+            classification = employee.classification
+            card_hours = classification.hours_between(paycheck.pay_period.start_date, paycheck.pay_period.end_date)
+            segments.extend([segment] * len(card_hours))
+            rates.extend([classification.hourly_rate] * len(card_hours))
+            hours.extend(card_hours)
+        return _segment_sums(segments, _overtime_pay(rates, hours), len(group))
+
+    def __commissioned_gross_pay(self, group) -> list:
+        # The salary goes first in each segment so the sums accumulate in the same order as calculate_pay
+        segments = []
+        amounts = []
+        rates = []
+        for segment, (employee, paycheck) in enumerate(group):
+            classification = employee.classification
+            sales_receipts = classification.sales_receipts_between(
+                paycheck.pay_period.start_date, paycheck.pay_period.end_date
+            )
+            segments.append(segment)
+            amounts.append(classification.salary)
+            rates.append(1.0)
+            for sales_receipt in sales_receipts:
+                segments.append(segment)
+                amounts.append(sales_receipt.amount)
+                rates.append(classification.commission_rate)
+        return _segment_sums(segments, _multiply(amounts, rates), len(group))
+
+    def __deductions(self, batch) -> list:
+        dues = []
+        fridays = []
+        segments = []
+        service_charges = []
+        for segment, (employee, paycheck) in enumerate(batch):
+            affiliation = employee.affiliation
+            if affiliation is None:
+                dues.append(0.0)
+                fridays.append(0)
+                continue
+            start_date = paycheck.pay_period.start_date
+            end_date = paycheck.pay_period.end_date
+            dues.append(affiliation.dues)
+            fridays.append(count_fridays(start_date, end_date))
+            for service_charge in affiliation.service_charges_between(start_date, end_date):
+                segments.append(segment)
+                service_charges.append(service_charge.amount)
+        return _add(_multiply(dues, fridays), _segment_sums(segments, service_charges, len(batch)))
+
+
+def _segment_sums(segments, weights, size) -> list:
+    np = _numpy()
+    if np is not None:
+        return np.bincount(
+            np.asarray(segments, dtype=np.intp), weights=np.asarray(weights, dtype=np.float64), minlength=size
+        ).tolist()
+    sums = [0.0] * size
+    for segment, weight in zip(segments, weights):
+        sums[segment] += weight
+    return sums
+
+
+def _overtime_pay(rates, hours) -> list:
+    np = _numpy()
+    if np is not None:
+        rates = np.asarray(rates, dtype=np.float64)
+        hours = np.asarray(hours, dtype=np.float64)
+        overtime_hours = np.maximum(hours - OVERTIME_THRESHOLD, 0.0)
+        normal_hours = hours - overtime_hours
+        return (rates * normal_hours + rates * OVERTIME_RATE * overtime_hours).tolist()
+    pay = []
+    for rate, card_hours in zip(rates, hours):
+        overtime_hours = max(0.0, card_hours - OVERTIME_THRESHOLD)
+        normal_hours = card_hours - overtime_hours
+        pay.append(rate * normal_hours + rate * OVERTIME_RATE * overtime_hours)
+    return pay
+
+
+def _multiply(left, right) -> list:
+    np = _numpy()
+    if np is not None:
+        return (np.asarray(left, dtype=np.float64) * np.asarray(right, dtype=np.float64)).tolist()
+    return [a * b for a, b in zip(left, right)]
+
+
+def _add(left, right) -> list:
+    np = _numpy()
+    if np is not None:
+        return (np.asarray(left, dtype=np.float64) + np.asarray(right, dtype=np.float64)).tolist()
+    return [a + b for a, b in zip(left, right)]
+
+
+def _subtract(left, right) -> list:
+    np = _numpy()
+    if np is not None:
+        return (np.asarray(left, dtype=np.float64) - np.asarray(right, dtype=np.float64)).tolist()
+    return [a - b for a, b in zip(left, right)]
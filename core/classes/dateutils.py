@@ -0,0 +1,18 @@
+from __future__ import annotations
+from datetime import date
+from functools import lru_cache
+
+FRIDAY = 4
+PERIOD_CACHE_SIZE = 4096
+
+
+def count_weekdays(start_date: date, end_date: date, weekday: int) -> int:
+    # date.fromordinal(1) is a Monday, so weekday w falls on ordinals n with n % 7 == (w + 1) % 7
+    if end_date < start_date:
+        return 0
+    return (end_date.toordinal() - weekday - 1) // 7 - (start_date.toordinal() - weekday - 2) // 7
+
+
+@lru_cache(maxsize=PERIOD_CACHE_SIZE)
+def count_fridays(start_date: date, end_date: date) -> int:
+    return count_weekdays(start_date, end_date, FRIDAY)
@@ -1,10 +1,12 @@
 from __future__ import annotations
 from abc import ABC, abstractmethod
 import datetime as dt
-from tkinter.messagebox import NO
-from tracemalloc import start
+from functools import lru_cache
+from core.classes.dateutils import PERIOD_CACHE_SIZE
 
 class DocABC(ABC):
+    __slots__ = ('__date',)
+
     @abstractmethod
     def __init__(self, date: dt.date):
         if isinstance(date, dt.date):
@@ -18,6 +20,8 @@ class DocABC(ABC):
         return self.__date
 
 class TimeCard(DocABC):
+    __slots__ = ('__hours',)
+
     def __init__(self, date: dt.date, hours: float) -> TimeCard:
         self.__hours = hours
         super().__init__(date)
@@ -27,6 +31,8 @@ class TimeCard(DocABC):
         return self.__hours
 
 class SalesReceipt(DocABC):
+    __slots__ = ('__amount',)
+
     def __init__(self, date: dt.date, amount: float) -> SalesReceipt:
         self.__amount = amount
         super().__init__(date)
@@ -36,6 +42,8 @@ class SalesReceipt(DocABC):
         return self.__amount
 
 class ServiceCharge(DocABC):
+    __slots__ = ('__amount',)
+
     def __init__(self, date: dt.date, amount: float) -> ServiceCharge:
         self.__amount = amount
         super().__init__(date)
@@ -45,7 +53,11 @@ class ServiceCharge(DocABC):
         return self.__amount
 
 class Paycheck(DocABC):
+    __slots__ = ('__pay_date', '__gross_pay', '__deductions', '__net_pay', '__pay_period', 'disposition', 'method', 'payee')
+
     class Period():
+        __slots__ = ('__start_date', '__end_date')
+
         def __init__(self, start_date, end_date) -> None:
             self.__start_date = start_date
             self.__end_date = end_date
@@ -58,12 +70,15 @@ class Paycheck(DocABC):
         def end_date(self) -> dt.date:
             return self.__end_date
 
+        def __reduce__(self):
+            return (_intern_pay_period, (self.__start_date, self.__end_date))
+
     def __init__(self, date: dt.date, pay_period_start_date: dt.date):
         self.__pay_date = date
         self.__gross_pay = None
         self.__deductions = None
         self.__net_pay = None
-        self.__pay_period = Paycheck.Period(pay_period_start_date, date)
+        self.__pay_period = _intern_pay_period(pay_period_start_date, date)
         super().__init__(date)
 
     @property
@@ -96,4 +111,9 @@ class Paycheck(DocABC):
 
     @property
     def pay_period(self) -> Paycheck.Period:
-        return self.__pay_period
\ No newline at end of file
+        return self.__pay_period
+
+
+@lru_cache(maxsize=PERIOD_CACHE_SIZE)
+def _intern_pay_period(start_date: dt.date, end_date: dt.date) -> Paycheck.Period:
+    return Paycheck.Period(start_date, end_date)
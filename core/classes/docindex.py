@@ -0,0 +1,101 @@
+from __future__ import annotations
+from bisect import bisect_left, bisect_right
+import datetime as dt
+import threading
+import core.classes.doc as doc
+
+# Serializes appends to lists shared between copies, so only one copy extends them
+_shared_append_lock = threading.Lock()
+
+
+class DocIndex():
+    __slots__ = ('__ordinals', '__docs', '__by_date', '__length', '__shared')
+
+    def __init__(self) -> None:
+        self.__ordinals = []
+        self.__docs = []
+        self.__by_date = {}
+        self.__length = 0
+        self.__shared = False
+
+    def __len__(self) -> int:
+        return self.__length
+
+    def __copy__(self) -> DocIndex:
+        # Copies share the containers and see the documents added before the copy. A copy appending past the
+        # end keeps sharing them; any other change, or an append after another copy's, copies them first
+        index = DocIndex.__new__(DocIndex)
+        index.__ordinals = self.__ordinals
+        index.__docs = self.__docs
+        index.__by_date = self.__by_date
+        index.__length = self.__length
+        index.__shared = self.__shared = True
+        return index
+
+    def __iter__(self):
+        return iter(self.__docs[:self.__length])
+
+    def __contains__(self, date: dt.date) -> bool:
+        return self.get(date) is not None
+
+    def get(self, date: dt.date) -> doc.DocABC:
+        document = self.__by_date.get(date, None)
+        if document is None or not self.__shared:
+            return document
+        # The shared dictionary also holds documents appended by later copies
+        position = bisect_left(self.__ordinals, date.toordinal(), 0, self.__length)
+        return document if position < self.__length and self.__docs[position] is document else None
+
+    def last_date(self) -> dt.date:
+        return self.__docs[self.__length - 1].date if self.__length else None
+
+    def add(self, document: doc.DocABC) -> None:
+        if document.date in self:
+            raise KeyError(document.date)
+        ordinal = document.date.toordinal()
+        length = self.__length
+        if not length or self.__ordinals[length - 1] < ordinal:
+            if not self.__shared:
+                self.__append(ordinal, document)
+                return
+            with _shared_append_lock:
+                if len(self.__docs) != length:
+                    self.__unshare()
+                self.__append(ordinal, document)
+            return
+        if self.__shared:
+            self.__unshare()
+        position = bisect_left(self.__ordinals, ordinal)
+        self.__ordinals.insert(position, ordinal)
+        self.__docs.insert(position, document)
+        self.__by_date[document.date] = document
+        self.__length += 1
+
+    def between(self, start_date: dt.date, end_date: dt.date) -> list:
+        low = bisect_left(self.__ordinals, start_date.toordinal(), 0, self.__length)
+        high = bisect_right(self.__ordinals, end_date.toordinal(), low, self.__length)
+        return self.__docs[low:high]
+
+    def remove_before(self, date: dt.date) -> list:
+        if self.__shared:
+            self.__unshare()
+        position = bisect_left(self.__ordinals, date.toordinal())
+        removed = self.__docs[:position]
+        del self.__ordinals[:position]
+        del self.__docs[:position]
+        for document in removed:
+            del self.__by_date[document.date]
+        self.__length -= position
+        return removed
+
+    def __append(self, ordinal: int, document: doc.DocABC) -> None:
+        self.__ordinals.append(ordinal)
+        self.__docs.append(document)
+        self.__by_date[document.date] = document
+        self.__length += 1
+
+    def __unshare(self) -> None:
+        self.__ordinals = self.__ordinals[:self.__length]
+        self.__docs = self.__docs[:self.__length]
+        self.__by_date = {document.date: document for document in self.__docs}
+        self.__shared = False
@@ -1,13 +1,16 @@
 from __future__ import annotations
+from copy import copy
 from datetime import date, timedelta
 from core.classes.affiliation import UnionAffiliation
 from core.classes.doc import Paycheck
 from core.classes.paymentclassification import PaymentClassificationABC
-from core.classes.paymentschedule import PaymentScheduleABC
+from core.classes.paymentschedule import PaymentScheduleABC, pay_period_start_date
 from core.classes.paymentmethod import PaymentMethodABC
 
 
 class Employee():
+    __slots__ = ('__emp_id', '__name', '__address', '__affiliation', '__classification', '__method', '__schedule')
+
     def __init__(self, emp_id, name, address) -> None:
         self.__emp_id = emp_id
         self.__name = name
@@ -17,6 +20,15 @@ class Employee():
         self.__method = None
         self.__schedule = None
     
+    def __copy__(self) -> Employee:
+        # Classification and affiliation own mutable documents; schedules and methods are shared as they never change
+        employee = Employee(self.__emp_id, self.__name, self.__address)
+        employee.__classification = copy(self.__classification)
+        employee.__affiliation = copy(self.__affiliation)
+        employee.__method = self.__method
+        employee.__schedule = self.__schedule
+        return employee
+
     @property
     def emp_id(self):
         return self.__emp_id
@@ -45,6 +57,7 @@ class Employee():
     def classification(self, classification: PaymentClassificationABC):
         if isinstance(classification, PaymentClassificationABC):
              self.__classification = classification
+             classification.track_pay_periods(self.__schedule)
         else:
             raise TypeError('Invalid type of argument \"classification\".')
 
@@ -56,6 +69,10 @@ class Employee():
     def schedule(self, schedule):
         if isinstance(schedule, PaymentScheduleABC):
              self.__schedule = schedule
+             if self.__classification is not None:
+                 self.__classification.track_pay_periods(schedule)
+             if self.__affiliation is not None:
+                 self.__affiliation.track_pay_periods(schedule)
         else:
             raise TypeError('Invalid type of argument \"schedule\".')
 
@@ -78,6 +95,8 @@ class Employee():
     def affiliation(self, affiliation):
         if isinstance(affiliation, UnionAffiliation) or affiliation is None:
             self.__affiliation = affiliation
+            if affiliation is not None:
+                affiliation.track_pay_periods(self.__schedule)
         else:
             raise TypeError('Invalid type of argument \"affiliation\".')
 
@@ -85,7 +104,7 @@ class Employee():
         return self.__schedule.is_pay_date(pay_data)
     
     def get_pay_period_start_date(self, pay_data: date) -> date:
-        return self.__schedule.get_pay_period_start_date(pay_data)
+        return pay_period_start_date(self.__schedule, pay_data)
 
     def payday(self, paycheck: Paycheck) -> None:
         gross_pay = self.__classification.calculate_pay(paycheck)
@@ -96,4 +115,5 @@ class Employee():
         paycheck.gross_pay = gross_pay
         paycheck.deductions = deductions
         paycheck.net_pay = net_pay
+        paycheck.payee = self.__name
         self.__method.pay(paycheck)
\ No newline at end of file
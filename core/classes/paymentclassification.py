@@ -1,12 +1,16 @@
 from __future__ import annotations
 from abc import ABC, abstractmethod
+from copy import copy
 import datetime
-import calendar
-from re import S
 import core.classes.doc as doc
+from core.classes.docindex import DocIndex
+from core.classes.periodtotals import PeriodTotals
+from core.classes.timecardstore import ColumnarTimeCardStore
 
 
 class PaymentClassificationABC(ABC):
+    __slots__ = ()
+
     @abstractmethod
     def __init__(self) -> None:
         super().__init__()
@@ -15,7 +19,15 @@ class PaymentClassificationABC(ABC):
     def calculate_pay(self, paycheck: doc.Paycheck) -> float:
         pass
 
+    def track_pay_periods(self, schedule) -> None:
+        pass
+
+    def compact(self, before_date: datetime.date) -> list:
+        return []
+
 class SalariedClassification(PaymentClassificationABC):
+    __slots__ = ('__salary',)
+
     def __init__(self, salary) -> SalariedClassification:
         if type(salary) is float:
             self.__salary = salary
@@ -31,31 +43,77 @@ class SalariedClassification(PaymentClassificationABC):
         return self.__salary
 
 class HourlyClassification(PaymentClassificationABC):
-    def __init__(self, hourly_rate: float) -> HourlyClassification:
+    __slots__ = ('__hourly_rate', '__columnar', '__time_cards', '__period_totals')
+
+    def __init__(self, hourly_rate: float, columnar: bool = False) -> HourlyClassification:
         self.__hourly_rate = hourly_rate
-        self.__time_cards = {}
+        self.__columnar = columnar
+        self.__time_cards = ColumnarTimeCardStore() if columnar else DocIndex()
+        self.__period_totals = None
         super().__init__()
 
+    def __copy__(self) -> HourlyClassification:
+        classification = HourlyClassification.__new__(HourlyClassification)
+        classification.__hourly_rate = self.__hourly_rate
+        classification.__columnar = self.__columnar
+        classification.__time_cards = copy(self.__time_cards)
+        classification.__period_totals = copy(self.__period_totals)
+        return classification
+
     @property
     def hourly_rate(self):
         return self.__hourly_rate
 
+    @property
+    def columnar(self) -> bool:
+        return self.__columnar
+
     def add_time_card(self, time_card: doc.TimeCard) -> None:
         if time_card.date in self.__time_cards:
             raise Exception('Time card for this date alredy excits')
-        self.__time_cards[time_card.date] = time_card
+        self.__time_cards.add(time_card)
+        if self.__period_totals is not None:
+            self.__period_totals.add(
+                time_card.date, self.__calculate_pay_for_time_card(time_card), self.__calculate_pay_between
+            )
 
     def get_time_card(self, date: datetime.date) -> doc.TimeCard:
-        return self.__time_cards.get(date, None)
+        return self.__time_cards.get(date)
+
+    def time_cards_between(self, start_date: datetime.date, end_date: datetime.date) -> list:
+        return self.__time_cards.between(start_date, end_date)
+
+    def hours_between(self, start_date: datetime.date, end_date: datetime.date):
+        if self.__columnar:
+            return self.__time_cards.hours_between(start_date, end_date)
+        return [time_card.hours for time_card in self.__time_cards.between(start_date, end_date)]
+
+    def compact(self, before_date: datetime.date) -> list:
+        if self.__period_totals is not None:
+            self.__period_totals.discard_before(before_date)
+        return self.__time_cards.remove_before(before_date)
+
+    def track_pay_periods(self, schedule) -> None:
+        if schedule is None:
+            self.__period_totals = None
+        elif self.__period_totals is None or self.__period_totals.schedule is not schedule:
+            self.__period_totals = PeriodTotals(
+                schedule, 0.0, self.__time_cards.last_date(), self.__calculate_pay_between
+            )
     
     def calculate_pay(self, paycheck: doc.Paycheck) -> float:
+        if self.__period_totals is not None:
+            total_pay = self.__period_totals.get(paycheck.pay_period.start_date, paycheck.pay_period.end_date)
+            if total_pay is not None:
+                return total_pay
+        return self.__calculate_pay_between(paycheck.pay_period.start_date, paycheck.pay_period.end_date)
+
+    def __calculate_pay_between(self, start_date: datetime.date, end_date: datetime.date) -> float:
+        if self.__columnar:
+            return self.__time_cards.calculate_pay(self.__hourly_rate, start_date, end_date)
         total_pay = 0.0
-        card_date = paycheck.pay_period.start_date
-        while card_date <= paycheck.pay_period.end_date:
-            time_card = self.__time_cards.get(card_date, None)
-            if time_card is not None:
-                total_pay += self.__calculate_pay_for_time_card(time_card)   
-            card_date += datetime.timedelta(days=1)   
+        for time_card in self.time_cards_between(start_date, end_date):
+            total_pay += self.__calculate_pay_for_time_card(time_card)
         return total_pay
 
     def __calculate_pay_for_time_card(self, time_card):
@@ -64,12 +122,23 @@ class HourlyClassification(PaymentClassificationABC):
         return self.__hourly_rate * normal_hours + self.__hourly_rate * 1.5 * overtime_hours
 
 class CommissionedClassification(PaymentClassificationABC):
+    __slots__ = ('__commission_rate', '__salary', '__sales_receipts', '__period_totals')
+
     def __init__(self, commission_rate: float, salary: float) -> CommissionedClassification:
         self.__commission_rate = commission_rate
         self.__salary = salary
-        self.__sales_receipts = {}
+        self.__sales_receipts = DocIndex()
+        self.__period_totals = None
         super().__init__()
     
+    def __copy__(self) -> CommissionedClassification:
+        classification = CommissionedClassification.__new__(CommissionedClassification)
+        classification.__commission_rate = self.__commission_rate
+        classification.__salary = self.__salary
+        classification.__sales_receipts = copy(self.__sales_receipts)
+        classification.__period_totals = copy(self.__period_totals)
+        return classification
+
     @property
     def commission_rate(self):
         return self.__commission_rate
@@ -81,17 +150,40 @@ class CommissionedClassification(PaymentClassificationABC):
     def add_sales_receipt(self, sales_receipt: doc.SalesReceipt) -> None:
         if sales_receipt.date in self.__sales_receipts:
             raise Exception('Sales receipt for this date alredy excits')
-        self.__sales_receipts[sales_receipt.date] = sales_receipt
+        self.__sales_receipts.add(sales_receipt)
+        if self.__period_totals is not None:
+            self.__period_totals.add(
+                sales_receipt.date, sales_receipt.amount * self.__commission_rate, self.__calculate_pay_between
+            )
 
     def get_sales_receipt(self, date: datetime.date) -> doc.SalesReceipt:
-        return self.__sales_receipts.get(date, None)
+        return self.__sales_receipts.get(date)
+
+    def sales_receipts_between(self, start_date: datetime.date, end_date: datetime.date) -> list:
+        return self.__sales_receipts.between(start_date, end_date)
+
+    def compact(self, before_date: datetime.date) -> list:
+        if self.__period_totals is not None:
+            self.__period_totals.discard_before(before_date)
+        return self.__sales_receipts.remove_before(before_date)
+
+    def track_pay_periods(self, schedule) -> None:
+        if schedule is None:
+            self.__period_totals = None
+        elif self.__period_totals is None or self.__period_totals.schedule is not schedule:
+            self.__period_totals = PeriodTotals(
+                schedule, self.__salary, self.__sales_receipts.last_date(), self.__calculate_pay_between
+            )
 
     def calculate_pay(self, paycheck: doc.Paycheck) -> float:
+        if self.__period_totals is not None:
+            total_pay = self.__period_totals.get(paycheck.pay_period.start_date, paycheck.pay_period.end_date)
+            if total_pay is not None:
+                return total_pay
+        return self.__calculate_pay_between(paycheck.pay_period.start_date, paycheck.pay_period.end_date)
+
+    def __calculate_pay_between(self, start_date: datetime.date, end_date: datetime.date) -> float:
         total_pay = self.__salary
-        sales_receipt_date = paycheck.pay_period.start_date
-        while sales_receipt_date <= paycheck.pay_period.end_date:
-            sales_receipt = self.get_sales_receipt(sales_receipt_date)
-            if sales_receipt is not None:
-                total_pay += sales_receipt.amount * self.__commission_rate
-            sales_receipt_date += datetime.timedelta(days=1)
+        for sales_receipt in self.sales_receipts_between(start_date, end_date):
+            total_pay += sales_receipt.amount * self.__commission_rate
         return total_pay
\ No newline at end of file
@@ -5,18 +5,25 @@ from core.classes.doc import Paycheck
 
 
 class PaymentMethodABC(ABC):
+    __slots__ = ()
+
     @abstractmethod
     def pay(self, paycheck: Paycheck) -> None:
         pass
 
 class HoldMethod(PaymentMethodABC):
+    __slots__ = ()
+
     def pay(self, paycheck: Paycheck) -> None:
         paycheck.disposition = 'Hold'
 
 class DirectMethod(PaymentMethodABC):
+    __slots__ = ('__bank', '__account')
+
     def __init__(self, bank, account) -> DirectMethod:
-        self.__bank = bank
-        self.__account = account
+        # JSON and SQLite hand numeric accounts over as numbers; they are kept as text like every other account
+        self.__bank = bank if bank is None else str(bank)
+        self.__account = account if account is None else str(account)
         super().__init__()
 
     @property
@@ -28,9 +35,12 @@ class DirectMethod(PaymentMethodABC):
         return self.__bank
 
     def pay(self, paycheck: Paycheck) -> None:
-        pass
+        paycheck.disposition = 'Direct'
+        paycheck.method = self
 
 class MailMethod(PaymentMethodABC):
+    __slots__ = ('__address',)
+
     def __init__(self, address) -> MailMethod:
         self.__address = address
         super().__init__()
@@ -1,8 +1,10 @@
 from __future__ import annotations
 from abc import ABC, abstractmethod
-from calendar import month
 from datetime import date, timedelta
+from functools import lru_cache
 import math
+from weakref import WeakValueDictionary
+from core.classes.dateutils import PERIOD_CACHE_SIZE
 
 
 
@@ -14,7 +16,26 @@ class PaymentScheduleABC(ABC):
     def get_pay_period_start_date(self, pay_data: date) -> date:
         pass
 
+    def get_pay_period_end_date(self, document_date: date) -> date:
+        pay_data = document_date
+        for _ in range(366):
+            if self.is_pay_date(pay_data):
+                start_date = self.get_pay_period_start_date(pay_data)
+                return pay_data if start_date is None or start_date <= document_date else None
+            pay_data += timedelta(days=1)
+        return None
+
 class MonthlySchedule(PaymentScheduleABC):
+    __instance = None
+
+    def __new__(cls) -> MonthlySchedule:
+        if MonthlySchedule.__instance is None:
+            MonthlySchedule.__instance = super().__new__(cls)
+        return MonthlySchedule.__instance
+
+    def __reduce__(self):
+        return (MonthlySchedule, ())
+
     def is_pay_date(self, pay_data: date) -> bool:
         return self.__is_last_day_of_month(pay_data)
     
@@ -28,24 +49,50 @@ class MonthlySchedule(PaymentScheduleABC):
         else:
             return date(pay_data.year, next_day.month - 1, next_day.day)
 
+    def get_pay_period_end_date(self, document_date: date) -> date:
+        if document_date.month == 12:
+            return date(document_date.year, 12, 31)
+        return date(document_date.year, document_date.month + 1, 1) - timedelta(days=1)
+
     def __is_last_day_of_month(self, pay_data: date):
         return pay_data.month != (pay_data + timedelta(days=1)).month
         
 
 class WeeklySchedule(PaymentScheduleABC):
+    __instance = None
+
+    def __new__(cls) -> WeeklySchedule:
+        if WeeklySchedule.__instance is None:
+            WeeklySchedule.__instance = super().__new__(cls)
+        return WeeklySchedule.__instance
+
+    def __reduce__(self):
+        return (WeeklySchedule, ())
+
     def is_pay_date(self, pay_data: date) -> bool:
         return pay_data.weekday() == 4 #Friday
     
     def get_pay_period_start_date(self, pay_data: date) -> date:
         return pay_data - timedelta(weeks=1) + timedelta(days=1)
 
+    def get_pay_period_end_date(self, document_date: date) -> date:
+        return document_date + timedelta(days=(4 - document_date.weekday()) % 7)
+
 class BeweeklySchedule(PaymentScheduleABC):
-    def __init__(self, work_start_date: date) -> None:
-        if type(work_start_date) is date:
-            self.__work_start_date = work_start_date
-        else:
+    __instances = WeakValueDictionary()
+
+    def __new__(cls, work_start_date: date) -> BeweeklySchedule:
+        if type(work_start_date) is not date:
             raise TypeError('Invalid type of argument \"work_start_date\".')
-        super().__init__()
+        instance = BeweeklySchedule.__instances.get(work_start_date, None)
+        if instance is None:
+            instance = super().__new__(cls)
+            instance.__work_start_date = work_start_date
+            BeweeklySchedule.__instances[work_start_date] = instance
+        return instance
+
+    def __reduce__(self):
+        return (BeweeklySchedule, (self.__work_start_date,))
     
     @property
     def work_start_date(self):
@@ -61,4 +108,15 @@ class BeweeklySchedule(PaymentScheduleABC):
         pay_period_start_date = pay_data - timedelta(weeks=2) + timedelta(days=1)
         if(pay_period_start_date < self.__work_start_date):
             pay_period_start_date = self.__work_start_date
-        return pay_period_start_date
\ No newline at end of file
+        return pay_period_start_date
+
+    def get_pay_period_end_date(self, document_date: date) -> date:
+        if document_date < self.__work_start_date:
+            return None
+        friday = document_date + timedelta(days=(4 - document_date.weekday()) % 7)
+        return friday if self.is_pay_date(friday) else friday + timedelta(weeks=1)
+
+
+@lru_cache(maxsize=PERIOD_CACHE_SIZE)
+def pay_period_start_date(schedule: PaymentScheduleABC, pay_data: date) -> date:
+    return schedule.get_pay_period_start_date(pay_data)
@@ -0,0 +1,79 @@
+from __future__ import annotations
+from datetime import date
+from core.classes.paymentschedule import PaymentScheduleABC, pay_period_start_date
+
+MAX_TRACKED_PERIODS = 4
+
+
+class PeriodTotals():
+    __slots__ = ('__schedule', '__initial', '__totals', '__since')
+
+    def __init__(self, schedule: PaymentScheduleABC, initial: float = 0.0, last_date: date = None,
+                 recalculate=None) -> None:
+        if not isinstance(schedule, PaymentScheduleABC):
+            raise TypeError('Invalid type of argument \"schedule\".')
+        self.__schedule = schedule
+        self.__initial = initial
+        self.__totals = {}
+        # Periods starting on or before this day may hold documents the totals never saw, either stored before
+        # tracking began or in a period dropped to keep the totals bounded, so they are left to a scan
+        self.__since = 0
+        if last_date is not None:
+            self.__since = last_date.toordinal()
+            pay_date = schedule.get_pay_period_end_date(last_date)
+            if pay_date is not None:
+                # Stored documents are summed once for the period of the latest of them, the one payday pays next
+                start_date = pay_period_start_date(schedule, pay_date)
+                self.__since = start_date.toordinal() - 1
+                self.__totals[pay_date.toordinal()] = (recalculate(start_date, pay_date), last_date.toordinal())
+
+    def __copy__(self) -> PeriodTotals:
+        totals = PeriodTotals(self.__schedule, self.__initial)
+        totals.__totals = self.__totals.copy()
+        totals.__since = self.__since
+        return totals
+
+    def __len__(self) -> int:
+        return len(self.__totals)
+
+    @property
+    def schedule(self) -> PaymentScheduleABC:
+        return self.__schedule
+
+    def add(self, document_date: date, value: float, recalculate) -> None:
+        pay_date = self.__schedule.get_pay_period_end_date(document_date)
+        if pay_date is None:
+            return
+        key = pay_date.toordinal()
+        ordinal = document_date.toordinal()
+        entry = self.__totals.get(key, None)
+        if entry is None:
+            if key <= self.__since or pay_period_start_date(self.__schedule, pay_date).toordinal() <= self.__since:
+                return
+            self.__totals[key] = (self.__initial + value, ordinal)
+            if len(self.__totals) > MAX_TRACKED_PERIODS:
+                oldest = min(self.__totals)
+                del self.__totals[oldest]
+                self.__since = max(self.__since, oldest)
+            return
+        total, last_ordinal = entry
+        if last_ordinal < ordinal:
+            self.__totals[key] = (total + value, ordinal)
+        else:
+            # Summing in date order keeps the total bit-identical to a rescan of the period
+            start_date = pay_period_start_date(self.__schedule, pay_date)
+            self.__totals[key] = (recalculate(start_date, pay_date), last_ordinal)
+
+    def discard_before(self, before_date: date) -> None:
+        ordinal = before_date.toordinal()
+        for key in [key for key in self.__totals if key < ordinal]:
+            del self.__totals[key]
+
+    def get(self, start_date: date, end_date: date):
+        if start_date.toordinal() <= self.__since:
+            return None
+        if self.__schedule.get_pay_period_end_date(end_date) != end_date:
+            return None
+        if pay_period_start_date(self.__schedule, end_date) != start_date:
+            return None
+        return self.__totals.get(end_date.toordinal(), (self.__initial, 0))[0]
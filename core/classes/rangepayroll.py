@@ -0,0 +1,120 @@
+from __future__ import annotations
+from datetime import date, timedelta
+from core.classes.dateutils import count_fridays
+from core.classes.doc import Paycheck
+from core.classes.paymentclassification import CommissionedClassification, HourlyClassification, SalariedClassification
+from core.classes.paymentschedule import BeweeklySchedule, MonthlySchedule, PaymentScheduleABC, WeeklySchedule, pay_period_start_date
+from core.classes.timecardstore import OVERTIME_RATE, OVERTIME_THRESHOLD
+
+# Schedules whose pay periods never overlap, so one forward pass over the documents covers every period
+SWEPT_SCHEDULES = (MonthlySchedule, WeeklySchedule, BeweeklySchedule)
+SWEPT_CLASSIFICATIONS = (SalariedClassification, HourlyClassification, CommissionedClassification)
+
+
+def pay_dates_between(schedule: PaymentScheduleABC, start_date: date, end_date: date) -> list:
+    pay_dates = []
+    pay_date = start_date
+    while pay_date <= end_date:
+        if schedule.is_pay_date(pay_date):
+            pay_dates.append(pay_date)
+        pay_date += timedelta(days=1)
+    return pay_dates
+
+
+class RangePayrollEngine():
+    def __init__(self, start_date: date, end_date: date) -> None:
+        if end_date < start_date:
+            raise ValueError('Invalid value of argument \"end_date\".')
+        self.__start_date = start_date
+        self.__end_date = end_date
+        self.__periods = {}
+
+    @property
+    def start_date(self) -> date:
+        return self.__start_date
+
+    @property
+    def end_date(self) -> date:
+        return self.__end_date
+
+    def periods(self, schedule: PaymentScheduleABC) -> list:
+        # Schedule instances are shared, so the calendar is walked once per distinct schedule, not per employee
+        periods = self.__periods.get(schedule, None)
+        if periods is None:
+            periods = self.__periods[schedule] = [
+                (pay_date, pay_period_start_date(schedule, pay_date))
+                for pay_date in pay_dates_between(schedule, self.__start_date, self.__end_date)
+            ]
+        return periods
+
+    def run(self, employee) -> list:
+        if employee.schedule is None:
+            return []
+        paychecks = [Paycheck(pay_date, start_date) for pay_date, start_date in self.periods(employee.schedule)]
+        if not paychecks:
+            return paychecks
+        classification = employee.classification
+        if type(employee.schedule) not in SWEPT_SCHEDULES or type(classification) not in SWEPT_CLASSIFICATIONS:
+            for paycheck in paychecks:
+                employee.payday(paycheck)
+            return paychecks
+
+        first_date = paychecks[0].pay_period.start_date
+        last_date = paychecks[-1].pay_period.end_date
+        if type(classification) is SalariedClassification:
+            gross_pay = [classification.salary] * len(paychecks)
+        elif type(classification) is HourlyClassification:
+            hourly_rate = classification.hourly_rate
+            gross_pay = _sweep(
+                paychecks, classification.time_cards_between(first_date, last_date), 0.0,
+                lambda time_card: _time_card_pay(hourly_rate, time_card.hours)
+            )
+        else:
+            commission_rate = classification.commission_rate
+            gross_pay = _sweep(
+                paychecks, classification.sales_receipts_between(first_date, last_date), classification.salary,
+                lambda sales_receipt: sales_receipt.amount * commission_rate
+            )
+
+        affiliation = employee.affiliation
+        if affiliation is None:
+            deductions = [0.00] * len(paychecks)
+        else:
+            service_charges = _sweep(
+                paychecks, affiliation.service_charges_between(first_date, last_date), 0.0,
+                lambda service_charge: service_charge.amount
+            )
+            deductions = [
+                affiliation.dues * count_fridays(paycheck.pay_period.start_date, paycheck.pay_period.end_date) + service_charge
+                for paycheck, service_charge in zip(paychecks, service_charges)
+            ]
+
+        for paycheck, gross, deduction in zip(paychecks, gross_pay, deductions):
+            paycheck.gross_pay = gross
+            paycheck.deductions = deduction
+            paycheck.net_pay = gross - deduction
+            paycheck.payee = employee.name
+            employee.method.pay(paycheck)
+        return paychecks
+
+
+def _sweep(paychecks: list, documents: list, initial: float, value) -> list:
+    # Totals start from the same value and add in date order, matching calculate_pay bit for bit
+    totals = []
+    position = 0
+    for paycheck in paychecks:
+        start_date = paycheck.pay_period.start_date
+        end_date = paycheck.pay_period.end_date
+        total = initial
+        while position < len(documents) and documents[position].date <= end_date:
+            if documents[position].date >= start_date:
+                total += value(documents[position])
+            position += 1
+        totals.append(total)
+    return totals
+
+
+def _time_card_pay(hourly_rate: float, hours: float) -> float:
+    overtime_hours = max(0.0, hours - OVERTIME_THRESHOLD)
+    normal_hours = hours - overtime_hours
+    return hourly_rate * normal_hours + hourly_rate * OVERTIME_RATE * overtime_hours
@@ -0,0 +1,143 @@
+from __future__ import annotations
+from array import array
+from bisect import bisect_left, bisect_right
+import datetime as dt
+from functools import lru_cache
+import core.classes.doc as doc
+from core.classes.docindex import _shared_append_lock
+
+OVERTIME_THRESHOLD = 8.0
+OVERTIME_RATE = 1.5
+
+
+class ColumnarTimeCardStore():
+    __slots__ = ('__ordinals', '__hours', '__length', '__shared')
+
+    def __init__(self) -> None:
+        self.__ordinals = array('i')
+        self.__hours = array('d')
+        self.__length = 0
+        self.__shared = False
+
+    def __len__(self) -> int:
+        return self.__length
+
+    def __copy__(self) -> ColumnarTimeCardStore:
+        # Shares the columns the way DocIndex shares its lists
+        store = ColumnarTimeCardStore.__new__(ColumnarTimeCardStore)
+        store.__ordinals = self.__ordinals
+        store.__hours = self.__hours
+        store.__length = self.__length
+        store.__shared = self.__shared = True
+        return store
+
+    def __iter__(self):
+        return iter(self.between(dt.date.min, dt.date.max))
+
+    def __contains__(self, date: dt.date) -> bool:
+        return self.__find(date.toordinal()) is not None
+
+    def last_date(self) -> dt.date:
+        return dt.date.fromordinal(self.__ordinals[self.__length - 1]) if self.__length else None
+
+    def get(self, date: dt.date) -> doc.TimeCard:
+        position = self.__find(date.toordinal())
+        if position is None:
+            return None
+        return doc.TimeCard(date, self.__hours[position])
+
+    def add(self, time_card: doc.TimeCard) -> None:
+        ordinal = time_card.date.toordinal()
+        length = self.__length
+        if not length or self.__ordinals[length - 1] < ordinal:
+            if not self.__shared:
+                self.__append(ordinal, time_card.hours)
+                return
+            with _shared_append_lock:
+                if len(self.__ordinals) != length:
+                    self.__unshare()
+                self.__append(ordinal, time_card.hours)
+            return
+        if self.__shared:
+            self.__unshare()
+        position = bisect_left(self.__ordinals, ordinal)
+        if self.__ordinals[position] == ordinal:
+            raise KeyError(time_card.date)
+        self.__ordinals.insert(position, ordinal)
+        self.__hours.insert(position, time_card.hours)
+        self.__length += 1
+
+    def between(self, start_date: dt.date, end_date: dt.date) -> list:
+        low, high = self.__slice(start_date, end_date)
+        return [
+            doc.TimeCard(dt.date.fromordinal(self.__ordinals[position]), self.__hours[position])
+            for position in range(low, high)
+        ]
+
+    def remove_before(self, date: dt.date) -> list:
+        if self.__shared:
+            self.__unshare()
+        position = bisect_left(self.__ordinals, date.toordinal())
+        removed = [
+            doc.TimeCard(dt.date.fromordinal(ordinal), hours)
+            for ordinal, hours in zip(self.__ordinals[:position], self.__hours[:position])
+        ]
+        del self.__ordinals[:position]
+        del self.__hours[:position]
+        self.__length -= position
+        return removed
+
+    def hours_between(self, start_date: dt.date, end_date: dt.date) -> array:
+        low, high = self.__slice(start_date, end_date)
+        return self.__hours[low:high]
+
+    def calculate_pay(self, hourly_rate: float, start_date: dt.date, end_date: dt.date) -> float:
+        low, high = self.__slice(start_date, end_date)
+        if low == high:
+            return 0.0
+        np = _numpy()
+        if np is not None:
+            # A slice, so no buffer stays exported from columns another copy may be appending to
+            hours = np.frombuffer(self.__hours[low:high], dtype=np.float64)
+            overtime_hours = np.maximum(hours - OVERTIME_THRESHOLD, 0.0)
+            normal_hours = hours - overtime_hours
+            pays = hourly_rate * normal_hours + hourly_rate * OVERTIME_RATE * overtime_hours
+            # Accumulated in date order like every other path; np.sum adds pairwise and can differ in the last bits
+            return float(np.add.accumulate(pays)[-1])
+        total_pay = 0.0
+        for hours in self.__hours[low:high]:
+            overtime_hours = max(0.0, hours - OVERTIME_THRESHOLD)
+            normal_hours = hours - overtime_hours
+            total_pay += hourly_rate * normal_hours + hourly_rate * OVERTIME_RATE * overtime_hours
+        return total_pay
+
+    def __find(self, ordinal: int):
+        position = bisect_left(self.__ordinals, ordinal, 0, self.__length)
+        if position < self.__length and self.__ordinals[position] == ordinal:
+            return position
+        return None
+
+    def __slice(self, start_date: dt.date, end_date: dt.date):
+        low = bisect_left(self.__ordinals, start_date.toordinal(), 0, self.__length)
+        high = bisect_right(self.__ordinals, end_date.toordinal(), low, self.__length)
+        return low, high
+
+    def __append(self, ordinal: int, hours: float) -> None:
+        self.__ordinals.append(ordinal)
+        self.__hours.append(hours)
+        self.__length += 1
+
+    def __unshare(self) -> None:
+        self.__ordinals = self.__ordinals[:self.__length]
+        self.__hours = self.__hours[:self.__length]
+        self.__shared = False
+
+
+@lru_cache(maxsize=None)
+def _numpy():
+    # Imported on first use; loading NumPy takes several times as long as the rest of the payday path
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
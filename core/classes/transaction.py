@@ -1,25 +1,60 @@
 from __future__ import annotations
 from abc import ABC, abstractmethod
-from datetime import date
+from array import array
+from datetime import date, timedelta
+from itertools import islice
+import math
+import threading
 from core.classes.employee import Employee
-from core.classes.paymentclassification import *
-from core.classes.paymentmethod import *
-from core.classes.paymentschedule import *
-from core.classes.doc import *
-from core.classes.affiliation import *
+from core.classes.paymentclassification import CommissionedClassification, HourlyClassification, PaymentClassificationABC, SalariedClassification
+from core.classes.paymentmethod import DirectMethod, HoldMethod, MailMethod, PaymentMethodABC
+from core.classes.paymentschedule import BeweeklySchedule, MonthlySchedule, PaymentScheduleABC, WeeklySchedule, pay_period_start_date
+from core.classes.doc import Paycheck, SalesReceipt, ServiceCharge, TimeCard
+from core.classes.affiliation import UnionAffiliation
+from core.classes.batchpayroll import BatchPayrollEngine
+from core.classes.rangepayroll import RangePayrollEngine
+from core.asyncdatabase import DEFAULT_CONCURRENCY, AsyncPayrollDatabaseABC, gather_limited
 from core.databasesabc import PayrollDatabaseABC
+from core.metrics import instrument_execute
+from core.paychecksink import PaycheckSinkABC
+
+# Annotation-only import; typing.TYPE_CHECKING is not used because loading typing alone costs more than this module
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from core.documentarchive import DocumentArchive
+
+BATCH_SHARD_SIZE = 10000
+# Set by a journal while it runs a transaction it does not log, so the changes that transaction makes through
+# other transactions are logged before they are applied
+_nested = threading.local()
 
 
 
 class TransactionABC(ABC):
+    def __init_subclass__(cls, **kwargs) -> None:
+        super().__init_subclass__(**kwargs)
+        if 'execute' in cls.__dict__:
+            cls.execute = instrument_execute(cls.execute)
+
     @abstractmethod
     def execute(self) -> None:
         pass
 
+    async def execute_async(self) -> None:
+        self.execute()
+
+    @property
+    def _ordering_keys(self) -> tuple:
+        return ()
+
+    @property
+    def _journaled(self) -> bool:
+        return True
+
 class DatabaseBoundTransactionABC(TransactionABC, ABC):
     @abstractmethod
     def __init__(self, database) -> None:
-        if isinstance(database, PayrollDatabaseABC):
+        if isinstance(database, (PayrollDatabaseABC, AsyncPayrollDatabaseABC)):
             self.__database = database
         else:
             raise TypeError('Invalid type of argument \"database\".')
@@ -29,6 +64,54 @@ class DatabaseBoundTransactionABC(TransactionABC, ABC):
     def _database(self):
         return self.__database
 
+    @property
+    def _employee_id(self) -> int:
+        return None
+
+    @property
+    def _union_member_id(self) -> int:
+        return None
+
+    @property
+    def _ordering_keys(self) -> tuple:
+        keys = ()
+        if self._employee_id is not None:
+            keys += (('employee', self._employee_id),)
+        if self._union_member_id is not None:
+            keys += (('union_member', self._union_member_id),)
+        return keys
+
+    def __getstate__(self) -> dict:
+        state = dict(self.__dict__)
+        del state['_DatabaseBoundTransactionABC__database']
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self.__database = None
+
+    def _execute_with(self, database: PayrollDatabaseABC) -> None:
+        bound_database = self.__database
+        self.__database = database
+        try:
+            self.execute()
+        finally:
+            self.__database = bound_database
+
+    async def execute_async(self) -> None:
+        if not isinstance(self.__database, AsyncPayrollDatabaseABC):
+            self.execute()
+            return
+        staged_database = _StagedDatabase()
+        if self._employee_id is not None:
+            staged_database.preload(self._employee_id, await self.__database.get_employee(self._employee_id))
+        if self._union_member_id is not None:
+            staged_database.preload_union_member(
+                self._union_member_id, await self.__database.get_union_member(self._union_member_id)
+            )
+        self._execute_with(staged_database)
+        await staged_database.flush_async(self.__database)
+
 
 class AddEmployeeTransactionABC(DatabaseBoundTransactionABC, ABC):
     def __init__(self, emp_id: int, name: str, address: str, database: PayrollDatabaseABC) -> None:
@@ -38,6 +121,10 @@ class AddEmployeeTransactionABC(DatabaseBoundTransactionABC, ABC):
 
         super().__init__(database)
     
+    @property
+    def _ordering_keys(self) -> tuple:
+        return (('employee', self.__emp_id),)
+
     @abstractmethod
     def _make_clasification(self):
         pass
@@ -98,11 +185,17 @@ class AddTimeCardTransaction(DatabaseBoundTransactionABC):
         self.__emp_id = emp_id
         super().__init__(database)
 
+    @property
+    def _employee_id(self) -> int:
+        return self.__emp_id
+
     def execute(self) -> None:
         employee = self._database.get_employee(self.__emp_id)
         if employee is not None:
             if isinstance(employee.classification, HourlyClassification):
-                employee.classification.add_time_card(TimeCard(self.__date, self.__hours))
+                time_card = TimeCard(self.__date, self.__hours)
+                employee.classification.add_time_card(time_card)
+                self._database.add_time_card(self.__emp_id, employee, time_card)
             else:
                 raise Exception('Attempt to add time card for not hourly rated employee')
         else:
@@ -114,12 +207,18 @@ class AddSalesReceiptTransaction(DatabaseBoundTransactionABC):
         self.__amount = amount
         self.__emp_id = emp_id
         super().__init__(database)
+
+    @property
+    def _employee_id(self) -> int:
+        return self.__emp_id
     
     def execute(self) -> None:
         employee = self._database.get_employee(self.__emp_id)
         if employee is not None:
             if isinstance(employee.classification, CommissionedClassification):
-                employee.classification.add_sales_receipt(SalesReceipt(self.__date, self.__amount))
+                sales_receipt = SalesReceipt(self.__date, self.__amount)
+                employee.classification.add_sales_receipt(sales_receipt)
+                self._database.add_sales_receipt(self.__emp_id, employee, sales_receipt)
             else:
                 raise Exception('Attempt to add sales receipt for not commissioned employee')
         else:
@@ -132,11 +231,17 @@ class AddServiceChargeTransaction(DatabaseBoundTransactionABC):
         self.__union_member_id = union_member_id
         super().__init__(database)
 
+    @property
+    def _union_member_id(self) -> int:
+        return self.__union_member_id
+
     def execute(self) -> None:
         employee = self._database.get_union_member(self.__union_member_id)
         if employee is not None:
             if isinstance(employee.affiliation, UnionAffiliation):
-                employee.affiliation.add_service_charge(ServiceCharge(self.__date, self.__amount))
+                service_charge = ServiceCharge(self.__date, self.__amount)
+                employee.affiliation.add_service_charge(service_charge)
+                self._database.add_service_charge(employee.emp_id, employee, service_charge)
             else:
                 raise Exception('Attempt to add service receipt for a union member with an unregistered membership')
         else:
@@ -148,6 +253,10 @@ class DeleteEmployeeTransaction(DatabaseBoundTransactionABC):
         self.__emp_id = emp_id      
         super().__init__(database)
 
+    @property
+    def _ordering_keys(self) -> tuple:
+        return (('employee', self.__emp_id),)
+
     def execute(self) -> None:
         self._database.delete_employee(self.__emp_id)
 
@@ -158,10 +267,15 @@ class ChangeEmployeeTransactionABC(DatabaseBoundTransactionABC, ABC):
         self.__emp_id = emp_id
         super().__init__(database)
 
+    @property
+    def _employee_id(self) -> int:
+        return self.__emp_id
+
     def execute(self) -> None:
         employee = self._database.get_employee(self.__emp_id)
         if employee is not None:
             self._change(employee)
+            self._write(employee)
         else:
             raise Exception('Employee not found')
 
@@ -169,6 +283,9 @@ class ChangeEmployeeTransactionABC(DatabaseBoundTransactionABC, ABC):
     def _change(self, employee: Employee) -> None:
         pass
 
+    def _write(self, employee: Employee) -> None:
+        self._database.update_employee(self.__emp_id, employee)
+
 class ChangeNameTransaction(ChangeEmployeeTransactionABC):
     def __init__(self, database, emp_id: int, new_name: str) -> ChangeNameTransaction:
         self.__new_name = new_name
@@ -195,6 +312,9 @@ class ChangeClassificationTransactionABC(ChangeEmployeeTransactionABC, ABC):
         employee.classification = self._get_classification()
         employee.schedule = self._get_schedule()
 
+    def _write(self, employee: Employee) -> None:
+        self._database.update_classification(employee.emp_id, employee)
+
     @abstractmethod 
     def _get_classification(self) -> PaymentClassificationABC:
         pass
@@ -245,6 +365,9 @@ class ChageMethodTransactionABC(ChangeEmployeeTransactionABC, ABC):
     def _change(self, employee: Employee) -> None:
         employee.method = self._get_method()
 
+    def _write(self, employee: Employee) -> None:
+        self._database.update_method(employee.emp_id, employee)
+
     @abstractmethod
     def _get_method(self) -> PaymentMethodABC:
         pass 
@@ -282,6 +405,9 @@ class ChangeAffiliationTransactionABC(ChangeEmployeeTransactionABC, ABC):
     def _change(self, employee: Employee) -> None:
         self._record_membership(employee)
         employee.affiliation = self._get_affiliation()
+
+    def _write(self, employee: Employee) -> None:
+        self._database.update_affiliation(employee.emp_id, employee)
     
     @abstractmethod
     def _record_membership(self, employee: Employee) -> None:
@@ -296,6 +422,11 @@ class ChangeMemberTransaction(ChangeAffiliationTransactionABC):
         self.__dues = dues
         self.__member_id = member_id
         super().__init__(database, emp_id)
+
+    @property
+    def _ordering_keys(self) -> tuple:
+        # Ties the membership to the employee, so charges on the member wait for it
+        return super()._ordering_keys + (('union_member', self.__member_id),)
     
     def _record_membership(self, employee: Employee) -> None:
         self._database.add_union_member(self.__member_id, employee)
@@ -315,20 +446,513 @@ class ChangeUnaffiliatedTransaction(ChangeAffiliationTransactionABC):
         return None
 
 class PaydayTransaction(DatabaseBoundTransactionABC):
-    def __init__(self, database, pay_data) -> None:
+    def __init__(self, database, pay_data, batch: bool = False, workers: int = 1, shard_size: int = None,
+                 sink: PaycheckSinkABC = None, keep_paychecks: bool = None, archive: DocumentArchive = None) -> None:
+        if workers < 1:
+            raise ValueError('Invalid value of argument \"workers\".')
+        if shard_size is not None and shard_size < 1:
+            raise ValueError('Invalid value of argument \"shard_size\".')
+        if sink is not None and not isinstance(sink, PaycheckSinkABC):
+            raise TypeError('Invalid type of argument \"sink\".')
         self.__pay_data = pay_data
-        self.__paychecks = {}
+        self.__batch = batch
+        self.__workers = workers
+        self.__shard_size = shard_size
+        self.__sink = sink
+        self.__archive = archive
+        if keep_paychecks is None:
+            keep_paychecks = sink is None
+        self.__paychecks = {} if keep_paychecks else None
         super().__init__(database)
     
     def execute(self) -> None:
-        emp_ids = self._database.get_all_employee_ids()
-        for emp_id in emp_ids:
-            employee = self._database.get_employee(emp_id)
-            if employee.is_pay_date(self.__pay_data):
-                pay_period_start_date = employee.get_pay_period_start_date(self.__pay_data)
-                paycheck = Paycheck(self.__pay_data, pay_period_start_date)
-                self.__paychecks[emp_id] = paycheck
-                employee.payday(paycheck)
+        for _ in self.iter_paychecks():
+            pass
+
+    def iter_paychecks(self):
+        yield from self.__emit(self.__pay())
+        if self.__archive is not None:
+            CompactDocumentsTransaction(self._database, self.__pay_data, self.__archive).execute()
+
+    async def execute_async(self, concurrency: int = DEFAULT_CONCURRENCY) -> None:
+        if not isinstance(self._database, AsyncPayrollDatabaseABC):
+            self.execute()
+            return
+        emp_ids = await self._database.get_employee_ids_paid_on(self.__pay_data)
+        employees = await self._database.get_employees(emp_ids, concurrency)
+        for _ in self.__emit(_iter_paychecks(self.__pay_data, employees.values(), self.__batch)):
+            pass
+
+    @property
+    def _journaled(self) -> bool:
+        return False
 
     def get_paycheck(self, emp_id: int) -> Paycheck:
-        return self.__paychecks.get(emp_id, None)
\ No newline at end of file
+        if self.__paychecks is None:
+            raise Exception('Paychecks are not kept by this transaction')
+        return self.__paychecks.get(emp_id, None)
+
+    def __emit(self, paychecks):
+        for emp_id, paycheck in paychecks:
+            if self.__paychecks is not None:
+                self.__paychecks[emp_id] = paycheck
+            if self.__sink is not None:
+                self.__sink.write(emp_id, paycheck)
+            yield emp_id, paycheck
+        if self.__sink is not None:
+            self.__sink.flush()
+
+    def __pay(self):
+        emp_ids = self._database.get_employee_ids_paid_on(self.__pay_data)
+        if self.__workers > 1:
+            yield from self.__pay_in_parallel(list(emp_ids))
+        elif self.__batch:
+            emp_ids = iter(emp_ids)
+            shard_size = self.__shard_size or BATCH_SHARD_SIZE
+            while shard := list(islice(emp_ids, shard_size)):
+                yield from _iter_paychecks(self.__pay_data, self._database.get_employees(shard).values(), True)
+        else:
+            employees = (self._database.get_employee(emp_id) for emp_id in emp_ids)
+            yield from _iter_paychecks(self.__pay_data, employees, False)
+
+    def __pay_in_parallel(self, emp_ids: list):
+        from collections import deque
+        from concurrent.futures import ProcessPoolExecutor
+        shard_size = self.__shard_size or max(1, math.ceil(len(emp_ids) / (self.__workers * 4)))
+        # Workers open their own handle on file-backed databases and read their shard of ids themselves;
+        # other databases ship the employees of a shard, and only a few shards are in flight at a time
+        reopen = self._database._reopen
+        in_flight = deque()
+        with ProcessPoolExecutor(max_workers=self.__workers, initializer=_open_worker_database, initargs=(reopen,)) as executor:
+            for start in range(0, len(emp_ids), shard_size):
+                shard = emp_ids[start:start + shard_size]
+                if reopen is None:
+                    employees = self._database.get_employees(shard)
+                    shard = [employee for employee in employees.values() if employee is not None]
+                else:
+                    employees = None
+                in_flight.append((executor.submit(_pay_shard, self.__pay_data, shard, self.__batch), employees))
+                if len(in_flight) >= self.__workers * 2:
+                    yield from self.__apply_payments(*in_flight.popleft())
+            while in_flight:
+                yield from self.__apply_payments(*in_flight.popleft())
+
+    def __apply_payments(self, future, employees: dict):
+        # Payment methods run here so their effects land on the parent's paychecks
+        for emp_id, start_date, gross_pay, deductions, net_pay, method, payee in future.result():
+            if employees is not None:
+                method = employees[emp_id].method
+                payee = employees[emp_id].name
+            paycheck = Paycheck(self.__pay_data, start_date)
+            paycheck.gross_pay = gross_pay
+            paycheck.deductions = deductions
+            paycheck.net_pay = net_pay
+            paycheck.payee = payee
+            method.pay(paycheck)
+            yield emp_id, paycheck
+
+
+class CompactDocumentsTransaction(DatabaseBoundTransactionABC):
+    def __init__(self, database, pay_data: date, archive: DocumentArchive) -> None:
+        self.__pay_data = pay_data
+        self.__archive = archive
+        self.__compacted = 0
+        super().__init__(database)
+
+    @property
+    def compacted(self) -> int:
+        return self.__compacted
+
+    @property
+    def _journaled(self) -> bool:
+        return False
+
+    def execute(self) -> None:
+        before_dates = {}
+        for emp_id in self._database.get_employee_ids_paid_on(self.__pay_data):
+            employee = self._database.get_employee(emp_id)
+            if employee is None or not employee.is_pay_date(self.__pay_data):
+                continue
+            # The last paid period stays live so payday can be rerun for the same date
+            before_date = employee.get_pay_period_start_date(self.__pay_data)
+            last_date = before_date - timedelta(days=1)
+            classification = employee.classification
+            time_cards = (classification.time_cards_between(date.min, last_date)
+                          if isinstance(classification, HourlyClassification) else [])
+            sales_receipts = (classification.sales_receipts_between(date.min, last_date)
+                              if isinstance(classification, CommissionedClassification) else [])
+            service_charges = (employee.affiliation.service_charges_between(date.min, last_date)
+                               if employee.affiliation is not None else [])
+            if time_cards or sales_receipts or service_charges:
+                self.__archive.add_documents(emp_id, time_cards, sales_receipts, service_charges)
+                before_dates[emp_id] = before_date
+        self.__compacted = self.__archive.commit()
+        if before_dates:
+            # Archived documents leave the database through a logged transaction, so a replay drops them again
+            _execute_nested(DeleteDocumentsTransaction(self._database, before_dates))
+
+
+class DeleteDocumentsTransaction(DatabaseBoundTransactionABC):
+    def __init__(self, database, before_dates: dict) -> None:
+        self.__before_dates = before_dates
+        super().__init__(database)
+
+    def execute(self) -> None:
+        updates = []
+        for emp_id, before_date in self.__before_dates.items():
+            employee = self._database.get_employee(emp_id)
+            if employee is None:
+                raise Exception('Employee not found')
+            employee.classification.compact(before_date)
+            if employee.affiliation is not None:
+                employee.affiliation.compact(before_date)
+            updates.append(('compact_documents', emp_id, employee, before_date))
+        self._database.apply_updates(updates)
+
+
+class PayrollRangeRun(DatabaseBoundTransactionABC):
+    def __init__(self, database, start_date: date, end_date: date, shard_size: int = None,
+                 sink: PaycheckSinkABC = None, keep_paychecks: bool = None) -> None:
+        if shard_size is not None and shard_size < 1:
+            raise ValueError('Invalid value of argument \"shard_size\".')
+        if sink is not None and not isinstance(sink, PaycheckSinkABC):
+            raise TypeError('Invalid type of argument \"sink\".')
+        self.__engine = RangePayrollEngine(start_date, end_date)
+        self.__shard_size = shard_size
+        self.__sink = sink
+        if keep_paychecks is None:
+            keep_paychecks = sink is None
+        self.__paychecks = {} if keep_paychecks else None
+        super().__init__(database)
+
+    @property
+    def _journaled(self) -> bool:
+        return False
+
+    def execute(self) -> None:
+        for _ in self.iter_paychecks():
+            pass
+
+    def iter_paychecks(self):
+        # Paychecks come out per employee in pay date order
+        emp_ids = iter(self._database.get_all_employee_ids())
+        shard_size = self.__shard_size or BATCH_SHARD_SIZE
+        while shard := list(islice(emp_ids, shard_size)):
+            for emp_id, employee in self._database.get_employees(shard).items():
+                if employee is None:
+                    continue
+                for paycheck in self.__engine.run(employee):
+                    if self.__paychecks is not None:
+                        self.__paychecks[(emp_id, paycheck.pay_date)] = paycheck
+                    if self.__sink is not None:
+                        self.__sink.write(emp_id, paycheck)
+                    yield emp_id, paycheck
+        if self.__sink is not None:
+            self.__sink.flush()
+
+    def get_paycheck(self, emp_id: int, pay_data: date) -> Paycheck:
+        if self.__paychecks is None:
+            raise Exception('Paychecks are not kept by this transaction')
+        return self.__paychecks.get((emp_id, pay_data), None)
+
+
+_worker_database = None
+
+
+def _execute_nested(transaction: TransactionABC) -> None:
+    executor = getattr(_nested, 'executor', None)
+    if executor is None:
+        transaction.execute()
+    else:
+        executor(transaction)
+
+
+def _open_worker_database(reopen) -> None:
+    global _worker_database
+    if reopen is not None:
+        factory, args = reopen
+        _worker_database = factory(*args)
+
+
+def _pay_shard(pay_data: date, shard: list, batch: bool) -> list:
+    # A shard is a list of ids when the worker has its own database handle, otherwise the employees themselves
+    if _worker_database is not None:
+        shard = [employee for employee in _worker_database.get_employees(shard).values() if employee is not None]
+    methods = {employee.emp_id: employee.method for employee in shard}
+    return [
+        (emp_id, paycheck.pay_period.start_date, paycheck.gross_pay, paycheck.deductions, paycheck.net_pay,
+         methods[emp_id] if _worker_database is not None else None, paycheck.payee if _worker_database is not None else None)
+        for emp_id, paycheck in _iter_paychecks(pay_data, shard, batch)
+    ]
+
+
+def _iter_paychecks(pay_data: date, employees, batch: bool):
+    if batch:
+        yield from BatchPayrollEngine(pay_data).run(employees).items()
+        return
+    for employee in employees:
+        if employee.is_pay_date(pay_data):
+            pay_period_start_date = employee.get_pay_period_start_date(pay_data)
+            paycheck = Paycheck(pay_data, pay_period_start_date)
+            employee.payday(paycheck)
+            yield employee.emp_id, paycheck
+
+
+class TransactionResult():
+    def __init__(self, transaction: TransactionABC, error: Exception = None) -> None:
+        self.__transaction = transaction
+        self.__error = error
+
+    @property
+    def transaction(self) -> TransactionABC:
+        return self.__transaction
+
+    @property
+    def error(self) -> Exception:
+        return self.__error
+
+    @property
+    def succeeded(self) -> bool:
+        return self.__error is None
+
+class TransactionBatch(DatabaseBoundTransactionABC):
+    def __init__(self, database, transactions=()) -> None:
+        self.__transactions = list(transactions)
+        self.__results = []
+        super().__init__(database)
+
+    @property
+    def transactions(self) -> list:
+        return list(self.__transactions)
+
+    @property
+    def results(self) -> list:
+        return self.__results
+
+    def add(self, transaction: TransactionABC) -> None:
+        self.__transactions.append(transaction)
+
+    def execute(self) -> None:
+        staged_database = _StagedDatabase(self._database)
+        staged_database.prefetch(
+            transaction._employee_id
+            for transaction in self.__transactions
+            if isinstance(transaction, DatabaseBoundTransactionABC) and transaction._employee_id is not None
+        )
+        results = []
+        for transaction in self.__transactions:
+            try:
+                if isinstance(transaction, DatabaseBoundTransactionABC):
+                    transaction._execute_with(staged_database)
+                else:
+                    transaction.execute()
+                results.append(TransactionResult(transaction))
+            except Exception as error:
+                results.append(TransactionResult(transaction, error))
+        staged_database.flush()
+        self.__results = results
+
+    async def execute_async(self, concurrency: int = DEFAULT_CONCURRENCY) -> None:
+        self.__results = await execute_transactions_async(self.__transactions, concurrency)
+
+class _StagedDatabase(PayrollDatabaseABC):
+    def __init__(self, database: PayrollDatabaseABC = None) -> None:
+        self.__database = database
+        self.__employees = {}
+        self.__changed_employees = {}
+        self.__updates = {}
+        self.__union_members = {}
+        self.__changed_union_members = {}
+
+    def prefetch(self, ids) -> None:
+        missing_ids = [id for id in dict.fromkeys(ids) if id not in self.__employees]
+        if missing_ids:
+            self.__employees.update(self.__database.get_employees(missing_ids))
+
+    def preload(self, id: int, employee: Employee) -> None:
+        self.__employees[id] = employee
+
+    def preload_union_member(self, id: int, employee: Employee) -> None:
+        if employee is None:
+            self.__union_members[id] = None
+        else:
+            self.__union_members[id] = employee.emp_id
+            self.__employees.setdefault(employee.emp_id, employee)
+
+    def flush(self) -> None:
+        employees, updates, union_members, deleted_ids = self.__take_changes()
+        self.__database.add_employees(employees)
+        if updates:
+            self.__database.apply_updates(updates)
+        for id, employee in union_members:
+            if employee is not None:
+                self.__database.add_union_member(id, employee)
+            else:
+                self.__database.delete_union_member(id)
+        for id in deleted_ids:
+            self.__database.delete_employee(id)
+
+    async def flush_async(self, database: AsyncPayrollDatabaseABC) -> None:
+        employees, updates, union_members, deleted_ids = self.__take_changes()
+        # Asynchronous stores have no targeted writes, so updated employees are written whole
+        employees.extend({id: employee for _, id, employee, *_ in updates}.items())
+        if employees:
+            await database.add_employees(employees)
+        for id, employee in union_members:
+            if employee is not None:
+                await database.add_union_member(id, employee)
+            else:
+                await database.delete_union_member(id)
+        for id in deleted_ids:
+            await database.delete_employee(id)
+
+    def add_emplyee(self, id: int, employee: Employee) -> None:
+        self.__employees[id] = employee
+        self.__changed_employees[id] = employee
+        self.__updates.pop(id, None)
+
+    def add_time_card(self, id: int, employee: Employee, time_card: TimeCard) -> None:
+        self.__update('add_time_card', id, employee, time_card)
+
+    def add_sales_receipt(self, id: int, employee: Employee, sales_receipt: SalesReceipt) -> None:
+        self.__update('add_sales_receipt', id, employee, sales_receipt)
+
+    def add_service_charge(self, id: int, employee: Employee, service_charge: ServiceCharge) -> None:
+        self.__update('add_service_charge', id, employee, service_charge)
+
+    def update_employee(self, id: int, employee: Employee) -> None:
+        self.__update('update_employee', id, employee)
+
+    def update_classification(self, id: int, employee: Employee) -> None:
+        self.__update('update_classification', id, employee)
+
+    def update_method(self, id: int, employee: Employee) -> None:
+        self.__update('update_method', id, employee)
+
+    def update_affiliation(self, id: int, employee: Employee) -> None:
+        self.__update('update_affiliation', id, employee)
+
+    def compact_documents(self, id: int, employee: Employee, before_date: date) -> None:
+        self.__update('compact_documents', id, employee, before_date)
+
+    def get_employee(self, id: int) -> Employee:
+        if id not in self.__employees:
+            self.__employees[id] = self.__database.get_employee(id) if self.__database is not None else None
+        return self.__employees[id]
+
+    def delete_employee(self, id: int) -> None:
+        self.__employees[id] = None
+        self.__changed_employees[id] = None
+        self.__updates.pop(id, None)
+
+    def add_union_member(self, id: int, employee: Employee) -> None:
+        self.__union_members[id] = employee.emp_id
+        self.__changed_union_members[id] = employee
+
+    def get_union_member(self, id: int) -> Employee:
+        if id not in self.__union_members:
+            self.preload_union_member(
+                id, self.__database.get_union_member(id) if self.__database is not None else None
+            )
+        emp_id = self.__union_members[id]
+        return self.get_employee(emp_id) if emp_id is not None else None
+
+    def delete_union_member(self, id: int) -> None:
+        self.__union_members[id] = None
+        self.__changed_union_members[id] = None
+
+    def get_all_employee_ids(self) -> array:
+        self.flush()
+        return self.__database.get_all_employee_ids()
+
+    def get_employee_ids_paid_on(self, pay_date: date) -> array:
+        self.flush()
+        return self.__database.get_employee_ids_paid_on(pay_date)
+
+    def __update(self, method: str, id: int, employee: Employee, *args) -> None:
+        self.__employees[id] = employee
+        if id in self.__changed_employees:
+            # A pending whole write already carries the change
+            self.__changed_employees[id] = employee
+        else:
+            self.__updates.setdefault(id, []).append((method, id, employee, *args))
+
+    def __take_changes(self):
+        employees = [(id, employee) for id, employee in self.__changed_employees.items() if employee is not None]
+        deleted_ids = [id for id, employee in self.__changed_employees.items() if employee is None]
+        updates = [update for updates in self.__updates.values() for update in updates]
+        union_members = list(self.__changed_union_members.items())
+        self.__changed_employees.clear()
+        self.__updates.clear()
+        self.__changed_union_members.clear()
+        return employees, updates, union_members, deleted_ids
+
+
+async def execute_transactions_async(transactions, concurrency: int = DEFAULT_CONCURRENCY) -> list:
+    # Transactions touching the same employee run in input order; independent ones overlap. A union member
+    # counts as the employee who owns it, because charging the member writes that employee back
+    transactions = list(transactions)
+    results = [None] * len(transactions)
+    owners = await _union_member_owners(transactions, concurrency)
+    parents = {}
+
+    def find(key):
+        while parents.setdefault(key, key) != key:
+            parents[key] = parents[parents[key]]
+            key = parents[key]
+        return key
+
+    roots = []
+    for index, transaction in enumerate(transactions):
+        keys = list(transaction._ordering_keys)
+        employee_keys = [key for key in keys if key[0] == 'employee']
+        for key in keys:
+            if key[0] == 'union_member':
+                if employee_keys:
+                    owners[key[1]] = employee_keys[0][1]
+                elif owners.get(key[1], None) is not None:
+                    keys.append(('employee', owners[key[1]]))
+        if not keys:
+            keys = [('transaction', index)]
+        root = find(keys[0])
+        for key in keys[1:]:
+            other = find(key)
+            if other != root:
+                parents[other] = root
+        roots.append(keys[0])
+    chains = {}
+    for index, key in enumerate(roots):
+        chains.setdefault(find(key), []).append(index)
+
+    async def run_chain(indexes):
+        for index in indexes:
+            try:
+                await transactions[index].execute_async()
+                results[index] = TransactionResult(transactions[index])
+            except Exception as error:
+                results[index] = TransactionResult(transactions[index], error)
+
+    await gather_limited((run_chain(indexes) for indexes in chains.values()), concurrency)
+    return results
+
+
+async def _union_member_owners(transactions: list, concurrency: int) -> dict:
+    # Members charged before any membership change in the batch belong to whoever owns them in the database
+    databases = {}
+    for transaction in transactions:
+        keys = transaction._ordering_keys
+        if any(key[0] == 'employee' for key in keys):
+            continue
+        for kind, id in keys:
+            if kind == 'union_member':
+                databases.setdefault(id, transaction._database)
+
+    async def owner(id, database):
+        if isinstance(database, AsyncPayrollDatabaseABC):
+            employee = await database.get_union_member(id)
+        else:
+            employee = database.get_union_member(id)
+        return None if employee is None else employee.emp_id
+
+    ids = list(databases)
+    return dict(zip(ids, await gather_limited((owner(id, databases[id]) for id in ids), concurrency)))
@@ -0,0 +1,254 @@
+from __future__ import annotations
+from array import array
+from copy import copy
+from datetime import date
+import threading
+import weakref
+from core.classes.employee import Employee
+from core.databasesabc import PayrollDatabaseABC
+from core.paydateindex import PayDateIndex, pay_date_bucket, pay_date_buckets
+
+
+EXECUTE_ATTEMPTS = 16
+READ_VERSIONS_SIZE = 65536
+
+
+class WriteConflictError(Exception):
+    pass
+
+
+class ConcurrentPayrollDatabase(PayrollDatabaseABC):
+    def __init__(self) -> None:
+        # Each id maps to a tuple of (version, value) pairs, oldest first. Tuples are replaced, never
+        # mutated, so readers can use them without the lock
+        self.__employees = {}
+        self.__union_members = {}
+        self.__version = 0
+        self.__lock = threading.Lock()
+        self.__write_lock = threading.RLock()
+        self.__pay_date_index = PayDateIndex()
+        self.__snapshots = {}
+        self.__versioned_employee_ids = set()
+        self.__versioned_member_ids = set()
+        # The version of each employee a thread last read, so writing back a change made to an older
+        # version is refused instead of overwriting a write committed in between
+        self.__read_versions = threading.local()
+
+    @property
+    def version(self) -> int:
+        return self.__version
+
+    def execute(self, transaction) -> None:
+        # Writers take turns so a read-modify-write of one employee is never interleaved with another;
+        # readers work on snapshots and never wait for them. Conflicts come only from writers that run
+        # transactions directly, and the transaction is run again on the new version
+        with self.__write_lock:
+            for attempt in range(EXECUTE_ATTEMPTS):
+                try:
+                    transaction.execute()
+                    return
+                except WriteConflictError:
+                    if attempt == EXECUTE_ATTEMPTS - 1:
+                        raise
+
+    def snapshot(self) -> PayrollSnapshot:
+        with self.__lock:
+            self.__snapshots[self.__version] = self.__snapshots.get(self.__version, 0) + 1
+            return PayrollSnapshot(self, self.__version)
+
+    def add_emplyee(self, id: int, employee: Employee) -> None:
+        self.add_employees(((id, employee),))
+
+    def add_employees(self, items) -> None:
+        items = list(items)
+        read_versions = self.__get_read_versions()
+        with self.__lock:
+            # Every employee is checked before any is written, so a refused set leaves nothing behind
+            for id, _ in items:
+                read_version = read_versions.get(id, None)
+                if read_version is not None and self.__current_version(id) != read_version:
+                    # Forgotten so a retry that writes without reading first is not refused again
+                    del read_versions[id]
+                    raise WriteConflictError(f'Employee {id} changed since it was read.')
+            for id, employee in items:
+                self.__commit(self.__employees, self.__versioned_employee_ids, id, employee)
+                self.__pay_date_index.add(id, employee.schedule)
+                self.__remember_version(read_versions, id)
+
+    def apply_updates(self, updates) -> None:
+        self.add_employees({id: employee for _, id, employee, *_ in updates}.items())
+
+    def get_employee(self, id: int) -> Employee:
+        # Committed versions are shared with snapshots, so writers get a private copy to change. The copy
+        # shares document containers with the committed version until it changes them
+        chain = self.__employees.get(id, ())
+        self.__remember_version(self.__get_read_versions(), id, chain[-1][0] if chain else 0)
+        if not chain or chain[-1][1] is None:
+            return None
+        return copy(chain[-1][1])
+
+    def delete_employee(self, id: int) -> None:
+        read_versions = self.__get_read_versions()
+        with self.__lock:
+            chain = self.__employees.get(id, ())
+            if chain and chain[-1][1] is not None:
+                self.__commit(self.__employees, self.__versioned_employee_ids, id, None)
+            self.__pay_date_index.remove(id)
+            self.__remember_version(read_versions, id)
+
+    def add_union_member(self, id: int, employee: Employee) -> None:
+        with self.__lock:
+            self.__commit(self.__union_members, self.__versioned_member_ids, id, employee.emp_id)
+
+    def get_union_member(self, id: int) -> Employee:
+        chain = self.__union_members.get(id, ())
+        if not chain or chain[-1][1] is None:
+            return None
+        return self.get_employee(chain[-1][1])
+
+    def delete_union_member(self, id: int) -> None:
+        with self.__lock:
+            chain = self.__union_members.get(id, ())
+            if chain and chain[-1][1] is not None:
+                self.__commit(self.__union_members, self.__versioned_member_ids, id, None)
+
+    def get_all_employee_ids(self) -> array:
+        with self.__lock:
+            return array('q', (id for id, chain in self.__employees.items() if chain[-1][1] is not None))
+
+    def get_employee_ids_paid_on(self, pay_date: date) -> array:
+        with self.__lock:
+            return array('q', self.__pay_date_index.get_employee_ids(pay_date))
+
+    def _get_employee_at(self, id: int, version: int) -> Employee:
+        # A transaction changes the employee before the snapshot refuses the write, so it gets a copy too
+        employee = _value_at(self.__employees.get(id, ()), version)
+        return None if employee is None else copy(employee)
+
+    def _get_union_member_at(self, id: int, version: int) -> Employee:
+        emp_id = _value_at(self.__union_members.get(id, ()), version)
+        return None if emp_id is None else self._get_employee_at(emp_id, version)
+
+    def _get_employees_at(self, version: int) -> dict:
+        with self.__lock:
+            chains = list(self.__employees.items())
+        employees = {}
+        for id, chain in chains:
+            employee = _value_at(chain, version)
+            if employee is not None:
+                employees[id] = employee
+        return employees
+
+    def _release(self, version: int) -> None:
+        with self.__lock:
+            count = self.__snapshots.pop(version) - 1
+            if count:
+                self.__snapshots[version] = count
+            # Versions kept only for released snapshots are dropped
+            oldest = min(self.__snapshots, default=self.__version)
+            for chains, versioned_ids in (
+                (self.__employees, self.__versioned_employee_ids), (self.__union_members, self.__versioned_member_ids)
+            ):
+                for id in list(versioned_ids):
+                    self.__trim(chains, versioned_ids, id, chains[id], oldest)
+
+    def __get_read_versions(self) -> dict:
+        return self.__read_versions.__dict__.setdefault('versions', {})
+
+    def __current_version(self, id: int) -> int:
+        chain = self.__employees.get(id, ())
+        return chain[-1][0] if chain else 0
+
+    def __remember_version(self, read_versions: dict, id: int, version: int = None) -> None:
+        read_versions.pop(id, None)
+        read_versions[id] = self.__current_version(id) if version is None else version
+        if len(read_versions) > READ_VERSIONS_SIZE:
+            # The oldest reads are forgotten, and writes of them are no longer checked
+            del read_versions[next(iter(read_versions))]
+
+    def __commit(self, chains: dict, versioned_ids: set, id: int, value) -> None:
+        self.__version += 1
+        chain = chains.get(id, ()) + ((self.__version, value),)
+        self.__trim(chains, versioned_ids, id, chain, min(self.__snapshots, default=self.__version))
+
+    def __trim(self, chains: dict, versioned_ids: set, id: int, chain: tuple, oldest: int) -> None:
+        # Keep the newest version each open snapshot can see and everything after it
+        start = len(chain) - 1
+        while start > 0 and chain[start][0] > oldest:
+            start -= 1
+        chain = chain[start:]
+        if len(chain) == 1 and chain[0][1] is None:
+            del chains[id]
+        else:
+            chains[id] = chain
+        if len(chain) > 1:
+            versioned_ids.add(id)
+        else:
+            versioned_ids.discard(id)
+
+
+class PayrollSnapshot(PayrollDatabaseABC):
+    def __init__(self, database: ConcurrentPayrollDatabase, version: int) -> None:
+        self.__database = database
+        self.__version = version
+        self.__employees = None
+        self.__bucket_ids = None
+        # Releases the snapshot's version on close or, failing that, when the snapshot is collected
+        self.__release = weakref.finalize(self, database._release, version)
+
+    @property
+    def version(self) -> int:
+        return self.__version
+
+    def close(self) -> None:
+        self.__release()
+
+    def __enter__(self) -> PayrollSnapshot:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def add_emplyee(self, id: int, employee: Employee) -> None:
+        raise Exception('Snapshot is read-only')
+
+    def get_employee(self, id: int) -> Employee:
+        return self.__database._get_employee_at(id, self.__version)
+
+    def delete_employee(self, id: int) -> None:
+        raise Exception('Snapshot is read-only')
+
+    def add_union_member(self, id: int, employee: Employee) -> None:
+        raise Exception('Snapshot is read-only')
+
+    def get_union_member(self, id: int) -> Employee:
+        return self.__database._get_union_member_at(id, self.__version)
+
+    def delete_union_member(self, id: int) -> None:
+        raise Exception('Snapshot is read-only')
+
+    def get_all_employee_ids(self) -> array:
+        return array('q', self.__get_employees())
+
+    def get_employee_ids_paid_on(self, pay_date: date) -> array:
+        if self.__bucket_ids is None:
+            bucket_ids = {}
+            for id, employee in self.__get_employees().items():
+                bucket_ids.setdefault(pay_date_bucket(employee.schedule), array('q')).append(id)
+            self.__bucket_ids = bucket_ids
+        emp_ids = array('q', self.__bucket_ids.get(None, ()))
+        for bucket in pay_date_buckets(pay_date):
+            emp_ids.extend(self.__bucket_ids.get(bucket, ()))
+        return emp_ids
+
+    def __get_employees(self) -> dict:
+        if self.__employees is None:
+            self.__employees = self.__database._get_employees_at(self.__version)
+        return self.__employees
+
+
+def _value_at(chain: tuple, version: int):
+    for chain_version, value in reversed(chain):
+        if chain_version <= version:
+            return value
+    return None
@@ -1,7 +1,8 @@
 from __future__ import annotations
 from abc import ABC, abstractmethod
 from array import array
-from multiprocessing.dummy import Array
+from datetime import date
+from core.classes.doc import SalesReceipt, ServiceCharge, TimeCard
 from core.classes.employee import Employee
 
 
@@ -33,4 +34,51 @@ class PayrollDatabaseABC(ABC):
 
     @abstractmethod
     def get_all_employee_ids(self) -> array:
-        pass
\ No newline at end of file
+        pass
+
+    def get_employees(self, ids) -> dict:
+        return {id: self.get_employee(id) for id in ids}
+
+    def add_employees(self, items) -> None:
+        for id, employee in items:
+            self.add_emplyee(id, employee)
+
+    def get_employee_ids_paid_on(self, pay_date: date) -> array:
+        return self.get_all_employee_ids()
+
+    # Targeted writes of an employee already changed in memory. Stores that keep whole employees write the
+    # employee back; stores with separate documents and parts override them to touch only what changed
+
+    def add_time_card(self, id: int, employee: Employee, time_card: TimeCard) -> None:
+        self.add_emplyee(id, employee)
+
+    def add_sales_receipt(self, id: int, employee: Employee, sales_receipt: SalesReceipt) -> None:
+        self.add_emplyee(id, employee)
+
+    def add_service_charge(self, id: int, employee: Employee, service_charge: ServiceCharge) -> None:
+        self.add_emplyee(id, employee)
+
+    def update_employee(self, id: int, employee: Employee) -> None:
+        self.add_emplyee(id, employee)
+
+    def update_classification(self, id: int, employee: Employee) -> None:
+        self.add_emplyee(id, employee)
+
+    def update_method(self, id: int, employee: Employee) -> None:
+        self.add_emplyee(id, employee)
+
+    def update_affiliation(self, id: int, employee: Employee) -> None:
+        self.add_emplyee(id, employee)
+
+    def compact_documents(self, id: int, employee: Employee, before_date: date) -> None:
+        self.add_emplyee(id, employee)
+
+    def apply_updates(self, updates) -> None:
+        # Each update is (method, id, employee, *args), naming one of the targeted writes above
+        for method, id, employee, *args in updates:
+            getattr(self, method)(id, employee, *args)
+
+    @property
+    def _reopen(self):
+        # A picklable (factory, args) pair another process calls to open its own handle on the same data
+        return None
@@ -0,0 +1,173 @@
+from __future__ import annotations
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+import math
+import os
+from core.classes.doc import Paycheck
+from core.classes.paymentmethod import DirectMethod
+from core.paychecksink import PaycheckSinkABC
+
+
+DEFAULT_BUFFER_SIZE = 1 << 20
+RECORD_SIZE = 94
+BLOCKING_FACTOR = 10
+SERVICE_CLASS_CREDITS = '220'
+CHECKING_CREDIT = '22'
+ROUTING_WEIGHTS = (3, 7, 1, 3, 7, 1, 3, 7, 1)
+
+
+class DepositFile():
+    def __init__(self, bank: str, path: str, entry_count: int, entry_hash: int, total_credit: int) -> None:
+        self.__bank = bank
+        self.__path = path
+        self.__entry_count = entry_count
+        self.__entry_hash = entry_hash
+        self.__total_credit = total_credit
+
+    @property
+    def bank(self) -> str:
+        return self.__bank
+
+    @property
+    def path(self) -> str:
+        return self.__path
+
+    @property
+    def entry_count(self) -> int:
+        return self.__entry_count
+
+    @property
+    def entry_hash(self) -> int:
+        return self.__entry_hash
+
+    @property
+    def total_credit(self) -> int:
+        return self.__total_credit
+
+
+class DirectDepositWriter(PaycheckSinkABC):
+    def __init__(self, directory: str, origin: str = '', company_name: str = 'PAYROLL', company_id: str = '',
+                 workers: int = 1, buffer_size: int = DEFAULT_BUFFER_SIZE) -> None:
+        if workers < 1:
+            raise ValueError('Invalid value of argument \"workers\".')
+        self.__directory = directory
+        self.__origin = origin
+        self.__company_name = company_name
+        self.__company_id = company_id
+        self.__workers = workers
+        self.__buffer_size = buffer_size
+        self.__pay_date = None
+        self.__deposits = {}
+        self.__rejected = []
+
+    @property
+    def deposit_count(self) -> int:
+        return sum(len(deposits) for deposits in self.__deposits.values())
+
+    @property
+    def rejected(self) -> list:
+        # Direct paychecks with nothing to deposit, as (emp_id, paycheck), left for the caller to settle
+        return list(self.__rejected)
+
+    @property
+    def banks(self) -> list:
+        return list(self.__deposits)
+
+    def write(self, emp_id: int, paycheck: Paycheck) -> None:
+        method = getattr(paycheck, 'method', None)
+        if not isinstance(method, DirectMethod):
+            return
+        amount = round(paycheck.net_pay * 100)
+        if amount <= 0:
+            self.__rejected.append((emp_id, paycheck))
+            return
+        # Fields that overflow would corrupt the entry, so they are refused before anything is written
+        _numeric(amount, 10)
+        if len(str(method.account)) > 17:
+            raise ValueError(f'Account {method.account} of employee {emp_id} overflows its 17 character field.')
+        deposits = self.__deposits.get(method.bank, None)
+        if deposits is None:
+            _check_routing_number(method.bank)
+            deposits = self.__deposits[method.bank] = []
+        if self.__pay_date is None:
+            self.__pay_date = paycheck.pay_date
+        deposits.append((emp_id, method.account, amount, getattr(paycheck, 'payee', None) or ''))
+
+    def write_files(self) -> list:
+        jobs = [
+            (
+                os.path.join(self.__directory, f'{_file_name(bank)}.ach'), bank, deposits, self.__pay_date,
+                self.__origin, self.__company_name, self.__company_id, batch_number, self.__buffer_size
+            )
+            for batch_number, (bank, deposits) in enumerate(self.__deposits.items(), 1)
+        ]
+        if self.__workers == 1 or len(jobs) < 2:
+            files = [_write_bank_file(*job) for job in jobs]
+        else:
+            with ProcessPoolExecutor(max_workers=min(self.__workers, len(jobs))) as executor:
+                files = list(executor.map(_write_bank_file, *zip(*jobs)))
+        self.__deposits = {}
+        self.__rejected = []
+        self.__pay_date = None
+        return files
+
+
+def _write_bank_file(path: str, bank: str, deposits: list, pay_date: date, origin: str, company_name: str,
+                     company_id: str, batch_number: int, buffer_size: int) -> DepositFile:
+    routing = bank
+    origin = _numeric(origin if origin.isdigit() else 0, 9)
+    pay_date = pay_date.strftime('%y%m%d')
+    trace_prefix = origin[:8]
+    records = [
+        '101' + ' ' + routing + ' ' + origin + pay_date + '0000' + 'A' + '094' + '10' + '1'
+        + _alpha(bank, 23) + _alpha(company_name, 23) + _alpha('', 8),
+        '5' + SERVICE_CLASS_CREDITS + _alpha(company_name, 16) + _alpha('', 20) + _alpha(company_id, 10)
+        + 'PPD' + _alpha('PAYROLL', 10) + pay_date + pay_date + '   ' + '1' + trace_prefix + _numeric(batch_number, 7),
+    ]
+    entry_detail = '6' + CHECKING_CREDIT + routing
+    total_credit = 0
+    for sequence, (emp_id, account, amount, name) in enumerate(deposits, 1):
+        total_credit += amount
+        records.append(
+            f'{entry_detail}{account!s:<17}{_numeric(amount, 10)}{emp_id!s:<15.15}{_alpha(name, 22)}  0{trace_prefix}{sequence:07d}'
+        )
+    entry_count = len(deposits)
+    entry_hash = int(routing[:8]) * entry_count % 10 ** 10
+    records.append(
+        '8' + SERVICE_CLASS_CREDITS + _numeric(entry_count, 6) + _numeric(entry_hash, 10) + _numeric(0, 12)
+        + _numeric(total_credit, 12) + _alpha(company_id, 10) + _alpha('', 19) + _alpha('', 6)
+        + trace_prefix + _numeric(batch_number, 7)
+    )
+    block_count = math.ceil((len(records) + 1) / BLOCKING_FACTOR)
+    records.append(
+        '9' + _numeric(1, 6) + _numeric(block_count, 6) + _numeric(entry_count, 8) + _numeric(entry_hash, 10)
+        + _numeric(0, 12) + _numeric(total_credit, 12) + _alpha('', 39)
+    )
+    records.extend(['9' * RECORD_SIZE] * (block_count * BLOCKING_FACTOR - len(records)))
+    with open(path, 'w', encoding='ascii', errors='replace', newline='', buffering=buffer_size) as file:
+        file.write('\n'.join(records))
+        file.write('\n')
+    return DepositFile(bank, path, entry_count, entry_hash, total_credit)
+
+
+def _alpha(value, width: int) -> str:
+    return str(value)[:width].ljust(width)
+
+
+def _numeric(value, width: int) -> str:
+    text = str(value)
+    if len(text) > width:
+        raise ValueError(f'Value {text} overflows its {width} digit field.')
+    return text.rjust(width, '0')
+
+
+def _check_routing_number(bank) -> None:
+    text = str(bank)
+    if not (len(text) == 9 and text.isascii() and text.isdigit()) or sum(
+        int(digit) * weight for digit, weight in zip(text, ROUTING_WEIGHTS)
+    ) % 10:
+        raise ValueError(f'Bank {text} is not a nine digit routing number with a valid check digit.')
+
+
+def _file_name(bank: str) -> str:
+    return ''.join(character if character.isalnum() else '_' for character in bank)
@@ -0,0 +1,89 @@
+from __future__ import annotations
+from datetime import date
+import sqlite3
+from core.classes.doc import SalesReceipt, ServiceCharge, TimeCard
+
+
+ARCHIVE_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS time_cards (
+    emp_id INTEGER NOT NULL,
+    date INTEGER NOT NULL,
+    hours REAL NOT NULL,
+    PRIMARY KEY (emp_id, date)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS sales_receipts (
+    emp_id INTEGER NOT NULL,
+    date INTEGER NOT NULL,
+    amount REAL NOT NULL,
+    PRIMARY KEY (emp_id, date)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS service_charges (
+    emp_id INTEGER NOT NULL,
+    date INTEGER NOT NULL,
+    amount REAL NOT NULL,
+    PRIMARY KEY (emp_id, date)
+) WITHOUT ROWID;
+'''
+
+ARCHIVED_DOCUMENTS = {
+    'time_cards': (TimeCard, 'hours'),
+    'sales_receipts': (SalesReceipt, 'amount'),
+    'service_charges': (ServiceCharge, 'amount'),
+}
+
+
+class DocumentArchive():
+    def __init__(self, path: str = ':memory:') -> None:
+        self.__connection = sqlite3.connect(path)
+        self.__connection.execute('PRAGMA journal_mode = WAL')
+        self.__connection.execute('PRAGMA synchronous = NORMAL')
+        self.__connection.executescript(ARCHIVE_SCHEMA)
+        self.__pending = {table: [] for table in ARCHIVED_DOCUMENTS}
+
+    def close(self) -> None:
+        self.__connection.close()
+
+    def add_documents(self, emp_id: int, time_cards=(), sales_receipts=(), service_charges=()) -> None:
+        for table, documents in (
+            ('time_cards', time_cards), ('sales_receipts', sales_receipts), ('service_charges', service_charges)
+        ):
+            column = ARCHIVED_DOCUMENTS[table][1]
+            self.__pending[table].extend(
+                (emp_id, document.date.toordinal(), getattr(document, column)) for document in documents
+            )
+
+    def commit(self) -> int:
+        count = 0
+        with self.__connection:
+            for table, rows in self.__pending.items():
+                self.__connection.executemany(
+                    f'INSERT OR REPLACE INTO {table} (emp_id, date, {ARCHIVED_DOCUMENTS[table][1]}) VALUES (?, ?, ?)', rows
+                )
+                count += len(rows)
+        self.__pending = {table: [] for table in ARCHIVED_DOCUMENTS}
+        return count
+
+    def time_cards(self, emp_id: int, start_date: date = date.min, end_date: date = date.max) -> list:
+        return self.__select('time_cards', emp_id, start_date, end_date)
+
+    def sales_receipts(self, emp_id: int, start_date: date = date.min, end_date: date = date.max) -> list:
+        return self.__select('sales_receipts', emp_id, start_date, end_date)
+
+    def service_charges(self, emp_id: int, start_date: date = date.min, end_date: date = date.max) -> list:
+        return self.__select('service_charges', emp_id, start_date, end_date)
+
+    def count(self) -> dict:
+        return {
+            table: self.__connection.execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0]
+            for table in ARCHIVED_DOCUMENTS
+        }
+
+    def __select(self, table: str, emp_id: int, start_date: date, end_date: date) -> list:
+        document_type, column = ARCHIVED_DOCUMENTS[table]
+        return [
+            document_type(date.fromordinal(ordinal), value)
+            for ordinal, value in self.__connection.execute(
+                f'SELECT date, {column} FROM {table} WHERE emp_id = ? AND date BETWEEN ? AND ? ORDER BY date',
+                (emp_id, start_date.toordinal(), end_date.toordinal())
+            )
+        ]
@@ -0,0 +1,196 @@
+from __future__ import annotations
+import csv
+from datetime import date
+from itertools import islice
+import json
+import os
+import time
+import core.classes.transaction as t
+from core.asyncdatabase import DEFAULT_CONCURRENCY, AsyncPayrollDatabaseABC
+from core.databasesabc import PayrollDatabaseABC
+
+
+DEFAULT_CHUNK_SIZE = 10000
+
+
+def _date(record: dict, field: str) -> date:
+    return date.fromisoformat(record[field])
+
+
+TRANSACTION_FACTORIES = {
+    'add_salaried': lambda record, database: t.AddSalariedEmployeeTransaction(
+        int(record['emp_id']), record['name'], record['address'], database, float(record['salary'])
+    ),
+    'add_hourly': lambda record, database: t.AddHourlyEmployeeTransaction(
+        int(record['emp_id']), record['name'], record['address'], database, float(record['hourly_rate'])
+    ),
+    'add_commissioned': lambda record, database: t.AddCommissionedEmployeeTransaction(
+        int(record['emp_id']), record['name'], record['address'], database,
+        float(record['commission_rate']), float(record['salary']), _date(record, 'work_start_date')
+    ),
+    'delete_employee': lambda record, database: t.DeleteEmployeeTransaction(int(record['emp_id']), database),
+    'time_card': lambda record, database: t.AddTimeCardTransaction(
+        _date(record, 'date'), float(record['hours']), int(record['emp_id']), database
+    ),
+    'sales_receipt': lambda record, database: t.AddSalesReceiptTransaction(
+        database, _date(record, 'date'), float(record['amount']), int(record['emp_id'])
+    ),
+    'service_charge': lambda record, database: t.AddServiceChargeTransaction(
+        database, _date(record, 'date'), float(record['amount']), int(record['member_id'])
+    ),
+    'change_name': lambda record, database: t.ChangeNameTransaction(database, int(record['emp_id']), record['name']),
+    'change_address': lambda record, database: t.ChangeAddressTransaction(
+        database, int(record['emp_id']), record['address']
+    ),
+    'change_hourly': lambda record, database: t.ChangeHourlyTransaction(
+        database, int(record['emp_id']), float(record['hourly_rate'])
+    ),
+    'change_salaried': lambda record, database: t.ChangeSalariedTransaction(
+        database, int(record['emp_id']), float(record['salary'])
+    ),
+    'change_commissioned': lambda record, database: t.ChangeCommissionedTransaction(
+        database, int(record['emp_id']), float(record['salary']), float(record['commission_rate']),
+        _date(record, 'work_start_date')
+    ),
+    'change_direct': lambda record, database: t.ChangeDirectTransaction(
+        database, int(record['emp_id']), str(record['bank']), str(record['account'])
+    ),
+    'change_mail': lambda record, database: t.ChangeMailTransaction(database, int(record['emp_id']), record['address']),
+    'change_hold': lambda record, database: t.ChangeHoldransaction(database, int(record['emp_id'])),
+    'change_member': lambda record, database: t.ChangeMemberTransaction(
+        database, int(record['emp_id']), int(record['member_id']), float(record['dues'])
+    ),
+    'change_unaffiliated': lambda record, database: t.ChangeUnaffiliatedTransaction(database, int(record['emp_id'])),
+}
+
+
+class IngestReport():
+    def __init__(self, rows: int, rejected: int, seconds: float) -> None:
+        self.__rows = rows
+        self.__rejected = rejected
+        self.__seconds = seconds
+
+    @property
+    def rows(self) -> int:
+        return self.__rows
+
+    @property
+    def accepted(self) -> int:
+        return self.__rows - self.__rejected
+
+    @property
+    def rejected(self) -> int:
+        return self.__rejected
+
+    @property
+    def seconds(self) -> float:
+        return self.__seconds
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.__rows / self.__seconds if self.__seconds > 0 else 0.0
+
+
+def read_records(path: str, format: str = None):
+    format = format or os.path.splitext(path)[1].lstrip('.').lower()
+    with open(path, newline='', encoding='utf-8') as file:
+        if format == 'csv':
+            for record in csv.DictReader(file):
+                yield {field: value for field, value in record.items() if value not in ('', None)}
+        elif format in ('jsonl', 'json'):
+            for line in file:
+                if line.strip():
+                    try:
+                        yield json.loads(line)
+                    except ValueError as error:
+                        yield error
+        else:
+            raise ValueError('Invalid value of argument \"format\".')
+
+
+def make_transaction(record: dict, database: PayrollDatabaseABC) -> t.TransactionABC:
+    factory = TRANSACTION_FACTORIES.get(record.get('type'), None)
+    if factory is None:
+        raise ValueError(f'Unknown transaction type {record.get("type")!r}')
+    try:
+        return factory(record, database)
+    except KeyError as error:
+        raise ValueError(f'Missing field {error.args[0]!r}') from None
+
+
+def ingest_records(records, database: PayrollDatabaseABC, chunk_size: int = DEFAULT_CHUNK_SIZE, error_report=None) -> IngestReport:
+    start = time.perf_counter()
+    rows = 0
+    rejected = 0
+    for chunk in _chunks(records, chunk_size):
+        rows += len(chunk)
+        batch, batched, rejected_rows = _make_batch(chunk, database, error_report)
+        batch.execute()
+        rejected += rejected_rows + _report_results(batched, batch.results, error_report)
+    return IngestReport(rows, rejected, time.perf_counter() - start)
+
+
+async def ingest_records_async(records, database: AsyncPayrollDatabaseABC, chunk_size: int = DEFAULT_CHUNK_SIZE, error_report=None, concurrency: int = DEFAULT_CONCURRENCY) -> IngestReport:
+    start = time.perf_counter()
+    rows = 0
+    rejected = 0
+    for chunk in _chunks(records, chunk_size):
+        rows += len(chunk)
+        batch, batched, rejected_rows = _make_batch(chunk, database, error_report)
+        await batch.execute_async(concurrency)
+        rejected += rejected_rows + _report_results(batched, batch.results, error_report)
+    return IngestReport(rows, rejected, time.perf_counter() - start)
+
+
+def ingest(path: str, database: PayrollDatabaseABC, chunk_size: int = DEFAULT_CHUNK_SIZE, error_report_path: str = None, format: str = None) -> IngestReport:
+    records = read_records(path, format)
+    if error_report_path is None:
+        return ingest_records(records, database, chunk_size)
+    with open(error_report_path, 'w', encoding='utf-8', buffering=1 << 16) as error_report:
+        return ingest_records(records, database, chunk_size, error_report)
+
+
+def _chunks(records, chunk_size: int):
+    records = enumerate(records, 1)
+    while True:
+        chunk = list(islice(records, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _make_batch(chunk: list, database, error_report):
+    batch = t.TransactionBatch(database)
+    batched = []
+    rejected = 0
+    for row, record in chunk:
+        try:
+            if isinstance(record, Exception):
+                raise record
+            batch.add(make_transaction(record, database))
+            batched.append((row, record))
+        except Exception as error:
+            rejected += 1
+            _report_error(error_report, row, record, error)
+    return batch, batched, rejected
+
+
+def _report_results(batched: list, results: list, error_report) -> int:
+    rejected = 0
+    for (row, record), result in zip(batched, results):
+        if not result.succeeded:
+            rejected += 1
+            _report_error(error_report, row, record, result.error)
+    return rejected
+
+
+def _report_error(error_report, row: int, record: dict, error: Exception) -> None:
+    if error_report is None:
+        return
+    error_report.write(json.dumps({
+        'row': row,
+        'type': record.get('type') if isinstance(record, dict) else None,
+        'error': type(error).__name__,
+        'message': str(error),
+        'record': record if isinstance(record, dict) else None,
+    }) + '\n')
@@ -0,0 +1,262 @@
+from __future__ import annotations
+import os
+import pickle
+import struct
+import threading
+from time import monotonic
+import zlib
+from core.classes.transaction import TransactionABC, TransactionBatch, _nested
+from core.databasesabc import PayrollDatabaseABC
+from core.snapshot import SnapshotPayrollDatabase, write_snapshot
+
+
+DEFAULT_GROUP_SIZE = 256
+DEFAULT_GROUP_INTERVAL = 0.01
+FRAME = struct.Struct('<II')
+SEGMENT_NAME = 'journal-{:08d}.log'
+SNAPSHOT_NAME = 'snapshot-{:08d}.snap'
+
+
+class TransactionJournal():
+    def __init__(self, directory: str, database: PayrollDatabaseABC, group_size: int = DEFAULT_GROUP_SIZE,
+                 group_interval: float = DEFAULT_GROUP_INTERVAL) -> None:
+        if not isinstance(database, PayrollDatabaseABC):
+            raise TypeError('Invalid type of argument \"database\".')
+        if group_size < 1:
+            raise ValueError('Invalid value of argument \"group_size\".')
+        if group_interval < 0:
+            raise ValueError('Invalid value of argument \"group_interval\".')
+        os.makedirs(directory, exist_ok=True)
+        self.__directory = directory
+        self.__database = database
+        self.__group_size = group_size
+        self.__group_interval = group_interval
+        # Frames reach the file before their transactions are applied; fsync is shared by a group of them
+        self.__lock = threading.Condition()
+        # Held from a frame's append until its outcome is written, so outcomes follow their own frame, frames are in the
+        # order their transactions were applied, and a snapshot never misses an applied or logged transaction
+        self.__apply_lock = threading.Lock()
+        self.__unsynced = 0
+        self.__unsynced_since = None
+        self.__closed = False
+        segments = _sequence_numbers(directory, SEGMENT_NAME)
+        snapshots = _sequence_numbers(directory, SNAPSHOT_NAME)
+        self.__segment = max(segments[-1:] + snapshots[-1:] + [0])
+        self.__file = self.__open_segment()
+        self.__flusher = None
+        if group_interval > 0:
+            # Syncs a group whose interval runs out before another execute() arrives
+            self.__flusher = threading.Thread(target=self.__flush_periodically, name='journal-flush', daemon=True)
+            self.__flusher.start()
+
+    @property
+    def database(self) -> PayrollDatabaseABC:
+        return self.__database
+
+    @property
+    def segment(self) -> int:
+        return self.__segment
+
+    def execute(self, transaction: TransactionABC) -> None:
+        with self.__apply_lock:
+            self.__execute(transaction)
+
+    def commit(self) -> None:
+        with self.__lock:
+            self.__sync()
+
+    def snapshot(self) -> str:
+        with self.__apply_lock, self.__lock:
+            self.__sync()
+            self.__file.close()
+            self.__segment += 1
+            path = os.path.join(self.__directory, SNAPSHOT_NAME.format(self.__segment))
+            write_snapshot(path, self.__database)
+            self.__file = self.__open_segment()
+        return path
+
+    def __execute(self, transaction: TransactionABC) -> None:
+        if isinstance(transaction, TransactionBatch):
+            transactions = transaction.transactions
+            positions = [position for position, member in enumerate(transactions) if member._journaled]
+            self.__append([transactions[position] for position in positions])
+            try:
+                transaction.execute()
+            except Exception:
+                self.__append_failed(range(len(positions)))
+                raise
+            self.__append_failed([
+                index for index, position in enumerate(positions) if not transaction.results[position].succeeded
+            ])
+        elif transaction._journaled:
+            self.__append([transaction])
+            try:
+                transaction.execute()
+            except Exception:
+                self.__append_failed([0])
+                raise
+        else:
+            # Changes it makes through logged transactions, such as documents compacted into an archive, are logged
+            previous = getattr(_nested, 'executor', None)
+            _nested.executor = self.__execute
+            try:
+                transaction.execute()
+            finally:
+                _nested.executor = previous
+
+    def prune(self) -> None:
+        snapshots = _sequence_numbers(self.__directory, SNAPSHOT_NAME)
+        if not snapshots:
+            return
+        for name, sequence_numbers in ((SEGMENT_NAME, _sequence_numbers(self.__directory, SEGMENT_NAME)), (SNAPSHOT_NAME, snapshots)):
+            for sequence_number in sequence_numbers:
+                if sequence_number < snapshots[-1]:
+                    os.remove(os.path.join(self.__directory, name.format(sequence_number)))
+
+    def close(self) -> None:
+        with self.__lock:
+            self.__sync()
+            self.__closed = True
+            self.__lock.notify_all()
+        if self.__flusher is not None:
+            self.__flusher.join()
+        self.__file.close()
+
+    def __enter__(self) -> TransactionJournal:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def __append(self, transactions: list) -> None:
+        if transactions:
+            self.__write(pickle.dumps(transactions, protocol=pickle.HIGHEST_PROTOCOL), len(transactions))
+
+    def __append_failed(self, indexes) -> None:
+        # Positions in the preceding frame whose transactions failed, so replay does not apply them
+        indexes = list(indexes)
+        if indexes:
+            self.__write(pickle.dumps({'failed': indexes}, protocol=pickle.HIGHEST_PROTOCOL), 0)
+
+    def __write(self, payload: bytes, transactions: int) -> None:
+        with self.__lock:
+            self.__file.write(FRAME.pack(len(payload), zlib.crc32(payload)))
+            self.__file.write(payload)
+            self.__file.flush()
+            self.__unsynced += transactions
+            if self.__unsynced_since is None:
+                self.__unsynced_since = monotonic()
+                self.__lock.notify_all()
+            if self.__unsynced >= self.__group_size or self.__group_interval == 0:
+                self.__sync()
+
+    def __sync(self) -> None:
+        if self.__unsynced_since is not None:
+            os.fsync(self.__file.fileno())
+            self.__unsynced = 0
+            self.__unsynced_since = None
+
+    def __flush_periodically(self) -> None:
+        with self.__lock:
+            while not self.__closed:
+                if self.__unsynced_since is None:
+                    self.__lock.wait()
+                    continue
+                remaining = self.__unsynced_since + self.__group_interval - monotonic()
+                if remaining > 0:
+                    self.__lock.wait(remaining)
+                else:
+                    self.__sync()
+
+    def __open_segment(self):
+        path = os.path.join(self.__directory, SEGMENT_NAME.format(self.__segment))
+        file = open(path, 'ab')
+        valid_size = sum(FRAME.size + len(payload) for payload in _read_frames(path))
+        if file.tell() != valid_size:
+            # Drop a frame torn by a crash so new frames follow the last complete one
+            file.truncate(valid_size)
+        return file
+
+
+def restore(directory: str, database: PayrollDatabaseABC) -> int:
+    snapshots = _sequence_numbers(directory, SNAPSHOT_NAME)
+    first_segment = 0
+    if snapshots:
+        first_segment = snapshots[-1]
+        with SnapshotPayrollDatabase(os.path.join(directory, SNAPSHOT_NAME.format(first_segment))) as snapshot:
+            employees = snapshot.get_employees(snapshot.get_all_employee_ids())
+        database.add_employees(employees.items())
+        for employee in employees.values():
+            if employee.affiliation is not None:
+                database.add_union_member(employee.affiliation.member_id, employee)
+    return _replay(directory, first_segment, database)
+
+
+def open_database(directory: str) -> SnapshotPayrollDatabase:
+    # Employees stay encoded in the snapshot until a replayed transaction or a caller asks for them
+    snapshots = _sequence_numbers(directory, SNAPSHOT_NAME)
+    first_segment = snapshots[-1] if snapshots else 0
+    database = SnapshotPayrollDatabase(os.path.join(directory, SNAPSHOT_NAME.format(first_segment)) if snapshots else None)
+    _replay(directory, first_segment, database)
+    return database
+
+
+def _replay(directory: str, first_segment: int, database: PayrollDatabaseABC) -> int:
+    frames = [
+        frame
+        for sequence_number in _sequence_numbers(directory, SEGMENT_NAME) if sequence_number >= first_segment
+        for frame in _read_transactions(os.path.join(directory, SEGMENT_NAME.format(sequence_number)))
+    ]
+    replayed = 0
+    for position, (transactions, failed) in enumerate(frames):
+        for index, transaction in enumerate(transactions):
+            if index in failed:
+                continue
+            try:
+                transaction._execute_with(database)
+            except Exception:
+                # Only the newest frame can lack the outcome of a failure, when the process stopped before writing it
+                if position != len(frames) - 1:
+                    raise
+                continue
+            replayed += 1
+    return replayed
+
+
+def _read_transactions(path: str):
+    transactions = None
+    for payload in _read_frames(path):
+        frame = pickle.loads(payload)
+        if isinstance(frame, dict):
+            if transactions is None:
+                raise Exception(f'Journal {path} has an outcome without a transaction frame before it.')
+            yield transactions, set(frame['failed'])
+            transactions = None
+            continue
+        if transactions is not None:
+            yield transactions, set()
+        transactions = frame
+    if transactions is not None:
+        yield transactions, set()
+
+
+def _read_frames(path: str):
+    with open(path, 'rb') as file:
+        data = file.read()
+    position = 0
+    while position + FRAME.size <= len(data):
+        length, checksum = FRAME.unpack_from(data, position)
+        payload = data[position + FRAME.size:position + FRAME.size + length]
+        if len(payload) != length or zlib.crc32(payload) != checksum:
+            return
+        yield payload
+        position += FRAME.size + length
+
+
+def _sequence_numbers(directory: str, name: str) -> list:
+    prefix, suffix = name.split('{:08d}')
+    return sorted(
+        int(file_name[len(prefix):-len(suffix)])
+        for file_name in os.listdir(directory)
+        if file_name.startswith(prefix) and file_name.endswith(suffix) and file_name[len(prefix):-len(suffix)].isdigit()
+    )
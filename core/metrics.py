@@ -0,0 +1,258 @@
+from __future__ import annotations
+from array import array
+from bisect import bisect_left
+from functools import wraps
+import os
+import threading
+from time import perf_counter
+from core.databasesabc import PayrollDatabaseABC
+
+
+TRANSACTION = 'transaction'
+DATABASE = 'database'
+DEFAULT_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 60.0)
+METRIC_NAMES = {
+    TRANSACTION: ('payroll_transactions_total', 'payroll_transaction_errors_total', 'payroll_transaction_duration_seconds'),
+    DATABASE: ('payroll_database_calls_total', 'payroll_database_errors_total', 'payroll_database_call_duration_seconds'),
+}
+
+_registry = None
+_executing = threading.local()
+
+
+class Histogram():
+    __slots__ = ('__buckets', '__counts', '__count', '__sum')
+
+    def __init__(self, buckets: tuple) -> None:
+        self.__buckets = buckets
+        self.__counts = array('q', [0] * (len(buckets) + 1))
+        self.__count = 0
+        self.__sum = 0.0
+
+    @property
+    def count(self) -> int:
+        return self.__count
+
+    @property
+    def sum(self) -> float:
+        return self.__sum
+
+    def observe(self, value: float) -> None:
+        self.__counts[bisect_left(self.__buckets, value)] += 1
+        self.__count += 1
+        self.__sum += value
+
+    def cumulative_counts(self) -> list:
+        counts = []
+        total = 0
+        for bound, count in zip(self.__buckets + (float('inf'),), self.__counts):
+            total += count
+            counts.append((bound, total))
+        return counts
+
+
+class MetricsRegistry():
+    def __init__(self, buckets: tuple = DEFAULT_BUCKETS) -> None:
+        if list(buckets) != sorted(buckets) or not buckets:
+            raise ValueError('Invalid value of argument \"buckets\".')
+        self.__buckets = tuple(buckets)
+        self.__lock = threading.Lock()
+        self.__histograms = {TRANSACTION: {}, DATABASE: {}}
+        self.__errors = {TRANSACTION: {}, DATABASE: {}}
+
+    def record(self, kind: str, name: str, seconds: float, error: Exception = None) -> None:
+        with self.__lock:
+            histogram = self.__histograms[kind].get(name, None)
+            if histogram is None:
+                histogram = self.__histograms[kind][name] = Histogram(self.__buckets)
+            histogram.observe(seconds)
+            if error is not None:
+                key = (name, type(error).__name__)
+                self.__errors[kind][key] = self.__errors[kind].get(key, 0) + 1
+
+    def reset(self) -> None:
+        with self.__lock:
+            for kind in self.__histograms:
+                self.__histograms[kind].clear()
+                self.__errors[kind].clear()
+
+    def snapshot(self) -> dict:
+        with self.__lock:
+            snapshot = {}
+            for kind, histograms in self.__histograms.items():
+                snapshot[kind] = {
+                    name: {
+                        'count': histogram.count,
+                        'errors': {},
+                        'error_count': 0,
+                        'seconds': histogram.sum,
+                        'buckets': histogram.cumulative_counts(),
+                    }
+                    for name, histogram in histograms.items()
+                }
+                for (name, error), count in self.__errors[kind].items():
+                    snapshot[kind][name]['errors'][error] = count
+                    snapshot[kind][name]['error_count'] += count
+            return snapshot
+
+    def to_prometheus(self) -> str:
+        snapshot = self.snapshot()
+        lines = []
+        for kind, (total_name, errors_name, duration_name) in METRIC_NAMES.items():
+            metrics = snapshot[kind]
+            lines.append(f'# TYPE {total_name} counter')
+            for name, metric in metrics.items():
+                lines.append(f'{total_name}{{{kind}="{name}"}} {metric["count"]}')
+            lines.append(f'# TYPE {errors_name} counter')
+            for name, metric in metrics.items():
+                for error, count in metric['errors'].items():
+                    lines.append(f'{errors_name}{{{kind}="{name}",error="{error}"}} {count}')
+            lines.append(f'# TYPE {duration_name} histogram')
+            for name, metric in metrics.items():
+                for bound, count in metric['buckets']:
+                    le = '+Inf' if bound == float('inf') else repr(bound)
+                    lines.append(f'{duration_name}_bucket{{{kind}="{name}",le="{le}"}} {count}')
+                lines.append(f'{duration_name}_sum{{{kind}="{name}"}} {metric["seconds"]!r}')
+                lines.append(f'{duration_name}_count{{{kind}="{name}"}} {metric["count"]}')
+        return '\n'.join(lines) + '\n'
+
+    def write_prometheus(self, path: str) -> None:
+        temporary_path = f'{path}.tmp'
+        with open(temporary_path, 'w', encoding='utf-8') as file:
+            file.write(self.to_prometheus())
+        os.replace(temporary_path, path)
+
+
+def enable(registry: MetricsRegistry = None) -> MetricsRegistry:
+    global _registry
+    _registry = registry or MetricsRegistry()
+    return _registry
+
+
+def disable() -> None:
+    global _registry
+    _registry = None
+
+
+def get_registry() -> MetricsRegistry:
+    return _registry
+
+
+def instrument_execute(execute):
+    @wraps(execute)
+    def instrumented_execute(self, *args, **kwargs):
+        registry = _registry
+        executing = _executing.__dict__.setdefault('transactions', set())
+        # A subclass calling super().execute() reaches another wrapper for the same transaction, which is counted once
+        if registry is None or id(self) in executing:
+            return execute(self, *args, **kwargs)
+        executing.add(id(self))
+        start = perf_counter()
+        try:
+            result = execute(self, *args, **kwargs)
+        except Exception as error:
+            registry.record(TRANSACTION, type(self).__name__, perf_counter() - start, error)
+            raise
+        finally:
+            executing.discard(id(self))
+        registry.record(TRANSACTION, type(self).__name__, perf_counter() - start)
+        return result
+    return instrumented_execute
+
+
+class InstrumentedDatabase(PayrollDatabaseABC):
+    def __init__(self, database: PayrollDatabaseABC, registry: MetricsRegistry = None) -> None:
+        if not isinstance(database, PayrollDatabaseABC):
+            raise TypeError('Invalid type of argument \"database\".')
+        self.__database = database
+        self.__registry = registry
+
+    @property
+    def database(self) -> PayrollDatabaseABC:
+        return self.__database
+
+    @property
+    def _reopen(self):
+        return self.__database._reopen
+
+    def __enter__(self) -> InstrumentedDatabase:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def add_emplyee(self, id, employee):
+        return self.__call('add_emplyee', id, employee)
+
+    def get_employee(self, id):
+        return self.__call('get_employee', id)
+
+    def delete_employee(self, id):
+        return self.__call('delete_employee', id)
+
+    def add_union_member(self, id, employee):
+        return self.__call('add_union_member', id, employee)
+
+    def get_union_member(self, id):
+        return self.__call('get_union_member', id)
+
+    def delete_union_member(self, id):
+        return self.__call('delete_union_member', id)
+
+    def get_all_employee_ids(self):
+        return self.__call('get_all_employee_ids')
+
+    def get_employees(self, ids):
+        return self.__call('get_employees', ids)
+
+    def add_employees(self, items):
+        return self.__call('add_employees', items)
+
+    def get_employee_ids_paid_on(self, pay_date):
+        return self.__call('get_employee_ids_paid_on', pay_date)
+
+    def add_time_card(self, id, employee, time_card):
+        return self.__call('add_time_card', id, employee, time_card)
+
+    def add_sales_receipt(self, id, employee, sales_receipt):
+        return self.__call('add_sales_receipt', id, employee, sales_receipt)
+
+    def add_service_charge(self, id, employee, service_charge):
+        return self.__call('add_service_charge', id, employee, service_charge)
+
+    def update_employee(self, id, employee):
+        return self.__call('update_employee', id, employee)
+
+    def update_classification(self, id, employee):
+        return self.__call('update_classification', id, employee)
+
+    def update_method(self, id, employee):
+        return self.__call('update_method', id, employee)
+
+    def update_affiliation(self, id, employee):
+        return self.__call('update_affiliation', id, employee)
+
+    def compact_documents(self, id, employee, before_date):
+        return self.__call('compact_documents', id, employee, before_date)
+
+    def apply_updates(self, updates):
+        return self.__call('apply_updates', updates)
+
+    def clear(self):
+        return self.__call('clear')
+
+    def close(self):
+        return self.__call('close')
+
+    def __call(self, method: str, *args):
+        registry = self.__registry or _registry
+        if registry is None:
+            return getattr(self.__database, method)(*args)
+        start = perf_counter()
+        try:
+            result = getattr(self.__database, method)(*args)
+        except Exception as error:
+            registry.record(DATABASE, method, perf_counter() - start, error)
+            raise
+        registry.record(DATABASE, method, perf_counter() - start)
+        return result
@@ -0,0 +1,332 @@
+from __future__ import annotations
+from array import array
+from bisect import bisect_left
+from datetime import date
+import mmap
+import os
+import struct
+from core.classes.doc import Paycheck
+from core.paychecksink import DEFAULT_BUFFER_SIZE, PaycheckSinkABC
+
+
+MAGIC = b'PAYCHK01'
+HEADER = struct.Struct('<8sI')
+RECORD = struct.Struct('<qiiddd')
+RECORD_DATE = struct.Struct('<i')
+DATE_OFFSET = 8
+INDEX_MAGIC = b'PAYIDX01'
+INDEX_HEADER = struct.Struct('=8sIIqqq')
+INDEX_ITEM = struct.Struct('=q')
+INDEX_SUFFIX = '.idx'
+BYTE_ORDER_MARK = 0x01020304
+EMPLOYEES = 0
+DATES = 1
+# Records appended since the sidecar index was written are indexed in memory until they outgrow this share of it
+INDEX_TAIL_RATIO = 4
+MIN_INDEX_TAIL = 4096
+SCAN_CHUNK = 4096
+
+
+class PaycheckArchiveWriter(PaycheckSinkABC):
+    def __init__(self, path: str, buffer_size: int = DEFAULT_BUFFER_SIZE) -> None:
+        self.__file = open(path, 'ab', buffering=buffer_size)
+        try:
+            if self.__file.tell() == 0:
+                self.__file.write(HEADER.pack(MAGIC, RECORD.size))
+                self.__file.flush()
+            else:
+                _check_header(path)
+                size = self.__file.tell()
+                whole_size = size - (size - HEADER.size) % RECORD.size
+                if whole_size != size:
+                    # Drop a record torn by a crash so new records, and the index numbering them, stay aligned
+                    self.__file.truncate(whole_size)
+        except Exception:
+            self.__file.close()
+            raise
+        self.__count = 0
+
+    @property
+    def count(self) -> int:
+        return self.__count
+
+    def write(self, emp_id: int, paycheck: Paycheck) -> None:
+        self.__file.write(RECORD.pack(
+            emp_id, paycheck.pay_date.toordinal(), paycheck.pay_period.start_date.toordinal(),
+            paycheck.gross_pay, paycheck.deductions, paycheck.net_pay
+        ))
+        self.__count += 1
+
+    def flush(self) -> None:
+        self.__file.flush()
+
+    def close(self) -> None:
+        self.__file.close()
+
+    def __enter__(self) -> PaycheckArchiveWriter:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+class PaycheckArchive():
+    def __init__(self, path: str) -> None:
+        _check_header(path)
+        self.__path = path
+        self.__file = open(path, 'rb')
+        self.__map = None
+        self.__count = 0
+        self.__index = None
+        self.__indexed = 0
+        self.__by_employee = {}
+        self.__by_date = {}
+        try:
+            self.__open_index()
+            self.refresh()
+        except Exception:
+            self.close()
+            raise
+
+    def __len__(self) -> int:
+        return self.__count
+
+    def refresh(self) -> None:
+        size = os.fstat(self.__file.fileno()).st_size
+        count = (size - HEADER.size) // RECORD.size
+        if count == self.__count:
+            return
+        if self.__map is not None:
+            self.__map.close()
+        self.__map = mmap.mmap(self.__file.fileno(), 0, access=mmap.ACCESS_READ)
+        start = max(self.__count, self.__indexed)
+        for number, (emp_id, pay_date, *_) in enumerate(self.__records(start, count), start):
+            numbers = self.__by_employee.get(emp_id, None)
+            if numbers is None:
+                numbers = self.__by_employee[emp_id] = array('q')
+            numbers.append(number)
+            numbers = self.__by_date.get(pay_date, None)
+            if numbers is None:
+                numbers = self.__by_date[pay_date] = array('q')
+            numbers.append(number)
+        self.__count = count
+        if count - self.__indexed > max(MIN_INDEX_TAIL, self.__indexed // INDEX_TAIL_RATIO):
+            self.__write_index()
+
+    def record(self, number: int) -> tuple:
+        if not 0 <= number < self.__count:
+            raise IndexError(number)
+        return RECORD.unpack_from(self.__map, HEADER.size + number * RECORD.size)
+
+    def get(self, emp_id: int, pay_date: date) -> tuple:
+        ordinal = pay_date.toordinal()
+        for number in reversed(self.__numbers(EMPLOYEES, emp_id, self.__by_employee)):
+            if self.__date_of(number) == ordinal:
+                return self.record(number)
+        return None
+
+    def history(self, emp_id: int, start_date: date = date.min, end_date: date = date.max) -> list:
+        start, end = start_date.toordinal(), end_date.toordinal()
+        return [
+            self.record(number)
+            for number in self.__numbers(EMPLOYEES, emp_id, self.__by_employee)
+            if start <= self.__date_of(number) <= end
+        ]
+
+    def on(self, pay_date: date) -> list:
+        return [self.record(number) for number in self.__numbers(DATES, pay_date.toordinal(), self.__by_date)]
+
+    def pay_dates(self) -> list:
+        ordinals = set(self.__by_date)
+        if self.__index is not None:
+            ordinals.update(self.__index.keys(DATES))
+        return sorted(date.fromordinal(ordinal) for ordinal in ordinals)
+
+    def scan(self, start_date: date = date.min, end_date: date = date.max):
+        start, end = start_date.toordinal(), end_date.toordinal()
+        for record in self.__records(0, self.__count):
+            if start <= record[1] <= end:
+                yield record
+
+    def totals(self, start_date: date = date.min, end_date: date = date.max) -> dict:
+        totals = {}
+        for emp_id, _, _, gross_pay, deductions, net_pay in self.scan(start_date, end_date):
+            total = totals.get(emp_id, None)
+            if total is None:
+                totals[emp_id] = [gross_pay, deductions, net_pay]
+            else:
+                total[0] += gross_pay
+                total[1] += deductions
+                total[2] += net_pay
+        return totals
+
+    def close(self) -> None:
+        if self.__index is not None:
+            self.__index.close()
+            self.__index = None
+        if self.__map is not None:
+            self.__map.close()
+        self.__file.close()
+
+    def __enter__(self) -> PaycheckArchive:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def __date_of(self, number: int) -> int:
+        return RECORD_DATE.unpack_from(self.__map, HEADER.size + number * RECORD.size + DATE_OFFSET)[0]
+
+    def __records(self, start: int, end: int):
+        # Records are copied out a chunk at a time so no buffer stays exported from the map, which close and
+        # refresh would otherwise fail on while a scan is suspended
+        for chunk in range(start, end, SCAN_CHUNK):
+            yield from RECORD.iter_unpack(
+                self.__map[HEADER.size + chunk * RECORD.size:HEADER.size + min(chunk + SCAN_CHUNK, end) * RECORD.size]
+            )
+
+    def __numbers(self, section: int, key: int, tail: dict) -> array:
+        numbers = self.__index.numbers(section, key) if self.__index is not None else array('q')
+        numbers.extend(tail.get(key, ()))
+        return numbers
+
+    def __open_index(self) -> None:
+        try:
+            file = open(self.__path + INDEX_SUFFIX, 'rb')
+        except FileNotFoundError:
+            return
+        with file:
+            if os.fstat(file.fileno()).st_size < INDEX_HEADER.size:
+                return
+            index_map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        index = _ArchiveIndex(index_map)
+        # An index that is damaged or covers more records than the archive holds belongs to another file
+        count = (os.fstat(self.__file.fileno()).st_size - HEADER.size) // RECORD.size
+        if not index.valid or index.count > count:
+            index.close()
+            return
+        self.__index = index
+        self.__indexed = index.count
+
+    def __write_index(self) -> None:
+        path = self.__path + INDEX_SUFFIX
+        temporary_path = f'{path}.tmp'
+        try:
+            with open(temporary_path, 'wb') as file:
+                file.write(bytes(INDEX_HEADER.size))
+                employees = _write_index_section(file, self.__index, EMPLOYEES, self.__by_employee)
+                dates = _write_index_section(file, self.__index, DATES, self.__by_date)
+                file.seek(0)
+                file.write(INDEX_HEADER.pack(INDEX_MAGIC, RECORD.size, BYTE_ORDER_MARK, self.__count, employees, dates))
+            os.replace(temporary_path, path)
+        except OSError:
+            # Without a writable sidecar the records stay indexed in memory
+            if os.path.exists(temporary_path):
+                os.remove(temporary_path)
+            return
+        if self.__index is not None:
+            self.__index.close()
+            self.__index = None
+        self.__indexed = 0
+        self.__open_index()
+        self.__by_employee = {}
+        self.__by_date = {}
+
+
+class _ArchiveIndex():
+    # Each section holds its sorted keys, their offsets into the record numbers, and the record numbers themselves
+    def __init__(self, index_map: mmap.mmap) -> None:
+        self.__map = index_map
+        magic, record_size, byte_order, self.count, employees, dates = INDEX_HEADER.unpack_from(index_map)
+        offset = INDEX_HEADER.size
+        self.__sections = []
+        for keys in (employees, dates):
+            section = []
+            for length in (keys, keys + 1, self.count):
+                section.append((offset, length))
+                offset += length * INDEX_ITEM.size
+            self.__sections.append(section)
+        self.valid = (magic, record_size, byte_order) == (INDEX_MAGIC, RECORD.size, BYTE_ORDER_MARK) and offset == len(index_map)
+
+    def keys(self, section: int) -> array:
+        return self.__column(section, 0, 0, self.__sections[section][0][1])
+
+    def offsets(self, section: int) -> array:
+        return self.__column(section, 1, 0, self.__sections[section][1][1])
+
+    def numbers(self, section: int, key: int) -> array:
+        keys = _IndexColumn(self.__map, *self.__sections[section][0])
+        position = bisect_left(keys, key)
+        if position == len(keys) or keys[position] != key:
+            return array('q')
+        start, end = self.__column(section, 1, position, position + 2)
+        return self.__column(section, 2, start, end)
+
+    def number_bytes(self, section: int, start: int, end: int) -> bytes:
+        offset = self.__sections[section][2][0]
+        return self.__map[offset + start * INDEX_ITEM.size:offset + end * INDEX_ITEM.size]
+
+    def close(self) -> None:
+        self.__map.close()
+
+    def __column(self, section: int, column: int, start: int, end: int) -> array:
+        values = array('q')
+        offset = self.__sections[section][column][0]
+        values.frombytes(self.__map[offset + start * INDEX_ITEM.size:offset + end * INDEX_ITEM.size])
+        return values
+
+
+class _IndexColumn():
+    __slots__ = ('__buffer', '__offset', '__length')
+
+    def __init__(self, buffer, offset: int, length: int) -> None:
+        self.__buffer = buffer
+        self.__offset = offset
+        self.__length = length
+
+    def __len__(self) -> int:
+        return self.__length
+
+    def __getitem__(self, position: int) -> int:
+        if not 0 <= position < self.__length:
+            raise IndexError(position)
+        return INDEX_ITEM.unpack_from(self.__buffer, self.__offset + position * INDEX_ITEM.size)[0]
+
+
+def _write_index_section(file, index: _ArchiveIndex, section: int, tail: dict) -> int:
+    # Record numbers only grow, so the indexed numbers of a key come before its tail
+    keys = index.keys(section) if index is not None else array('q')
+    offsets = index.offsets(section) if index is not None else array('q', [0])
+    positions = {key: position for position, key in enumerate(keys)}
+    merged = array('q', sorted(positions.keys() | tail.keys()))
+    merged_offsets = array('q', [0])
+    for key in merged:
+        position = positions.get(key, None)
+        length = offsets[position + 1] - offsets[position] if position is not None else 0
+        merged_offsets.append(merged_offsets[-1] + length + len(tail.get(key, ())))
+    file.write(merged.tobytes())
+    file.write(merged_offsets.tobytes())
+    for key in merged:
+        position = positions.get(key, None)
+        if position is not None:
+            file.write(index.number_bytes(section, offsets[position], offsets[position + 1]))
+        numbers = tail.get(key, None)
+        if numbers is not None:
+            file.write(numbers.tobytes())
+    return len(merged)
+
+
+def as_paycheck(record: tuple) -> Paycheck:
+    emp_id, pay_date, start_date, gross_pay, deductions, net_pay = record
+    paycheck = Paycheck(date.fromordinal(pay_date), date.fromordinal(start_date))
+    paycheck.gross_pay = gross_pay
+    paycheck.deductions = deductions
+    paycheck.net_pay = net_pay
+    return paycheck
+
+
+def _check_header(path: str) -> None:
+    with open(path, 'rb') as file:
+        header = file.read(HEADER.size)
+    if len(header) != HEADER.size or HEADER.unpack(header) != (MAGIC, RECORD.size):
+        raise ValueError(f'{path} is not a paycheck archive')
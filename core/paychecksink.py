@@ -0,0 +1,93 @@
+from __future__ import annotations
+from abc import ABC, abstractmethod
+import os
+from core.classes.doc import Paycheck
+
+
+DEFAULT_BUFFER_SIZE = 1 << 16
+REGISTER_FIELDS = (
+    'emp_id', 'pay_date', 'pay_period_start_date', 'gross_pay', 'deductions', 'net_pay', 'disposition'
+)
+
+
+class PaycheckSinkABC(ABC):
+    @abstractmethod
+    def write(self, emp_id: int, paycheck: Paycheck) -> None:
+        pass
+
+    def flush(self) -> None:
+        pass
+
+
+class CallbackPaycheckSink(PaycheckSinkABC):
+    def __init__(self, callback, batch_size: int = 1) -> None:
+        # The callback always receives a list of (emp_id, paycheck) pairs, at most batch_size long
+        if batch_size < 1:
+            raise ValueError('Invalid value of argument \"batch_size\".')
+        self.__callback = callback
+        self.__batch_size = batch_size
+        self.__batch = []
+
+    def write(self, emp_id: int, paycheck: Paycheck) -> None:
+        self.__batch.append((emp_id, paycheck))
+        if len(self.__batch) >= self.__batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        if self.__batch:
+            batch, self.__batch = self.__batch, []
+            self.__callback(batch)
+
+
+class PaycheckRegisterWriter(PaycheckSinkABC):
+    def __init__(self, path: str, format: str = None, buffer_size: int = DEFAULT_BUFFER_SIZE) -> None:
+        format = format or os.path.splitext(path)[1].lstrip('.').lower()
+        if format not in ('csv', 'jsonl'):
+            raise ValueError('Invalid value of argument \"format\".')
+        self.__format = format
+        self.__file = open(path, 'w', newline='', encoding='utf-8', buffering=buffer_size)
+        self.__count = 0
+        # csv and json load only when a register is written, keeping them off the transaction import path
+        if format == 'csv':
+            import csv
+            self.__writer = csv.writer(self.__file)
+            self.__writer.writerow(REGISTER_FIELDS)
+        else:
+            import json
+            self.__encode = json.JSONEncoder().encode
+
+    @property
+    def count(self) -> int:
+        return self.__count
+
+    def write(self, emp_id: int, paycheck: Paycheck) -> None:
+        row = register_row(emp_id, paycheck)
+        if self.__format == 'csv':
+            self.__writer.writerow(row)
+        else:
+            self.__file.write(self.__encode(dict(zip(REGISTER_FIELDS, row))) + '\n')
+        self.__count += 1
+
+    def flush(self) -> None:
+        self.__file.flush()
+
+    def close(self) -> None:
+        self.__file.close()
+
+    def __enter__(self) -> PaycheckRegisterWriter:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def register_row(emp_id: int, paycheck: Paycheck) -> tuple:
+    return (
+        emp_id,
+        paycheck.pay_date.isoformat(),
+        paycheck.pay_period.start_date.isoformat(),
+        paycheck.gross_pay,
+        paycheck.deductions,
+        paycheck.net_pay,
+        getattr(paycheck, 'disposition', None),
+    )
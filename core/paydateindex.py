@@ -0,0 +1,69 @@
+from __future__ import annotations
+from datetime import date
+from core.classes.paymentschedule import BeweeklySchedule, MonthlySchedule, PaymentScheduleABC, WeeklySchedule
+
+
+MONTHLY_BUCKET = 'monthly'
+WEEKLY_BUCKET = 'weekly'
+BIWEEKLY_CYCLE_DAYS = 14
+# Biweekly representatives start in year 1 so only the phase of the two-week cycle matters; holding them
+# here keeps the interned instances alive between paydays
+_BIWEEKLY_REPRESENTATIVES = tuple(
+    (f'biweekly:{phase}', BeweeklySchedule(date.fromordinal(phase or BIWEEKLY_CYCLE_DAYS)))
+    for phase in range(BIWEEKLY_CYCLE_DAYS))
+
+
+def pay_date_bucket(schedule: PaymentScheduleABC) -> str:
+    if type(schedule) is MonthlySchedule:
+        return MONTHLY_BUCKET
+    if type(schedule) is WeeklySchedule:
+        return WEEKLY_BUCKET
+    if type(schedule) is BeweeklySchedule:
+        return f'biweekly:{schedule.work_start_date.toordinal() % BIWEEKLY_CYCLE_DAYS}'
+    return None
+
+
+def pay_date_buckets(pay_date: date) -> list:
+    # Each bucket's rule is evaluated once through a representative schedule
+    buckets = []
+    if MonthlySchedule().is_pay_date(pay_date):
+        buckets.append(MONTHLY_BUCKET)
+    if WeeklySchedule().is_pay_date(pay_date):
+        buckets.append(WEEKLY_BUCKET)
+    for bucket, schedule in _BIWEEKLY_REPRESENTATIVES:
+        if schedule.is_pay_date(pay_date):
+            buckets.append(bucket)
+    return buckets
+
+
+class PayDateIndex():
+    def __init__(self) -> None:
+        self.__buckets = {}
+        self.__bucket_by_id = {}
+        self.__unindexed = set()
+
+    def add(self, emp_id: int, schedule: PaymentScheduleABC) -> None:
+        self.remove(emp_id)
+        bucket = pay_date_bucket(schedule)
+        if bucket is None:
+            self.__unindexed.add(emp_id)
+        else:
+            self.__buckets.setdefault(bucket, set()).add(emp_id)
+            self.__bucket_by_id[emp_id] = bucket
+
+    def remove(self, emp_id: int) -> None:
+        self.__unindexed.discard(emp_id)
+        bucket = self.__bucket_by_id.pop(emp_id, None)
+        if bucket is not None:
+            self.__buckets[bucket].discard(emp_id)
+
+    def get_employee_ids(self, pay_date: date) -> list:
+        emp_ids = list(self.__unindexed)
+        for bucket in pay_date_buckets(pay_date):
+            emp_ids.extend(self.__buckets.get(bucket, ()))
+        return emp_ids
+
+    def clear(self) -> None:
+        self.__buckets.clear()
+        self.__bucket_by_id.clear()
+        self.__unindexed.clear()
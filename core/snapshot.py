@@ -0,0 +1,439 @@
+from __future__ import annotations
+from array import array
+from bisect import bisect_left
+from datetime import date
+import mmap
+import os
+import struct
+from core.classes.affiliation import UnionAffiliation
+from core.classes.doc import SalesReceipt, ServiceCharge, TimeCard
+from core.classes.employee import Employee
+from core.classes.paymentclassification import CommissionedClassification, HourlyClassification, SalariedClassification
+from core.classes.paymentmethod import DirectMethod, HoldMethod, MailMethod
+from core.classes.paymentschedule import BeweeklySchedule, MonthlySchedule, WeeklySchedule
+from core.databasesabc import PayrollDatabaseABC
+from core.paydateindex import BIWEEKLY_CYCLE_DAYS, MONTHLY_BUCKET, WEEKLY_BUCKET, PayDateIndex, pay_date_bucket, pay_date_buckets
+
+
+MAGIC = b'PAYSNP02'
+# Columns follow the employee blocks, at the position recorded in the header
+HEADER = struct.Struct('<8sIIq')
+# Version 1 snapshots put the columns before the blocks
+LEGACY_MAGIC = b'PAYSNP01'
+LEGACY_HEADER = struct.Struct('<8sII')
+KINDS = struct.Struct('<BBBB')
+TEXT_LENGTH = struct.Struct('<i')
+SALARIED = struct.Struct('<d')
+HOURLY = struct.Struct('<d?I')
+COMMISSIONED = struct.Struct('<ddI')
+BIWEEKLY = struct.Struct('<i')
+AFFILIATION = struct.Struct('<qdI')
+ORDINAL_SIZE = array('i').itemsize
+VALUE_SIZE = array('d').itemsize
+SHARD_SIZE = 1024
+
+NO_KIND = 0
+SALARIED_KIND, HOURLY_KIND, COMMISSIONED_KIND = 1, 2, 3
+MONTHLY_KIND, WEEKLY_KIND, BIWEEKLY_KIND = 1, 2, 3
+HOLD_KIND, DIRECT_KIND, MAIL_KIND = 1, 2, 3
+
+# Code 0 marks employees without an indexed schedule, which are candidates on every pay date
+BUCKETS = [None, MONTHLY_BUCKET, WEEKLY_BUCKET] + [f'biweekly:{phase}' for phase in range(BIWEEKLY_CYCLE_DAYS)]
+BUCKET_CODES = {bucket: code for code, bucket in enumerate(BUCKETS)}
+
+
+def write_snapshot(path: str, database: PayrollDatabaseABC) -> int:
+    # Employees are read and encoded a shard at a time, so only the columns grow with the workforce
+    ids = array('q', sorted(database.get_all_employee_ids()))
+    emp_ids = array('q')
+    offsets = array('q')
+    buckets = array('b')
+    member_ids = array('q')
+    member_emp_ids = array('q')
+    position = 0
+    temporary_path = f'{path}.tmp'
+    with open(temporary_path, 'wb') as file:
+        file.write(bytes(HEADER.size))
+        for start in range(0, len(ids), SHARD_SIZE):
+            for emp_id, block, bucket, member_id in _encode_shard(database, ids[start:start + SHARD_SIZE]):
+                file.write(block)
+                emp_ids.append(emp_id)
+                offsets.append(position)
+                buckets.append(bucket)
+                if member_id is not None:
+                    member_ids.append(member_id)
+                    member_emp_ids.append(emp_id)
+                position += len(block)
+        offsets.append(position)
+        order = sorted(range(len(member_ids)), key=member_ids.__getitem__)
+        member_ids = array('q', (member_ids[index] for index in order))
+        member_emp_ids = array('q', (member_emp_ids[index] for index in order))
+        for column in (emp_ids, offsets, buckets, member_ids, member_emp_ids):
+            file.write(column.tobytes())
+        file.seek(0)
+        file.write(HEADER.pack(MAGIC, len(emp_ids), len(member_ids), HEADER.size + position))
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temporary_path, path)
+    return len(emp_ids)
+
+
+def _encode_shard(database: PayrollDatabaseABC, ids: array):
+    # Employees a snapshot has not materialized are copied as they are stored instead of decoded into it
+    blocks = {}
+    if isinstance(database, SnapshotPayrollDatabase):
+        blocks = {emp_id: block for emp_id in ids for block in (database._block(emp_id),) if block is not None}
+    employees = database.get_employees([emp_id for emp_id in ids if emp_id not in blocks])
+    for emp_id in ids:
+        block = blocks.get(emp_id, None)
+        if block is not None:
+            yield (emp_id, block, database._bucket(emp_id), _encoded_member_id(block))
+            continue
+        employee = employees[emp_id]
+        if employee is None:
+            continue
+        yield (
+            emp_id, encode_employee(employee), BUCKET_CODES[pay_date_bucket(employee.schedule)],
+            employee.affiliation.member_id if employee.affiliation is not None else None,
+        )
+
+
+class SnapshotPayrollDatabase(PayrollDatabaseABC):
+    def __init__(self, path: str = None) -> None:
+        self.__path = path
+        self.__file = None
+        self.__map = None
+        self.__emp_ids = array('q')
+        self.__offsets = array('q', (0,))
+        self.__buckets = array('b')
+        self.__member_ids = array('q')
+        self.__member_emp_ids = array('q')
+        self.__blocks_start = 0
+        self.__bucket_emp_ids = None
+        # Employees materialized from the snapshot or written since it was opened
+        self.__employees = {}
+        self.__overridden = set()
+        self.__deleted = set()
+        self.__pay_date_index = PayDateIndex()
+        self.__union_members = {}
+        self.__deleted_members = set()
+        if path is not None:
+            self.__open(path)
+
+    @property
+    def materialized(self) -> int:
+        return len(self.__employees)
+
+    def close(self) -> None:
+        if self.__map is not None:
+            self.__map.close()
+            self.__map = None
+        if self.__file is not None:
+            self.__file.close()
+            self.__file = None
+
+    def __enter__(self) -> SnapshotPayrollDatabase:
+        return self
+
+    @property
+    def _reopen(self):
+        # Writes since opening live only in this process, so the file alone is not the same data
+        if self.__path is None or self.__overridden or self.__deleted or self.__union_members or self.__deleted_members:
+            return None
+        return (SnapshotPayrollDatabase, (self.__path,))
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def add_emplyee(self, id: int, employee: Employee) -> None:
+        self.__employees[id] = employee
+        self.__overridden.add(id)
+        self.__deleted.discard(id)
+        self.__pay_date_index.add(id, employee.schedule)
+
+    def get_employee(self, id: int) -> Employee:
+        employee = self.__employees.get(id, None)
+        if employee is not None or id in self.__deleted:
+            return employee
+        position = self.__find(self.__emp_ids, id)
+        if position is None:
+            return None
+        start = self.__blocks_start + self.__offsets[position]
+        employee = decode_employee(id, self.__map, start)
+        self.__employees[id] = employee
+        return employee
+
+    def delete_employee(self, id: int) -> None:
+        self.__employees.pop(id, None)
+        self.__overridden.discard(id)
+        self.__deleted.add(id)
+        self.__pay_date_index.remove(id)
+
+    def add_union_member(self, id: int, employee: Employee) -> None:
+        self.__union_members[id] = employee
+        self.__deleted_members.discard(id)
+
+    def get_union_member(self, id: int) -> Employee:
+        employee = self.__union_members.get(id, None)
+        if employee is not None or id in self.__deleted_members:
+            return employee
+        position = self.__find(self.__member_ids, id)
+        if position is None:
+            return None
+        return self.get_employee(self.__member_emp_ids[position])
+
+    def delete_union_member(self, id: int) -> None:
+        self.__union_members.pop(id, None)
+        self.__deleted_members.add(id)
+
+    def get_all_employee_ids(self) -> array:
+        emp_ids = array('q', self.__live_snapshot_ids(self.__emp_ids))
+        emp_ids.extend(self.__overridden)
+        return emp_ids
+
+    def get_employee_ids_paid_on(self, pay_date: date) -> array:
+        if self.__bucket_emp_ids is None:
+            self.__bucket_emp_ids = [array('q') for _ in BUCKETS]
+            for emp_id, code in zip(self.__emp_ids, self.__buckets):
+                self.__bucket_emp_ids[code].append(emp_id)
+        emp_ids = array('q', self.__live_snapshot_ids(self.__bucket_emp_ids[0]))
+        for bucket in pay_date_buckets(pay_date):
+            emp_ids.extend(self.__live_snapshot_ids(self.__bucket_emp_ids[BUCKET_CODES[bucket]]))
+        emp_ids.extend(self.__pay_date_index.get_employee_ids(pay_date))
+        return emp_ids
+
+    def _block(self, id: int) -> bytes:
+        # The stored encoding of an employee nothing in this process has read or replaced
+        if id in self.__employees or id in self.__deleted:
+            return None
+        position = self.__find(self.__emp_ids, id)
+        if position is None:
+            return None
+        return self.__map[self.__blocks_start + self.__offsets[position]:self.__blocks_start + self.__offsets[position + 1]]
+
+    def _bucket(self, id: int) -> int:
+        return self.__buckets[self.__find(self.__emp_ids, id)]
+
+    def __live_snapshot_ids(self, emp_ids: array):
+        if not self.__overridden and not self.__deleted:
+            return emp_ids
+        return (emp_id for emp_id in emp_ids if emp_id not in self.__overridden and emp_id not in self.__deleted)
+
+    def __open(self, path: str) -> None:
+        self.__file = open(path, 'rb')
+        try:
+            header = self.__file.read(HEADER.size)
+            if len(header) == HEADER.size and header[:len(MAGIC)] == MAGIC:
+                _, count, member_count, position = HEADER.unpack(header)
+                self.__blocks_start = HEADER.size
+            elif len(header) >= LEGACY_HEADER.size and header[:len(LEGACY_MAGIC)] == LEGACY_MAGIC:
+                _, count, member_count = LEGACY_HEADER.unpack_from(header)
+                position = LEGACY_HEADER.size
+            else:
+                raise ValueError(f'{path} is not a payroll snapshot')
+            self.__map = mmap.mmap(self.__file.fileno(), 0, access=mmap.ACCESS_READ)
+        except Exception:
+            self.__file.close()
+            raise
+        columns = []
+        for typecode, length in (('q', count), ('q', count + 1), ('b', count), ('q', member_count), ('q', member_count)):
+            column = array(typecode)
+            column.frombytes(self.__map[position:position + length * column.itemsize])
+            position += length * column.itemsize
+            columns.append(column)
+        self.__emp_ids, self.__offsets, self.__buckets, self.__member_ids, self.__member_emp_ids = columns
+        if self.__blocks_start == 0:
+            self.__blocks_start = position
+
+    @staticmethod
+    def __find(keys: array, key: int):
+        position = bisect_left(keys, key)
+        if position < len(keys) and keys[position] == key:
+            return position
+        return None
+
+
+def encode_employee(employee: Employee) -> bytes:
+    parts = []
+    classification = employee.classification
+    schedule = employee.schedule
+    method = employee.method
+    affiliation = employee.affiliation
+
+    if classification is None:
+        classification_kind = NO_KIND
+    elif type(classification) is SalariedClassification:
+        classification_kind = SALARIED_KIND
+    elif type(classification) is HourlyClassification:
+        classification_kind = HOURLY_KIND
+    elif type(classification) is CommissionedClassification:
+        classification_kind = COMMISSIONED_KIND
+    else:
+        raise TypeError('Unsupported type of \"classification\".')
+
+    if schedule is None:
+        schedule_kind = NO_KIND
+    elif type(schedule) is MonthlySchedule:
+        schedule_kind = MONTHLY_KIND
+    elif type(schedule) is WeeklySchedule:
+        schedule_kind = WEEKLY_KIND
+    elif type(schedule) is BeweeklySchedule:
+        schedule_kind = BIWEEKLY_KIND
+    else:
+        raise TypeError('Unsupported type of \"schedule\".')
+
+    if method is None:
+        method_kind = NO_KIND
+    elif type(method) is HoldMethod:
+        method_kind = HOLD_KIND
+    elif type(method) is DirectMethod:
+        method_kind = DIRECT_KIND
+    elif type(method) is MailMethod:
+        method_kind = MAIL_KIND
+    else:
+        raise TypeError('Unsupported type of \"method\".')
+
+    parts.append(KINDS.pack(classification_kind, schedule_kind, method_kind, affiliation is not None))
+    _pack_text(parts, employee.name)
+    _pack_text(parts, employee.address)
+
+    if classification_kind == SALARIED_KIND:
+        parts.append(SALARIED.pack(classification.salary))
+    elif classification_kind == HOURLY_KIND:
+        time_cards = classification.time_cards_between(date.min, date.max)
+        parts.append(HOURLY.pack(classification.hourly_rate, classification.columnar, len(time_cards)))
+        _pack_documents(parts, time_cards, 'hours')
+    elif classification_kind == COMMISSIONED_KIND:
+        sales_receipts = classification.sales_receipts_between(date.min, date.max)
+        parts.append(COMMISSIONED.pack(classification.commission_rate, classification.salary, len(sales_receipts)))
+        _pack_documents(parts, sales_receipts, 'amount')
+
+    if schedule_kind == BIWEEKLY_KIND:
+        parts.append(BIWEEKLY.pack(schedule.work_start_date.toordinal()))
+
+    if method_kind == DIRECT_KIND:
+        _pack_text(parts, method.bank)
+        _pack_text(parts, method.account)
+    elif method_kind == MAIL_KIND:
+        _pack_text(parts, method.address)
+
+    if affiliation is not None:
+        service_charges = affiliation.service_charges_between(date.min, date.max)
+        parts.append(AFFILIATION.pack(affiliation.member_id, affiliation.dues, len(service_charges)))
+        _pack_documents(parts, service_charges, 'amount')
+    return b''.join(parts)
+
+
+def decode_employee(emp_id: int, buffer, position: int = 0) -> Employee:
+    classification_kind, schedule_kind, method_kind, affiliated = KINDS.unpack_from(buffer, position)
+    position += KINDS.size
+    name, position = _unpack_text(buffer, position)
+    address, position = _unpack_text(buffer, position)
+    employee = Employee(emp_id, name, address)
+
+    if classification_kind == SALARIED_KIND:
+        salary, = SALARIED.unpack_from(buffer, position)
+        position += SALARIED.size
+        employee.classification = SalariedClassification(salary)
+    elif classification_kind == HOURLY_KIND:
+        hourly_rate, columnar, count = HOURLY.unpack_from(buffer, position)
+        classification = HourlyClassification(hourly_rate, columnar=columnar)
+        documents, position = _unpack_documents(buffer, position + HOURLY.size, count)
+        for card_date, hours in documents:
+            classification.add_time_card(TimeCard(card_date, hours))
+        employee.classification = classification
+    elif classification_kind == COMMISSIONED_KIND:
+        commission_rate, salary, count = COMMISSIONED.unpack_from(buffer, position)
+        classification = CommissionedClassification(commission_rate, salary)
+        documents, position = _unpack_documents(buffer, position + COMMISSIONED.size, count)
+        for receipt_date, amount in documents:
+            classification.add_sales_receipt(SalesReceipt(receipt_date, amount))
+        employee.classification = classification
+
+    if schedule_kind == MONTHLY_KIND:
+        employee.schedule = MonthlySchedule()
+    elif schedule_kind == WEEKLY_KIND:
+        employee.schedule = WeeklySchedule()
+    elif schedule_kind == BIWEEKLY_KIND:
+        work_start_date, = BIWEEKLY.unpack_from(buffer, position)
+        position += BIWEEKLY.size
+        employee.schedule = BeweeklySchedule(date.fromordinal(work_start_date))
+
+    if method_kind == HOLD_KIND:
+        employee.method = HoldMethod()
+    elif method_kind == DIRECT_KIND:
+        bank, position = _unpack_text(buffer, position)
+        account, position = _unpack_text(buffer, position)
+        employee.method = DirectMethod(bank, account)
+    elif method_kind == MAIL_KIND:
+        method_address, position = _unpack_text(buffer, position)
+        employee.method = MailMethod(method_address)
+
+    if affiliated:
+        member_id, dues, count = AFFILIATION.unpack_from(buffer, position)
+        affiliation = UnionAffiliation(member_id, dues)
+        documents, position = _unpack_documents(buffer, position + AFFILIATION.size, count)
+        for charge_date, amount in documents:
+            affiliation.add_service_charge(ServiceCharge(charge_date, amount))
+        employee.affiliation = affiliation
+    return employee
+
+
+def _encoded_member_id(buffer, position: int = 0) -> int:
+    # Walks the encoding as decode_employee does, without building the employee
+    classification_kind, schedule_kind, method_kind, affiliated = KINDS.unpack_from(buffer, position)
+    if not affiliated:
+        return None
+    position = _skip_text(buffer, _skip_text(buffer, position + KINDS.size))
+    if classification_kind == SALARIED_KIND:
+        position += SALARIED.size
+    elif classification_kind == HOURLY_KIND:
+        position += HOURLY.size + HOURLY.unpack_from(buffer, position)[2] * (ORDINAL_SIZE + VALUE_SIZE)
+    elif classification_kind == COMMISSIONED_KIND:
+        position += COMMISSIONED.size + COMMISSIONED.unpack_from(buffer, position)[2] * (ORDINAL_SIZE + VALUE_SIZE)
+    if schedule_kind == BIWEEKLY_KIND:
+        position += BIWEEKLY.size
+    if method_kind == DIRECT_KIND:
+        position = _skip_text(buffer, _skip_text(buffer, position))
+    elif method_kind == MAIL_KIND:
+        position = _skip_text(buffer, position)
+    return AFFILIATION.unpack_from(buffer, position)[0]
+
+
+def _pack_text(parts: list, text: str) -> None:
+    if text is None:
+        parts.append(TEXT_LENGTH.pack(-1))
+    elif isinstance(text, str):
+        encoded = text.encode('utf-8')
+        parts.append(TEXT_LENGTH.pack(len(encoded)))
+        parts.append(encoded)
+    else:
+        raise TypeError('Unsupported type of text field.')
+
+
+def _unpack_text(buffer, position: int):
+    length, = TEXT_LENGTH.unpack_from(buffer, position)
+    position += TEXT_LENGTH.size
+    if length < 0:
+        return None, position
+    return str(buffer[position:position + length], 'utf-8'), position + length
+
+
+def _skip_text(buffer, position: int) -> int:
+    length, = TEXT_LENGTH.unpack_from(buffer, position)
+    return position + TEXT_LENGTH.size + max(length, 0)
+
+
+def _pack_documents(parts: list, documents: list, field: str) -> None:
+    parts.append(array('i', (document.date.toordinal() for document in documents)).tobytes())
+    parts.append(array('d', (getattr(document, field) for document in documents)).tobytes())
+
+
+def _unpack_documents(buffer, position: int, count: int):
+    ordinals = array('i')
+    ordinals.frombytes(buffer[position:position + count * ORDINAL_SIZE])
+    position += count * ORDINAL_SIZE
+    values = array('d')
+    values.frombytes(buffer[position:position + count * VALUE_SIZE])
+    position += count * VALUE_SIZE
+    return zip(map(date.fromordinal, ordinals), values), position
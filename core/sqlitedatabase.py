@@ -0,0 +1,444 @@
+from __future__ import annotations
+from array import array
+from collections import OrderedDict
+from datetime import date
+import sqlite3
+from core.classes.affiliation import UnionAffiliation
+from core.classes.doc import SalesReceipt, ServiceCharge, TimeCard
+from core.classes.employee import Employee
+from core.classes.paymentclassification import CommissionedClassification, HourlyClassification, SalariedClassification
+from core.classes.paymentmethod import DirectMethod, HoldMethod, MailMethod
+from core.classes.paymentschedule import BeweeklySchedule, MonthlySchedule, WeeklySchedule
+from core.databasesabc import PayrollDatabaseABC
+from core.paydateindex import pay_date_bucket, pay_date_buckets
+
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS employees (
+    emp_id INTEGER PRIMARY KEY,
+    name TEXT,
+    address TEXT
+);
+CREATE TABLE IF NOT EXISTS classifications (
+    emp_id INTEGER PRIMARY KEY REFERENCES employees(emp_id) ON DELETE CASCADE,
+    kind TEXT NOT NULL,
+    salary REAL,
+    hourly_rate REAL,
+    commission_rate REAL,
+    columnar INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS schedules (
+    emp_id INTEGER PRIMARY KEY REFERENCES employees(emp_id) ON DELETE CASCADE,
+    kind TEXT NOT NULL,
+    work_start_date INTEGER,
+    pay_date_bucket TEXT
+);
+CREATE TABLE IF NOT EXISTS methods (
+    emp_id INTEGER PRIMARY KEY REFERENCES employees(emp_id) ON DELETE CASCADE,
+    kind TEXT NOT NULL,
+    bank TEXT,
+    account,
+    address TEXT
+);
+CREATE TABLE IF NOT EXISTS affiliations (
+    emp_id INTEGER PRIMARY KEY REFERENCES employees(emp_id) ON DELETE CASCADE,
+    member_id INTEGER NOT NULL,
+    dues REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS union_members (
+    member_id INTEGER PRIMARY KEY,
+    emp_id INTEGER NOT NULL REFERENCES employees(emp_id) ON DELETE CASCADE
+);
+CREATE TABLE IF NOT EXISTS time_cards (
+    emp_id INTEGER NOT NULL REFERENCES employees(emp_id) ON DELETE CASCADE,
+    date INTEGER NOT NULL,
+    hours REAL NOT NULL,
+    PRIMARY KEY (emp_id, date)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS sales_receipts (
+    emp_id INTEGER NOT NULL REFERENCES employees(emp_id) ON DELETE CASCADE,
+    date INTEGER NOT NULL,
+    amount REAL NOT NULL,
+    PRIMARY KEY (emp_id, date)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS service_charges (
+    emp_id INTEGER NOT NULL REFERENCES employees(emp_id) ON DELETE CASCADE,
+    date INTEGER NOT NULL,
+    amount REAL NOT NULL,
+    PRIMARY KEY (emp_id, date)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS union_members_emp_id ON union_members(emp_id);
+CREATE INDEX IF NOT EXISTS schedules_pay_date_bucket ON schedules(pay_date_bucket);
+'''
+
+SELECT_EMPLOYEES = '''
+SELECT e.emp_id, e.name, e.address,
+       c.kind, c.salary, c.hourly_rate, c.commission_rate, c.columnar,
+       s.kind, s.work_start_date,
+       m.kind, m.bank, m.account, m.address,
+       a.member_id, a.dues
+FROM employees e
+LEFT JOIN classifications c ON c.emp_id = e.emp_id
+LEFT JOIN schedules s ON s.emp_id = e.emp_id
+LEFT JOIN methods m ON m.emp_id = e.emp_id
+LEFT JOIN affiliations a ON a.emp_id = e.emp_id
+WHERE e.emp_id IN ({})
+'''
+
+SELECT_DOCUMENTS = 'SELECT emp_id, date, {} FROM {} WHERE emp_id IN ({}) ORDER BY emp_id, date'
+
+UPSERT_EMPLOYEE = '''
+INSERT INTO employees (emp_id, name, address) VALUES (?, ?, ?)
+ON CONFLICT (emp_id) DO UPDATE SET name = excluded.name, address = excluded.address
+'''
+
+EMPLOYEE_PARTS = ('classifications', 'schedules', 'methods', 'affiliations', 'time_cards', 'sales_receipts', 'service_charges')
+CLASSIFICATION_PARTS = ('classifications', 'schedules', 'time_cards', 'sales_receipts')
+METHOD_PARTS = ('methods',)
+AFFILIATION_PARTS = ('affiliations', 'service_charges')
+
+DOCUMENT_COLUMNS = {'time_cards': 'hours', 'sales_receipts': 'amount', 'service_charges': 'amount'}
+
+BULK_CHUNK_SIZE = 500
+EMPLOYEE_CACHE_SIZE = 1024
+
+
+class SqlitePayrollDatabase(PayrollDatabaseABC):
+    def __init__(self, path: str = ':memory:', cache_size: int = EMPLOYEE_CACHE_SIZE) -> None:
+        if cache_size < 0:
+            raise ValueError('Invalid value of argument \"cache_size\".')
+        self.__path = path
+        self.__connection = sqlite3.connect(path)
+        self.__connection.execute('PRAGMA journal_mode = WAL')
+        self.__connection.execute('PRAGMA synchronous = NORMAL')
+        self.__connection.execute('PRAGMA foreign_keys = ON')
+        self.__connection.executescript(SCHEMA)
+        # Recently read employees, kept in step with every write through this connection so a transaction
+        # on one employee does not reload all of its documents
+        self.__cache = OrderedDict()
+        self.__cache_size = cache_size
+
+    def close(self) -> None:
+        self.__connection.close()
+
+    @property
+    def _reopen(self):
+        if self.__path == ':memory:':
+            return None
+        return (SqlitePayrollDatabase, (self.__path,))
+
+    def add_emplyee(self, id: int, employee: Employee) -> None:
+        self.__write(self.__write_employee, id, employee)
+
+    def get_employee(self, id: int) -> Employee:
+        employee = self.__cache.get(id, None)
+        if employee is not None:
+            self.__cache.move_to_end(id)
+            return employee
+        employee = self.get_employees((id,))[id]
+        if employee is not None and self.__cache_size:
+            self.__cache[id] = employee
+            if len(self.__cache) > self.__cache_size:
+                self.__cache.popitem(last=False)
+        return employee
+
+    def add_employees(self, items) -> None:
+        items = list(items)
+        try:
+            with self.__connection:
+                for id, employee in items:
+                    self.__write_employee(id, employee)
+        except Exception:
+            self.__cache.clear()
+            raise
+        for id, employee in items:
+            self.__refresh(id, employee)
+
+    def add_time_card(self, id: int, employee: Employee, time_card: TimeCard) -> None:
+        self.__write(self.__add_time_card, id, employee, time_card)
+
+    def add_sales_receipt(self, id: int, employee: Employee, sales_receipt: SalesReceipt) -> None:
+        self.__write(self.__add_sales_receipt, id, employee, sales_receipt)
+
+    def add_service_charge(self, id: int, employee: Employee, service_charge: ServiceCharge) -> None:
+        self.__write(self.__add_service_charge, id, employee, service_charge)
+
+    def update_employee(self, id: int, employee: Employee) -> None:
+        self.__write(self.__update_employee, id, employee)
+
+    def update_classification(self, id: int, employee: Employee) -> None:
+        self.__write(self.__update_classification, id, employee)
+
+    def update_method(self, id: int, employee: Employee) -> None:
+        self.__write(self.__update_method, id, employee)
+
+    def update_affiliation(self, id: int, employee: Employee) -> None:
+        self.__write(self.__update_affiliation, id, employee)
+
+    def compact_documents(self, id: int, employee: Employee, before_date: date) -> None:
+        self.__write(self.__compact_documents, id, employee, before_date)
+
+    def apply_updates(self, updates) -> None:
+        # One SQLite transaction for the whole set instead of one per update
+        writers = {
+            'add_time_card': self.__add_time_card,
+            'add_sales_receipt': self.__add_sales_receipt,
+            'add_service_charge': self.__add_service_charge,
+            'update_employee': self.__update_employee,
+            'update_classification': self.__update_classification,
+            'update_method': self.__update_method,
+            'update_affiliation': self.__update_affiliation,
+            'compact_documents': self.__compact_documents,
+        }
+        updates = list(updates)
+        try:
+            with self.__connection:
+                for method, id, employee, *args in updates:
+                    writers[method](id, employee, *args)
+        except Exception:
+            self.__cache.clear()
+            raise
+        for _, id, employee, *_ in updates:
+            self.__refresh(id, employee)
+
+    def get_employees(self, ids) -> dict:
+        employees = dict.fromkeys(ids)
+        ids = list(employees)
+        for start in range(0, len(ids), BULK_CHUNK_SIZE):
+            chunk = ids[start:start + BULK_CHUNK_SIZE]
+            placeholders = ', '.join('?' * len(chunk))
+            rows = self.__connection.execute(SELECT_EMPLOYEES.format(placeholders), chunk).fetchall()
+            documents = {
+                table: self.__read_documents(table, placeholders, chunk)
+                for table in DOCUMENT_COLUMNS
+            }
+            for row in rows:
+                employees[row[0]] = self.__read_employee(row, documents)
+        return employees
+
+    def delete_employee(self, id: int) -> None:
+        self.__cache.pop(id, None)
+        with self.__connection:
+            self.__connection.execute('DELETE FROM employees WHERE emp_id = ?', (id,))
+
+    def add_union_member(self, id: int, employee: Employee) -> None:
+        with self.__connection:
+            self.__connection.execute(
+                'INSERT OR REPLACE INTO union_members (member_id, emp_id) VALUES (?, ?)', (id, employee.emp_id)
+            )
+
+    def get_union_member(self, id: int) -> Employee:
+        row = self.__connection.execute('SELECT emp_id FROM union_members WHERE member_id = ?', (id,)).fetchone()
+        if row is None:
+            return None
+        return self.get_employee(row[0])
+
+    def delete_union_member(self, id: int) -> None:
+        with self.__connection:
+            self.__connection.execute('DELETE FROM union_members WHERE member_id = ?', (id,))
+
+    def get_all_employee_ids(self) -> array:
+        return array('q', (row[0] for row in self.__connection.execute('SELECT emp_id FROM employees ORDER BY emp_id')))
+
+    def get_employee_ids_paid_on(self, pay_date: date) -> array:
+        buckets = pay_date_buckets(pay_date)
+        placeholders = ', '.join('?' * len(buckets))
+        return array('q', (
+            row[0] for row in self.__connection.execute(
+                f'SELECT emp_id FROM schedules WHERE pay_date_bucket IN ({placeholders}) ORDER BY emp_id', buckets
+            )
+        ))
+
+    def clear(self) -> None:
+        self.__cache.clear()
+        with self.__connection:
+            self.__connection.execute('DELETE FROM union_members')
+            self.__connection.execute('DELETE FROM employees')
+
+    def __write(self, writer, id: int, employee: Employee, *args) -> None:
+        try:
+            with self.__connection:
+                writer(id, employee, *args)
+        except Exception:
+            # The cached employee may already carry the change that failed to reach the database
+            self.__cache.pop(id, None)
+            raise
+        self.__refresh(id, employee)
+
+    def __refresh(self, id: int, employee: Employee) -> None:
+        if id in self.__cache:
+            self.__cache[id] = employee
+
+    def __write_employee(self, id: int, employee: Employee) -> None:
+        self.__connection.execute(UPSERT_EMPLOYEE, (id, employee.name, employee.address))
+        self.__delete_parts(id, EMPLOYEE_PARTS)
+        self.__write_classification(id, employee)
+        self.__write_method(id, employee)
+        self.__write_affiliation(id, employee)
+
+    def __add_time_card(self, id: int, employee: Employee, time_card: TimeCard) -> None:
+        self.__insert_document('time_cards', id, time_card.date, time_card.hours)
+
+    def __add_sales_receipt(self, id: int, employee: Employee, sales_receipt: SalesReceipt) -> None:
+        self.__insert_document('sales_receipts', id, sales_receipt.date, sales_receipt.amount)
+
+    def __add_service_charge(self, id: int, employee: Employee, service_charge: ServiceCharge) -> None:
+        self.__insert_document('service_charges', id, service_charge.date, service_charge.amount)
+
+    def __update_employee(self, id: int, employee: Employee) -> None:
+        self.__connection.execute(
+            'UPDATE employees SET name = ?, address = ? WHERE emp_id = ?', (employee.name, employee.address, id)
+        )
+
+    def __update_classification(self, id: int, employee: Employee) -> None:
+        # Documents belong to the classification they were added to, so they go with it
+        self.__delete_parts(id, CLASSIFICATION_PARTS)
+        self.__write_classification(id, employee)
+
+    def __update_method(self, id: int, employee: Employee) -> None:
+        self.__delete_parts(id, METHOD_PARTS)
+        self.__write_method(id, employee)
+
+    def __update_affiliation(self, id: int, employee: Employee) -> None:
+        self.__delete_parts(id, AFFILIATION_PARTS)
+        self.__write_affiliation(id, employee)
+
+    def __compact_documents(self, id: int, employee: Employee, before_date: date) -> None:
+        for table in DOCUMENT_COLUMNS:
+            self.__connection.execute(
+                f'DELETE FROM {table} WHERE emp_id = ? AND date < ?', (id, before_date.toordinal())
+            )
+
+    def __delete_parts(self, id: int, tables: tuple) -> None:
+        for table in tables:
+            self.__connection.execute(f'DELETE FROM {table} WHERE emp_id = ?', (id,))
+
+    def __insert_document(self, table: str, id: int, document_date: date, value: float) -> None:
+        self.__connection.execute(
+            f'INSERT INTO {table} (emp_id, date, {DOCUMENT_COLUMNS[table]}) VALUES (?, ?, ?)',
+            (id, document_date.toordinal(), value)
+        )
+
+    def __write_classification(self, id: int, employee: Employee) -> None:
+        execute = self.__connection.execute
+        executemany = self.__connection.executemany
+        classification = employee.classification
+        if type(classification) is SalariedClassification:
+            execute(
+                'INSERT INTO classifications (emp_id, kind, salary) VALUES (?, ?, ?)',
+                (id, 'salaried', classification.salary)
+            )
+        elif type(classification) is HourlyClassification:
+            execute(
+                'INSERT INTO classifications (emp_id, kind, hourly_rate, columnar) VALUES (?, ?, ?, ?)',
+                (id, 'hourly', classification.hourly_rate, int(classification.columnar))
+            )
+            executemany(
+                'INSERT INTO time_cards (emp_id, date, hours) VALUES (?, ?, ?)',
+                ((id, time_card.date.toordinal(), time_card.hours)
+                 for time_card in classification.time_cards_between(date.min, date.max))
+            )
+        elif type(classification) is CommissionedClassification:
+            execute(
+                'INSERT INTO classifications (emp_id, kind, salary, commission_rate) VALUES (?, ?, ?, ?)',
+                (id, 'commissioned', classification.salary, classification.commission_rate)
+            )
+            executemany(
+                'INSERT INTO sales_receipts (emp_id, date, amount) VALUES (?, ?, ?)',
+                ((id, sales_receipt.date.toordinal(), sales_receipt.amount)
+                 for sales_receipt in classification.sales_receipts_between(date.min, date.max))
+            )
+        elif classification is not None:
+            raise TypeError('Unsupported type of \"classification\".')
+
+        schedule = employee.schedule
+        bucket = pay_date_bucket(schedule)
+        if type(schedule) is MonthlySchedule:
+            execute('INSERT INTO schedules (emp_id, kind, pay_date_bucket) VALUES (?, ?, ?)', (id, 'monthly', bucket))
+        elif type(schedule) is WeeklySchedule:
+            execute('INSERT INTO schedules (emp_id, kind, pay_date_bucket) VALUES (?, ?, ?)', (id, 'weekly', bucket))
+        elif type(schedule) is BeweeklySchedule:
+            execute(
+                'INSERT INTO schedules (emp_id, kind, work_start_date, pay_date_bucket) VALUES (?, ?, ?, ?)',
+                (id, 'biweekly', schedule.work_start_date.toordinal(), bucket)
+            )
+        elif schedule is not None:
+            raise TypeError('Unsupported type of \"schedule\".')
+
+    def __write_method(self, id: int, employee: Employee) -> None:
+        execute = self.__connection.execute
+        method = employee.method
+        if type(method) is HoldMethod:
+            execute('INSERT INTO methods (emp_id, kind) VALUES (?, ?)', (id, 'hold'))
+        elif type(method) is DirectMethod:
+            execute(
+                'INSERT INTO methods (emp_id, kind, bank, account) VALUES (?, ?, ?, ?)',
+                (id, 'direct', method.bank, method.account)
+            )
+        elif type(method) is MailMethod:
+            execute('INSERT INTO methods (emp_id, kind, address) VALUES (?, ?, ?)', (id, 'mail', method.address))
+        elif method is not None:
+            raise TypeError('Unsupported type of \"method\".')
+
+    def __write_affiliation(self, id: int, employee: Employee) -> None:
+        affiliation = employee.affiliation
+        if affiliation is not None:
+            self.__connection.execute(
+                'INSERT INTO affiliations (emp_id, member_id, dues) VALUES (?, ?, ?)',
+                (id, affiliation.member_id, affiliation.dues)
+            )
+            self.__connection.executemany(
+                'INSERT INTO service_charges (emp_id, date, amount) VALUES (?, ?, ?)',
+                ((id, service_charge.date.toordinal(), service_charge.amount)
+                 for service_charge in affiliation.service_charges_between(date.min, date.max))
+            )
+
+    def __read_documents(self, table: str, placeholders: str, ids: list) -> dict:
+        documents = {}
+        for emp_id, document_date, value in self.__connection.execute(
+            SELECT_DOCUMENTS.format(DOCUMENT_COLUMNS[table], table, placeholders), ids
+        ):
+            documents.setdefault(emp_id, []).append((date.fromordinal(document_date), value))
+        return documents
+
+    def __read_employee(self, row, documents: dict) -> Employee:
+        (id, name, address,
+         classification_kind, salary, hourly_rate, commission_rate, columnar,
+         schedule_kind, work_start_date,
+         method_kind, bank, account, method_address,
+         member_id, dues) = row
+        employee = Employee(id, name, address)
+
+        if classification_kind == 'salaried':
+            employee.classification = SalariedClassification(salary)
+        elif classification_kind == 'hourly':
+            classification = HourlyClassification(hourly_rate, columnar=bool(columnar))
+            for card_date, hours in documents['time_cards'].get(id, ()):
+                classification.add_time_card(TimeCard(card_date, hours))
+            employee.classification = classification
+        elif classification_kind == 'commissioned':
+            classification = CommissionedClassification(commission_rate, salary)
+            for receipt_date, amount in documents['sales_receipts'].get(id, ()):
+                classification.add_sales_receipt(SalesReceipt(receipt_date, amount))
+            employee.classification = classification
+
+        if schedule_kind == 'monthly':
+            employee.schedule = MonthlySchedule()
+        elif schedule_kind == 'weekly':
+            employee.schedule = WeeklySchedule()
+        elif schedule_kind == 'biweekly':
+            employee.schedule = BeweeklySchedule(date.fromordinal(work_start_date))
+
+        if method_kind == 'hold':
+            employee.method = HoldMethod()
+        elif method_kind == 'direct':
+            employee.method = DirectMethod(bank, account)
+        elif method_kind == 'mail':
+            employee.method = MailMethod(method_address)
+
+        if member_id is not None:
+            affiliation = UnionAffiliation(member_id, dues)
+            for charge_date, amount in documents['service_charges'].get(id, ()):
+                affiliation.add_service_charge(ServiceCharge(charge_date, amount))
+            employee.affiliation = affiliation
+        return employee
@@ -0,0 +1,82 @@
+from __future__ import annotations
+from importlib import import_module
+
+
+# Public name -> defining module; each module is imported on first attribute access
+_EXPORTS = {
+    'Employee': 'core.classes.employee',
+    'SalariedClassification': 'core.classes.paymentclassification',
+    'HourlyClassification': 'core.classes.paymentclassification',
+    'CommissionedClassification': 'core.classes.paymentclassification',
+    'MonthlySchedule': 'core.classes.paymentschedule',
+    'WeeklySchedule': 'core.classes.paymentschedule',
+    'BeweeklySchedule': 'core.classes.paymentschedule',
+    'HoldMethod': 'core.classes.paymentmethod',
+    'DirectMethod': 'core.classes.paymentmethod',
+    'MailMethod': 'core.classes.paymentmethod',
+    'UnionAffiliation': 'core.classes.affiliation',
+    'TimeCard': 'core.classes.doc',
+    'SalesReceipt': 'core.classes.doc',
+    'ServiceCharge': 'core.classes.doc',
+    'Paycheck': 'core.classes.doc',
+    'TransactionABC': 'core.classes.transaction',
+    'AddSalariedEmployeeTransaction': 'core.classes.transaction',
+    'AddHourlyEmployeeTransaction': 'core.classes.transaction',
+    'AddCommissionedEmployeeTransaction': 'core.classes.transaction',
+    'AddTimeCardTransaction': 'core.classes.transaction',
+    'AddSalesReceiptTransaction': 'core.classes.transaction',
+    'AddServiceChargeTransaction': 'core.classes.transaction',
+    'DeleteEmployeeTransaction': 'core.classes.transaction',
+    'ChangeNameTransaction': 'core.classes.transaction',
+    'ChangeAddressTransaction': 'core.classes.transaction',
+    'ChangeHourlyTransaction': 'core.classes.transaction',
+    'ChangeSalariedTransaction': 'core.classes.transaction',
+    'ChangeCommissionedTransaction': 'core.classes.transaction',
+    'ChangeDirectTransaction': 'core.classes.transaction',
+    'ChangeMailTransaction': 'core.classes.transaction',
+    'ChangeHoldransaction': 'core.classes.transaction',
+    'ChangeMemberTransaction': 'core.classes.transaction',
+    'ChangeUnaffiliatedTransaction': 'core.classes.transaction',
+    'PaydayTransaction': 'core.classes.transaction',
+    'CompactDocumentsTransaction': 'core.classes.transaction',
+    'DeleteDocumentsTransaction': 'core.classes.transaction',
+    'PayrollRangeRun': 'core.classes.transaction',
+    'TransactionBatch': 'core.classes.transaction',
+    'execute_transactions_async': 'core.classes.transaction',
+    'PayrollDatabaseABC': 'core.databasesabc',
+    'AsyncPayrollDatabaseABC': 'core.asyncdatabase',
+    'SqlitePayrollDatabase': 'core.sqlitedatabase',
+    'SnapshotPayrollDatabase': 'core.snapshot',
+    'write_snapshot': 'core.snapshot',
+    'ConcurrentPayrollDatabase': 'core.concurrentdatabase',
+    'PayrollSnapshot': 'core.concurrentdatabase',
+    'TransactionJournal': 'core.journal',
+    'open_database': 'core.journal',
+    'restore': 'core.journal',
+    'ingest': 'core.ingest',
+    'ingest_records': 'core.ingest',
+    'PaycheckSinkABC': 'core.paychecksink',
+    'CallbackPaycheckSink': 'core.paychecksink',
+    'PaycheckRegisterWriter': 'core.paychecksink',
+    'PaycheckArchive': 'core.paycheckarchive',
+    'PaycheckArchiveWriter': 'core.paycheckarchive',
+    'DirectDepositWriter': 'core.directdeposit',
+    'DocumentArchive': 'core.documentarchive',
+    'MetricsRegistry': 'core.metrics',
+    'InstrumentedDatabase': 'core.metrics',
+}
+
+__all__ = sorted(_EXPORTS)
+
+
+def __getattr__(name: str):
+    module_name = _EXPORTS.get(name, None)
+    if module_name is None:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+    value = getattr(import_module(module_name), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list:
+    return sorted(set(globals()) | set(__all__))
@@ -1,14 +1,20 @@
 import array
+import asyncio
+from copy import copy
+from core.asyncdatabase import AsyncPayrollDatabaseABC
 from core.classes.employee import Employee
 from core.databasesabc import PayrollDatabaseABC
+from core.paydateindex import PayDateIndex
 
 
 class PayrollDatabaseMock(PayrollDatabaseABC):
     __employees = {}
     __union_members = {}
+    __pay_date_index = PayDateIndex()
 
     def add_emplyee(self, id: int, employee: Employee) -> None:
         PayrollDatabaseMock.__employees[id] = employee
+        PayrollDatabaseMock.__pay_date_index.add(id, employee.schedule)
     
     def get_employee(self, id: int) -> Employee:
         return PayrollDatabaseMock.__employees.get(id, None)
@@ -16,6 +22,7 @@ class PayrollDatabaseMock(PayrollDatabaseABC):
     def delete_employee(self, id: int) -> None:
         if id in self.__employees:
             del self.__employees[id]
+            self.__pay_date_index.remove(id)
 
     def add_union_member(self, id: int, employee: Employee) -> None:
         PayrollDatabaseMock.__union_members[id] = employee
@@ -29,7 +36,76 @@ class PayrollDatabaseMock(PayrollDatabaseABC):
     
     def get_all_employee_ids(self) -> array:
         return self.__employees.keys()
+
+    def get_employee_ids_paid_on(self, pay_date) -> array:
+        return self.__pay_date_index.get_employee_ids(pay_date)
     
     def clear(self):
         self.__employees.clear()
-        self.__union_members.clear()
\ No newline at end of file
+        self.__union_members.clear()
+        self.__pay_date_index.clear()
+
+
+class AsyncPayrollDatabaseMock(AsyncPayrollDatabaseABC):
+    def __init__(self, latency: float = 0.0, copies: bool = False) -> None:
+        # With copies, reads hand out private copies like a remote store, so unsaved changes are lost
+        self.__latency = latency
+        self.__copies = copies
+        self.__employees = {}
+        self.__union_members = {}
+        self.__pay_date_index = PayDateIndex()
+        self.__in_flight = 0
+        self.__max_in_flight = 0
+
+    @property
+    def max_in_flight(self) -> int:
+        return self.__max_in_flight
+
+    async def add_emplyee(self, id: int, employee: Employee) -> None:
+        await self.__round_trip()
+        self.__employees[id] = employee
+        self.__pay_date_index.add(id, employee.schedule)
+
+    async def get_employee(self, id: int) -> Employee:
+        await self.__round_trip()
+        employee = self.__employees.get(id, None)
+        return copy(employee) if self.__copies and employee is not None else employee
+
+    async def delete_employee(self, id: int) -> None:
+        await self.__round_trip()
+        if id in self.__employees:
+            del self.__employees[id]
+            self.__pay_date_index.remove(id)
+
+    async def add_union_member(self, id: int, employee: Employee) -> None:
+        await self.__round_trip()
+        self.__union_members[id] = employee
+
+    async def get_union_member(self, id: int) -> Employee:
+        await self.__round_trip()
+        employee = self.__union_members.get(id, None)
+        if self.__copies and employee is not None:
+            employee = self.__employees.get(employee.emp_id, None)
+            return copy(employee) if employee is not None else None
+        return employee
+
+    async def delete_union_member(self, id: int) -> None:
+        await self.__round_trip()
+        if id in self.__union_members:
+            del self.__union_members[id]
+
+    async def get_all_employee_ids(self) -> array:
+        await self.__round_trip()
+        return list(self.__employees)
+
+    async def get_employee_ids_paid_on(self, pay_date) -> array:
+        await self.__round_trip()
+        return self.__pay_date_index.get_employee_ids(pay_date)
+
+    async def __round_trip(self) -> None:
+        self.__in_flight += 1
+        self.__max_in_flight = max(self.__max_in_flight, self.__in_flight)
+        try:
+            await asyncio.sleep(self.__latency)
+        finally:
+            self.__in_flight -= 1
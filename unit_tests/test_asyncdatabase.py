@@ -0,0 +1,101 @@
+import asyncio
+import inspect
+import unittest
+from datetime import date
+import core.classes.transaction as t
+from core.asyncdatabase import gather_limited
+from core.ingest import ingest_records_async
+from unit_tests.mocks import AsyncPayrollDatabaseMock
+
+
+class Test_TestAsyncTransactions(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.__db = AsyncPayrollDatabaseMock(latency=0.001)
+
+    async def test_transactions_execute_async(self):
+        await t.AddHourlyEmployeeTransaction(1, 'Bill', 'Home', self.__db, 15.24).execute_async()
+        await t.ChangeMemberTransaction(self.__db, 1, 7734, 9.42).execute_async()
+        pay_date = date(2001, 11, 30)
+        await t.AddServiceChargeTransaction(self.__db, pay_date, 19.42, 7734).execute_async()
+        await t.AddTimeCardTransaction(pay_date, 8.0, 1, self.__db).execute_async()
+        await t.ChangeNameTransaction(self.__db, 1, 'Bob').execute_async()
+        employee = await self.__db.get_employee(1)
+        self.assertEqual('Bob', employee.name)
+        self.assertIs(employee, await self.__db.get_union_member(7734))
+        with self.assertRaises(Exception):
+            await t.AddSalesReceiptTransaction(self.__db, pay_date, 150.00, 1).execute_async()
+
+        payday_t = t.PaydayTransaction(self.__db, pay_date)
+        await payday_t.execute_async()
+        paycheck = payday_t.get_paycheck(1)
+        self.assertEqual(8 * 15.24, paycheck.gross_pay)
+        self.assertEqual(9.42 + 19.42, paycheck.deductions)
+        self.assertEqual('Hold', paycheck.disposition)
+
+        await t.ChangeUnaffiliatedTransaction(self.__db, 1).execute_async()
+        await t.DeleteEmployeeTransaction(1, self.__db).execute_async()
+        self.assertIsNone(await self.__db.get_employee(1))
+        self.assertIsNone(await self.__db.get_union_member(7734))
+
+    async def test_concurrent_payday_and_ingest(self):
+        records = [
+            {'type': 'add_hourly', 'emp_id': emp_id, 'name': 'Bill', 'address': 'Home', 'hourly_rate': 15.25}
+            for emp_id in range(100, 150)
+        ] + [
+            {'type': 'time_card', 'emp_id': emp_id, 'date': f'2001-11-{day}', 'hours': 8.0}
+            for emp_id in range(100, 150) for day in (26, 27, 28)
+        ] + [{'type': 'time_card', 'emp_id': 999, 'date': '2001-11-26', 'hours': 8.0}]
+        report = await ingest_records_async(records, self.__db, chunk_size=1000, concurrency=20)
+        self.assertEqual(200, report.accepted)
+        self.assertEqual(1, report.rejected)
+        payday_t = t.PaydayTransaction(self.__db, date(2001, 11, 30))
+        await payday_t.execute_async(concurrency=20)
+        for emp_id in range(100, 150):
+            self.assertEqual(3 * 8 * 15.25, payday_t.get_paycheck(emp_id).gross_pay)
+        self.assertGreater(self.__db.max_in_flight, 1)
+        self.assertLessEqual(self.__db.max_in_flight, 20)
+
+    async def test_union_members_order_with_their_employee(self):
+        records = [
+            {'type': 'add_hourly', 'emp_id': 151, 'name': 'Bill', 'address': 'Home', 'hourly_rate': 15.25},
+            {'type': 'change_member', 'emp_id': 151, 'member_id': 77, 'dues': 9.42},
+            {'type': 'service_charge', 'member_id': 77, 'date': '2001-11-26', 'amount': 19.42},
+        ]
+        report = await ingest_records_async(records, self.__db, concurrency=20)
+        self.assertEqual(3, report.accepted)
+        self.assertEqual(0, report.rejected)
+
+        db = AsyncPayrollDatabaseMock(latency=0.001, copies=True)
+        await t.AddHourlyEmployeeTransaction(152, 'Bill', 'Home', db, 15.25).execute_async()
+        await t.ChangeMemberTransaction(db, 152, 78, 9.42).execute_async()
+        batch = t.TransactionBatch(db, [
+            t.AddTimeCardTransaction(date(2001, 11, 26), 8.0, 152, db),
+            t.AddServiceChargeTransaction(db, date(2001, 11, 26), 19.42, 78),
+            t.AddTimeCardTransaction(date(2001, 11, 27), 8.0, 152, db),
+        ])
+        await batch.execute_async(concurrency=20)
+        self.assertTrue(all(result.succeeded for result in batch.results))
+        employee = await db.get_employee(152)
+        self.assertEqual(2, len(employee.classification.time_cards_between(date(2001, 11, 26), date(2001, 11, 27))))
+        self.assertEqual(19.42, employee.affiliation.get_service_charge(date(2001, 11, 26)).amount)
+
+    async def test_gather_limited_closes_pending_coroutines(self):
+        async def fail():
+            raise ValueError()
+        async def identity(value):
+            await asyncio.sleep(0)
+            return value
+        coroutines = [fail()] + [identity(i) for i in range(10)]
+        with self.assertRaises(ValueError):
+            await gather_limited(coroutines, 2)
+        self.assertEqual(['CORO_CLOSED'] * 11, [inspect.getcoroutinestate(coroutine) for coroutine in coroutines])
+
+    async def test_gather_limited_keeps_order(self):
+        async def identity(value):
+            return value
+        self.assertEqual(list(range(10)), await gather_limited((identity(i) for i in range(10)), 3))
+        with self.assertRaises(ValueError):
+            await gather_limited([], 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,146 @@
+import threading
+import unittest
+from copy import copy
+from datetime import date, timedelta
+import core.classes.doc as doc
+import core.classes.transaction as t
+from core.concurrentdatabase import ConcurrentPayrollDatabase, WriteConflictError
+
+
+class Test_TestConcurrentPayrollDatabase(unittest.TestCase):
+    def setUp(self) -> None:
+        self.__db = ConcurrentPayrollDatabase()
+        t.AddSalariedEmployeeTransaction(1001, 'Bob', 'Home', self.__db, 1000.00).execute()
+        t.AddHourlyEmployeeTransaction(1002, 'Bill', 'Home', self.__db, 15.25).execute()
+        t.AddTimeCardTransaction(date(2005, 7, 29), 8.0, 1002, self.__db).execute()
+        t.ChangeMemberTransaction(self.__db, 1002, 7736, 9.42).execute()
+        super().setUp()
+
+    def test_snapshot_keeps_point_in_time_state(self):
+        with self.__db.snapshot() as snapshot:
+            t.AddTimeCardTransaction(date(2005, 7, 28), 9.0, 1002, self.__db).execute()
+            t.ChangeNameTransaction(self.__db, 1001, 'Robert').execute()
+            t.DeleteEmployeeTransaction(1001, self.__db).execute()
+            t.AddSalariedEmployeeTransaction(1003, 'Tom', 'Home', self.__db, 2000.00).execute()
+
+            self.assertEqual([1001, 1002], sorted(snapshot.get_all_employee_ids()))
+            self.assertEqual('Bob', snapshot.get_employee(1001).name)
+            self.assertIsNone(snapshot.get_employee(1003))
+            self.assertIsNone(snapshot.get_employee(1002).classification.get_time_card(date(2005, 7, 28)))
+            self.assertEqual(1002, snapshot.get_union_member(7736).emp_id)
+            self.assertEqual([1002], list(snapshot.get_employee_ids_paid_on(date(2005, 7, 29))))
+
+            self.assertIsNone(self.__db.get_employee(1001))
+            self.assertEqual(9.0, self.__db.get_employee(1002).classification.get_time_card(date(2005, 7, 28)).hours)
+            self.assertEqual([1002, 1003], sorted(self.__db.get_all_employee_ids()))
+
+            payday_t = t.PaydayTransaction(snapshot, date(2005, 7, 29))
+            payday_t.execute()
+            self.assertEqual(8.0 * 15.25 - 9.42, payday_t.get_paycheck(1002).net_pay)
+
+    def test_snapshot_is_read_only(self):
+        with self.__db.snapshot() as snapshot:
+            with self.assertRaises(Exception):
+                t.ChangeNameTransaction(snapshot, 1001, 'Robert').execute()
+            with self.assertRaises(Exception):
+                snapshot.delete_union_member(7736)
+        self.assertEqual('Bob', self.__db.get_employee(1001).name)
+
+    def test_released_versions_are_dropped(self):
+        snapshot = self.__db.snapshot()
+        t.ChangeNameTransaction(self.__db, 1001, 'Robert').execute()
+        t.ChangeNameTransaction(self.__db, 1001, 'Rob').execute()
+        self.assertEqual('Bob', snapshot.get_employee(1001).name)
+        snapshot.close()
+        with self.__db.snapshot() as snapshot:
+            self.assertEqual('Rob', snapshot.get_employee(1001).name)
+            self.assertIsNone(self.__db._get_employee_at(1001, 0))
+
+    def test_ingest_runs_during_payday(self):
+        snapshot = self.__db.snapshot()
+        expected_t = t.PaydayTransaction(snapshot, date(2005, 7, 29))
+        expected_t.execute()
+
+        def ingest(first_day: int) -> None:
+            for day in range(first_day, first_day + 50):
+                self.__db.execute(t.AddTimeCardTransaction(date(2005, 1, 1) + timedelta(days=day), 8.0, 1002, self.__db))
+
+        threads = [threading.Thread(target=ingest, args=(first_day,)) for first_day in range(0, 200, 50)]
+        for thread in threads:
+            thread.start()
+        for _ in range(20):
+            payday_t = t.PaydayTransaction(snapshot, date(2005, 7, 29))
+            payday_t.execute()
+            self.assertEqual(expected_t.get_paycheck(1002).net_pay, payday_t.get_paycheck(1002).net_pay)
+        for thread in threads:
+            thread.join()
+        snapshot.close()
+
+        # Serialized writers lose no time cards even though they read and write back the same employee
+        classification = self.__db.get_employee(1002).classification
+        self.assertEqual(4 * 50, len(classification.time_cards_between(date(2005, 1, 1), date(2005, 7, 19))))
+
+    def test_direct_writers_lose_no_time_cards(self):
+        def ingest(first_day: int) -> None:
+            for day in range(first_day, first_day + 300):
+                while True:
+                    try:
+                        t.AddTimeCardTransaction(date(2000, 1, 1) + timedelta(days=day), 8.0, 1002, self.__db).execute()
+                        break
+                    except WriteConflictError:
+                        pass
+
+        threads = [threading.Thread(target=ingest, args=(first_day,)) for first_day in range(0, 1200, 300)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        classification = self.__db.get_employee(1002).classification
+        self.assertEqual(4 * 300, len(classification.time_cards_between(date(2000, 1, 1), date(2003, 12, 31))))
+
+    def test_stale_write_is_rejected(self):
+        first = self.__db.get_employee(1001)
+        writer = threading.Thread(target=t.ChangeNameTransaction(self.__db, 1001, 'Robert').execute)
+        writer.start()
+        writer.join()
+        first.name = 'Rob'
+        with self.assertRaises(WriteConflictError):
+            self.__db.add_emplyee(1001, first)
+        self.assertEqual('Robert', self.__db.get_employee(1001).name)
+        # A blind write after the refusal is not refused again
+        self.__db.add_emplyee(1001, first)
+        self.assertEqual('Rob', self.__db.get_employee(1001).name)
+
+    def test_deleted_employee_can_be_added_again(self):
+        t.DeleteEmployeeTransaction(1001, self.__db).execute()
+        t.AddSalariedEmployeeTransaction(1001, 'Tom', 'Home', self.__db, 2000.00).execute()
+        self.assertEqual('Tom', self.__db.get_employee(1001).name)
+
+    def test_versions_share_documents_without_seeing_later_ones(self):
+        snapshot = self.__db.snapshot()
+        t.AddTimeCardTransaction(date(2005, 7, 28), 9.0, 1002, self.__db).execute()
+        first = copy(self.__db.get_employee(1002).classification)
+        second = copy(first)
+        first.add_time_card(doc.TimeCard(date(2005, 7, 30), 1.0))
+        second.add_time_card(doc.TimeCard(date(2005, 7, 30), 2.0))
+        second.add_time_card(doc.TimeCard(date(2005, 7, 27), 3.0))
+        self.assertEqual(1.0, first.get_time_card(date(2005, 7, 30)).hours)
+        self.assertIsNone(first.get_time_card(date(2005, 7, 27)))
+        self.assertEqual(2.0, second.get_time_card(date(2005, 7, 30)).hours)
+        self.assertEqual(3, len(first.time_cards_between(date(2005, 7, 1), date(2005, 7, 31))))
+        self.assertEqual(4, len(second.time_cards_between(date(2005, 7, 1), date(2005, 7, 31))))
+
+        committed = self.__db.get_employee(1002).classification
+        self.assertIsNone(committed.get_time_card(date(2005, 7, 30)))
+        self.assertEqual(2, len(committed.time_cards_between(date(2005, 7, 1), date(2005, 7, 31))))
+        old = snapshot.get_employee(1002).classification
+        self.assertEqual([date(2005, 7, 29)], [card.date for card in old.time_cards_between(date(2005, 7, 1), date(2005, 7, 31))])
+        snapshot.close()
+
+        first.compact(date(2005, 7, 29))
+        self.assertEqual(2, len(first.time_cards_between(date(2005, 7, 1), date(2005, 7, 31))))
+        self.assertEqual(2, len(committed.time_cards_between(date(2005, 7, 1), date(2005, 7, 31))))
+        self.assertEqual(9.0, committed.get_time_card(date(2005, 7, 28)).hours)
+
+if __name__ == '__main__':
+    unittest.main()
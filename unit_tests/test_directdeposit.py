@@ -0,0 +1,88 @@
+import os
+import tempfile
+import unittest
+from datetime import date
+import core.classes.transaction as t
+from core.directdeposit import DirectDepositWriter
+from unit_tests.mocks import PayrollDatabaseMock
+
+
+class Test_TestDirectDeposit(unittest.TestCase):
+    def setUp(self) -> None:
+        self.__db = PayrollDatabaseMock()
+        self.__directory = tempfile.TemporaryDirectory()
+        self.__pay_date = date(2001, 11, 30)
+        for emp_id in range(401, 406):
+            t.AddSalariedEmployeeTransaction(emp_id, f'Bob {emp_id}', 'Home', self.__db, 1000.00 + emp_id).execute()
+            bank = '091000019' if emp_id % 2 else '121000248'
+            t.ChangeDirectTransaction(self.__db, emp_id, bank, f'ACCOUNT-{emp_id}').execute()
+        t.AddSalariedEmployeeTransaction(406, 'Tom', 'Home', self.__db, 1000.00).execute()
+        super().setUp()
+
+    def tearDown(self):
+        self.__db.clear()
+        self.__directory.cleanup()
+
+    def test_write_bank_files(self):
+        contents = []
+        for workers in (1, 2):
+            directory = os.path.join(self.__directory.name, str(workers))
+            os.mkdir(directory)
+            writer = DirectDepositWriter(directory, origin='021000021', company_id='1234567890', workers=workers)
+            payday_t = t.PaydayTransaction(self.__db, self.__pay_date, sink=writer, keep_paychecks=True)
+            payday_t.execute()
+            self.assertEqual('Direct', payday_t.get_paycheck(401).disposition)
+            self.assertEqual('Hold', payday_t.get_paycheck(406).disposition)
+            self.assertEqual(5, writer.deposit_count)
+            files = {file.bank: file for file in writer.write_files()}
+            self.assertEqual(0, writer.deposit_count)
+            self.assertEqual({'091000019': 3, '121000248': 2}, {bank: file.entry_count for bank, file in files.items()})
+            self.assertEqual(100 * (1401 + 1403 + 1405), files['091000019'].total_credit)
+            self.assertEqual(9100001 * 3, files['091000019'].entry_hash)
+            with open(files['091000019'].path, encoding='ascii') as file:
+                records = file.read().splitlines()
+            self.assertEqual(10, len(records))
+            self.assertTrue(all(len(record) == 94 for record in records))
+            self.assertEqual(['1', '5', '6', '6', '6', '8', '9', '9', '9', '9'], [record[0] for record in records])
+            self.assertEqual('ACCOUNT-401', records[2][12:29].rstrip())
+            self.assertEqual('0000140100', records[2][29:39])
+            self.assertEqual('401', records[2][39:54].rstrip())
+            self.assertEqual('Bob 401', records[2][54:76].rstrip())
+            self.assertEqual('000000420900', records[6][-51:-39])
+            contents.append(records)
+        self.assertEqual(contents[0], contents[1])
+        with self.assertRaises(ValueError):
+            DirectDepositWriter(self.__directory.name, workers=0)
+
+    def test_overflowing_fields_are_rejected(self):
+        writer = DirectDepositWriter(self.__directory.name)
+        t.ChangeSalariedTransaction(self.__db, 401, 1.0e9).execute()
+        with self.assertRaises(ValueError):
+            t.PaydayTransaction(self.__db, self.__pay_date, sink=writer).execute()
+
+        writer = DirectDepositWriter(self.__directory.name)
+        t.ChangeSalariedTransaction(self.__db, 401, 1000.00).execute()
+        t.ChangeDirectTransaction(self.__db, 402, '121000248', 'A' * 18).execute()
+        with self.assertRaises(ValueError):
+            t.PaydayTransaction(self.__db, self.__pay_date, sink=writer).execute()
+
+    def test_invalid_deposits_are_not_dropped(self):
+        for bank in ('First Bank', '121000249', '12100024'):
+            writer = DirectDepositWriter(self.__directory.name)
+            t.ChangeDirectTransaction(self.__db, 402, bank, 'ACCOUNT-402').execute()
+            with self.assertRaises(ValueError):
+                t.PaydayTransaction(self.__db, self.__pay_date, sink=writer).execute()
+
+        t.ChangeDirectTransaction(self.__db, 402, '121000248', 'ACCOUNT-402').execute()
+        t.AddHourlyEmployeeTransaction(407, 'Bill', 'Home', self.__db, 15.25).execute()
+        t.ChangeDirectTransaction(self.__db, 407, '121000248', 'ACCOUNT-407').execute()
+        writer = DirectDepositWriter(self.__directory.name)
+        payday_t = t.PaydayTransaction(self.__db, self.__pay_date, sink=writer, keep_paychecks=True)
+        payday_t.execute()
+        self.assertEqual(5, writer.deposit_count)
+        self.assertEqual([(407, payday_t.get_paycheck(407))], writer.rejected)
+        writer.write_files()
+        self.assertEqual([], writer.rejected)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,101 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+from datetime import date, timedelta
+import core.classes.transaction as t
+from core.documentarchive import DocumentArchive
+from core.sqlitedatabase import SqlitePayrollDatabase
+from unit_tests.mocks import PayrollDatabaseMock
+
+
+class Test_TestDocumentArchive(unittest.TestCase):
+    def setUp(self) -> None:
+        self.__db = PayrollDatabaseMock()
+        self.__directory = tempfile.TemporaryDirectory()
+        self.__archive = DocumentArchive(os.path.join(self.__directory.name, 'archive.db'))
+        super().setUp()
+
+    def tearDown(self):
+        self.__db.clear()
+        self.__archive.close()
+        self.__directory.cleanup()
+
+    def __add_documents(self, db):
+        t.AddHourlyEmployeeTransaction(701, 'Bill', 'Home', db, 15.25).execute()
+        t.ChangeMemberTransaction(db, 701, 7742, 9.42).execute()
+        t.AddCommissionedEmployeeTransaction(702, 'Sam', 'Home', db, 0.1, 1500.00, date(2001, 11, 3)).execute()
+        t.AddSalariedEmployeeTransaction(703, 'Bob', 'Home', db, 1000.00).execute()
+        for day in range(1, 31):
+            document_date = date(2001, 11, day)
+            t.AddTimeCardTransaction(document_date, 8.0, 701, db).execute()
+            t.AddSalesReceiptTransaction(db, document_date, 100.00, 702).execute()
+            if day % 5 == 0:
+                t.AddServiceChargeTransaction(db, document_date, 19.42, 7742).execute()
+
+    def test_compaction_after_payday(self):
+        self.__add_documents(self.__db)
+        pay_date = date(2001, 11, 30)
+        payday_t = t.PaydayTransaction(self.__db, pay_date, archive=self.__archive)
+        payday_t.execute()
+        self.assertEqual(7 * 8 * 15.25, payday_t.get_paycheck(701).gross_pay)
+        self.assertEqual(1500.00 + 14 * 100.00 * 0.1, payday_t.get_paycheck(702).gross_pay)
+        self.assertEqual({'time_cards': 23, 'sales_receipts': 16, 'service_charges': 4}, self.__archive.count())
+
+        employee = self.__db.get_employee(701)
+        self.assertEqual([date(2001, 11, 24) + timedelta(days=day) for day in range(7)],
+                         [time_card.date for time_card in employee.classification.time_cards_between(date.min, date.max)])
+        self.assertIsNone(employee.classification.get_time_card(date(2001, 11, 23)))
+        self.assertEqual(2, len(employee.affiliation.service_charges_between(date.min, date.max)))
+        self.assertEqual(14, len(self.__db.get_employee(702).classification.sales_receipts_between(date.min, date.max)))
+
+        archived = self.__archive.time_cards(701, date(2001, 11, 10), date(2001, 11, 16))
+        self.assertEqual([date(2001, 11, day) for day in range(10, 17)], [time_card.date for time_card in archived])
+        self.assertEqual(8.0, archived[0].hours)
+        self.assertEqual(100.00, self.__archive.sales_receipts(702)[0].amount)
+        self.assertEqual([19.42] * 4, [charge.amount for charge in self.__archive.service_charges(701)])
+
+        rerun_t = t.PaydayTransaction(self.__db, pay_date, archive=self.__archive)
+        rerun_t.execute()
+        for emp_id in (701, 702, 703):
+            self.assertEqual(payday_t.get_paycheck(emp_id).net_pay, rerun_t.get_paycheck(emp_id).net_pay)
+        self.assertEqual({'time_cards': 23, 'sales_receipts': 16, 'service_charges': 4}, self.__archive.count())
+
+    def test_compaction_is_persisted(self):
+        path = os.path.join(self.__directory.name, 'payroll.db')
+        db = SqlitePayrollDatabase(path)
+        connection = sqlite3.connect(path)
+        try:
+            self.__add_documents(db)
+            # Only the moved documents are deleted; the employees themselves are not rewritten
+            with connection:
+                connection.execute('CREATE TABLE deleted_rows (name TEXT)')
+                for table in ('employees', 'classifications', 'time_cards', 'sales_receipts', 'service_charges'):
+                    connection.execute(
+                        f'CREATE TRIGGER count_deleted_{table} AFTER DELETE ON {table} '
+                        f"BEGIN INSERT INTO deleted_rows VALUES ('{table}'); END"
+                    )
+            compact_t = t.CompactDocumentsTransaction(db, date(2001, 11, 30), self.__archive)
+            compact_t.execute()
+            self.assertEqual(43, compact_t.compacted)
+            deleted = dict(connection.execute('SELECT name, count(*) FROM deleted_rows GROUP BY name').fetchall())
+            self.assertEqual({'time_cards': 23, 'sales_receipts': 16, 'service_charges': 4}, deleted)
+
+            compact_t = t.CompactDocumentsTransaction(db, date(2001, 11, 30), self.__archive)
+            compact_t.execute()
+            self.assertEqual(0, compact_t.compacted)
+            self.assertEqual(43, connection.execute('SELECT count(*) FROM deleted_rows').fetchone()[0])
+        finally:
+            connection.close()
+            db.close()
+        db = SqlitePayrollDatabase(path)
+        try:
+            employee = db.get_employee(701)
+            self.assertEqual(7, len(employee.classification.time_cards_between(date.min, date.max)))
+            self.assertEqual(2, len(employee.affiliation.service_charges_between(date.min, date.max)))
+            self.assertEqual(14, len(db.get_employee(702).classification.sales_receipts_between(date.min, date.max)))
+        finally:
+            db.close()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Best of several cold runs, as a multiple of the imports the bare interpreter makes at startup so the budget holds on
+# slow machines too; the transaction module took over thirteen times as long before the import path was trimmed
+IMPORT_BUDGET_RATIO = 6
+IMPORT_RUNS = 5
+HEAVY_MODULES = ('tkinter', 'tracemalloc', 'multiprocessing', 'concurrent.futures', 'asyncio', 'sqlite3', 're', 'typing')
+
+
+def run_python(*args, env: dict = None) -> str:
+    return subprocess.run([sys.executable, *args], capture_output=True, text=True, check=True, cwd=ROOT, env=env)
+
+
+def import_times_ms(statement: str, env: dict = None) -> dict:
+    # Cumulative time of each top-level import reported by -X importtime
+    times = {}
+    for line in run_python('-X', 'importtime', '-c', statement, env=env).stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        _, cumulative, name = line.split('|')
+        if len(name) - len(name.lstrip()) == 1:
+            times[name.strip()] = int(cumulative) / 1000
+    return times
+
+
+class Test_TestImports(unittest.TestCase):
+    def test_facade_loads_modules_lazily(self):
+        completed = run_python('-c', (
+            'import sys, payroll\n'
+            'print(sorted(name for name in sys.modules if name.startswith("core")))\n'
+            'payroll.PaydayTransaction\n'
+            'print("core.classes.transaction" in sys.modules, "core.sqlitedatabase" in sys.modules)'
+        ))
+        self.assertEqual(['[]', 'True False'], completed.stdout.split('\n')[:2])
+
+    def test_hot_path_skips_heavy_modules(self):
+        completed = run_python('-c', (
+            'import sys, payroll\n'
+            'payroll.PaydayTransaction, payroll.Employee, payroll.PayrollDatabaseABC\n'
+            f'print([name for name in {HEAVY_MODULES!r} if name in sys.modules])'
+        ))
+        self.assertEqual('[]', completed.stdout.strip())
+
+    def test_import_time_budget(self):
+        with tempfile.TemporaryDirectory() as cache:
+            # A private bytecode cache, filled by the first run, so neither side pays for compiling its sources
+            env = {name: value for name, value in os.environ.items() if name != 'PYTHONDONTWRITEBYTECODE'}
+            env['PYTHONPYCACHEPREFIX'] = cache
+            run_python('-c', 'import core.classes.transaction', env=env)
+            startup_modules = set(import_times_ms('pass', env))
+            runs = [import_times_ms('import core.classes.transaction', env) for _ in range(IMPORT_RUNS)]
+        startup = transaction = None
+        for times in runs:
+            # Both sides come from the same interpreter, so they see the same machine load
+            bare = sum(time for name, time in times.items() if name in startup_modules)
+            imported = sum(time for name, time in times.items() if name not in startup_modules)
+            startup = bare if startup is None else min(startup, bare)
+            transaction = imported if transaction is None else min(transaction, imported)
+        self.assertLess(transaction, IMPORT_BUDGET_RATIO * startup)
+
+if __name__ == '__main__':
+    unittest.main()
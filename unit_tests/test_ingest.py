@@ -0,0 +1,74 @@
+import json
+import os
+import tempfile
+import unittest
+from datetime import date
+from core.ingest import ingest, ingest_records
+from unit_tests.mocks import PayrollDatabaseMock
+
+
+class Test_TestIngest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.__db = PayrollDatabaseMock()
+        self.__directory = tempfile.TemporaryDirectory()
+        super().setUp()
+
+    def tearDown(self):
+        self.__db.clear()
+        self.__directory.cleanup()
+
+    def test_ingest_csv(self):
+        path = os.path.join(self.__directory.name, 'clock.csv')
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write('type,emp_id,name,address,hourly_rate,date,hours\n')
+            file.write('add_hourly,101,Bill,Home,15.25,,\n')
+            file.write('time_card,101,,,,2001-11-09,8.0\n')
+            file.write('time_card,101,,,,2001-11-09,4.0\n')
+            file.write('time_card,102,,,,2001-11-09,4.0\n')
+            file.write('time_card,101,,,,2001-11-08,not a number\n')
+        error_report_path = os.path.join(self.__directory.name, 'errors.jsonl')
+        report = ingest(path, self.__db, chunk_size=2, error_report_path=error_report_path)
+        self.assertEqual(5, report.rows)
+        self.assertEqual(2, report.accepted)
+        self.assertEqual(3, report.rejected)
+        self.assertGreater(report.rows_per_second, 0)
+        self.assertEqual(8.0, self.__db.get_employee(101).classification.get_time_card(date(2001, 11, 9)).hours)
+        with open(error_report_path, encoding='utf-8') as file:
+            errors = [json.loads(line) for line in file]
+        self.assertEqual([3, 4, 5], [error['row'] for error in errors])
+        self.assertEqual('Employee not found', errors[1]['message'])
+        self.assertEqual('ValueError', errors[2]['error'])
+
+    def test_ingest_jsonl(self):
+        path = os.path.join(self.__directory.name, 'pos.jsonl')
+        records = [
+            {'type': 'add_commissioned', 'emp_id': 103, 'name': 'Sam', 'address': 'Home',
+             'commission_rate': 0.1, 'salary': 1500.0, 'work_start_date': '2001-11-17'},
+            {'type': 'add_salaried', 'emp_id': 104, 'name': 'Bob', 'address': 'Home', 'salary': 1000.0},
+            {'type': 'sales_receipt', 'emp_id': 103, 'date': '2001-11-20', 'amount': 310.0},
+            {'type': 'sales_receipt', 'emp_id': 104, 'date': '2001-11-20', 'amount': 310.0},
+            {'type': 'change_member', 'emp_id': 104, 'member_id': 7740, 'dues': 9.42},
+            {'type': 'service_charge', 'member_id': 7740, 'date': '2001-11-20', 'amount': 19.42},
+            {'type': 'bonus', 'emp_id': 104},
+            {'type': 'change_name', 'emp_id': 104},
+        ]
+        with open(path, 'w', encoding='utf-8') as file:
+            for record in records:
+                file.write(json.dumps(record) + '\n')
+            file.write('{not json\n')
+        report = ingest(path, self.__db)
+        self.assertEqual(9, report.rows)
+        self.assertEqual(5, report.accepted)
+        self.assertEqual(310.0, self.__db.get_employee(103).classification.get_sales_receipt(date(2001, 11, 20)).amount)
+        self.assertEqual(19.42, self.__db.get_union_member(7740).affiliation.get_service_charge(date(2001, 11, 20)).amount)
+
+    def test_ingest_records_from_generator(self):
+        records = ({'type': 'add_hourly', 'emp_id': 200 + i, 'name': 'Bill', 'address': 'Home', 'hourly_rate': 15.0}
+                   for i in range(25))
+        report = ingest_records(records, self.__db, chunk_size=10)
+        self.assertEqual(25, report.accepted)
+        self.assertEqual(0, report.rejected)
+        self.assertIsNotNone(self.__db.get_employee(224))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,220 @@
+import os
+import tempfile
+import threading
+import time
+import unittest
+from datetime import date
+from unittest import mock
+import core.classes.transaction as t
+from core.documentarchive import DocumentArchive
+from core.journal import TransactionJournal, open_database, restore, SEGMENT_NAME
+from core.sqlitedatabase import SqlitePayrollDatabase
+from unit_tests.mocks import PayrollDatabaseMock
+
+
+class FailingPayrollDatabaseMock(PayrollDatabaseMock):
+    def __init__(self, path: str) -> None:
+        self.__path = path
+        self.journaled_sizes = []
+        self.fail = False
+
+    def add_time_card(self, id, employee, time_card):
+        self.journaled_sizes.append(os.path.getsize(self.__path))
+        if self.fail:
+            raise OSError('disk full')
+        super().add_time_card(id, employee, time_card)
+
+
+class BlockingPayrollDatabaseMock(PayrollDatabaseMock):
+    def __init__(self, fail: bool) -> None:
+        self.__fail = fail
+        self.blocked = False
+        self.entered = threading.Event()
+        self.release = threading.Event()
+
+    def get_employee(self, id):
+        if self.blocked:
+            # Only the first read blocks, before the transaction has changed anything
+            self.blocked = False
+            self.entered.set()
+            self.release.wait(5)
+        return super().get_employee(id)
+
+    def add_time_card(self, id, employee, time_card):
+        if self.__fail:
+            raise OSError('disk full')
+        super().add_time_card(id, employee, time_card)
+
+
+class Test_TestTransactionJournal(unittest.TestCase):
+    def setUp(self) -> None:
+        self.__db = PayrollDatabaseMock()
+        self.__directory = tempfile.TemporaryDirectory()
+        super().setUp()
+
+    def tearDown(self):
+        self.__db.clear()
+        self.__directory.cleanup()
+
+    def __restored(self) -> SqlitePayrollDatabase:
+        db = SqlitePayrollDatabase()
+        self.__replayed = restore(self.__directory.name, db)
+        return db
+
+    def test_replay_journal_and_snapshot(self):
+        with TransactionJournal(self.__directory.name, self.__db, group_size=3, group_interval=60) as journal:
+            journal.execute(t.AddHourlyEmployeeTransaction(801, 'Bill', 'Home', self.__db, 15.25))
+            journal.execute(t.ChangeMemberTransaction(self.__db, 801, 7743, 9.42))
+            with self.assertRaises(Exception):
+                journal.execute(t.AddTimeCardTransaction(date(2001, 11, 30), 8.0, 899, self.__db))
+            journal.execute(t.AddTimeCardTransaction(date(2001, 11, 29), 8.0, 801, self.__db))
+            journal.execute(t.PaydayTransaction(self.__db, date(2001, 11, 30)))
+            self.assertEqual(8.0, self.__restored().get_employee(801).classification.get_time_card(date(2001, 11, 29)).hours)
+
+            journal.snapshot()
+            batch = t.TransactionBatch(self.__db)
+            batch.add(t.AddServiceChargeTransaction(self.__db, date(2001, 11, 29), 19.42, 7743))
+            # Hourly employees reject sales receipts, so only succeeded transactions are journaled
+            batch.add(t.AddSalesReceiptTransaction(self.__db, date(2001, 11, 29), 100.00, 801))
+            batch.add(t.AddSalariedEmployeeTransaction(802, 'Bob', 'Home', self.__db, 1000.00))
+            journal.execute(batch)
+            journal.execute(t.ChangeNameTransaction(self.__db, 801, 'Tom'))
+
+        db = self.__restored()
+        self.assertEqual(3, self.__replayed)
+        employee = db.get_employee(801)
+        self.assertEqual('Tom', employee.name)
+        self.assertEqual(8.0, employee.classification.get_time_card(date(2001, 11, 29)).hours)
+        self.assertEqual(19.42, db.get_union_member(7743).affiliation.get_service_charge(date(2001, 11, 29)).amount)
+        self.assertEqual(1000.00, db.get_employee(802).classification.salary)
+
+        payday_t = t.PaydayTransaction(db, date(2001, 11, 30))
+        payday_t.execute()
+        self.assertEqual(8 * 15.25 - (9.42 + 19.42), payday_t.get_paycheck(801).net_pay)
+
+        journal = TransactionJournal(self.__directory.name, self.__db)
+        journal.prune()
+        journal.close()
+        self.assertFalse(os.path.exists(os.path.join(self.__directory.name, SEGMENT_NAME.format(0))))
+        self.assertEqual('Tom', self.__restored().get_employee(801).name)
+
+        with open_database(self.__directory.name) as lazy_db:
+            self.assertEqual(2, lazy_db.materialized)
+            self.assertEqual(19.42, lazy_db.get_union_member(7743).affiliation.get_service_charge(date(2001, 11, 29)).amount)
+            self.assertEqual([801, 802], sorted(lazy_db.get_all_employee_ids()))
+
+    def test_transactions_are_logged_before_they_are_applied(self):
+        db = FailingPayrollDatabaseMock(os.path.join(self.__directory.name, SEGMENT_NAME.format(0)))
+        with TransactionJournal(self.__directory.name, db, group_size=1) as journal:
+            journal.execute(t.AddHourlyEmployeeTransaction(804, 'Bill', 'Home', db, 15.25))
+            size = os.path.getsize(os.path.join(self.__directory.name, SEGMENT_NAME.format(0)))
+            journal.execute(t.AddTimeCardTransaction(date(2001, 11, 29), 8.0, 804, db))
+            self.assertGreater(db.journaled_sizes[0], size)
+            # A transaction that failed when applied stays failed on replay even if it would succeed then
+            db.fail = True
+            with self.assertRaises(OSError):
+                journal.execute(t.AddTimeCardTransaction(date(2001, 11, 30), 8.0, 804, db))
+            db.fail = False
+            batch = t.TransactionBatch(db, [
+                t.AddTimeCardTransaction(date(2001, 11, 28), 8.0, 804, db),
+                t.AddSalesReceiptTransaction(db, date(2001, 11, 28), 100.00, 804),
+            ])
+            journal.execute(batch)
+        restored = self.__restored()
+        self.assertEqual(3, self.__replayed)
+        classification = restored.get_employee(804).classification
+        self.assertEqual([date(2001, 11, 28), date(2001, 11, 29)],
+                         [time_card.date for time_card in classification.time_cards_between(date.min, date.max)])
+
+    def test_group_is_synced_without_another_execute(self):
+        with mock.patch('core.journal.os.fsync', wraps=os.fsync) as fsync:
+            with TransactionJournal(self.__directory.name, self.__db, group_size=100, group_interval=0.01) as journal:
+                journal.execute(t.AddSalariedEmployeeTransaction(805, 'Bob', 'Home', self.__db, 1000.00))
+                deadline = time.monotonic() + 5.0
+                while not fsync.called and time.monotonic() < deadline:
+                    time.sleep(0.005)
+                self.assertEqual(1, fsync.call_count)
+            self.assertEqual(1, fsync.call_count)
+        with self.assertRaises(ValueError):
+            TransactionJournal(self.__directory.name, self.__db, group_interval=-1)
+
+    def __run_while_blocked(self, db: BlockingPayrollDatabaseMock, journal: TransactionJournal, blocked, other) -> None:
+        def execute_blocked() -> None:
+            try:
+                journal.execute(blocked)
+            except OSError:
+                pass
+
+        db.blocked = True
+        threads = [threading.Thread(target=execute_blocked), threading.Thread(target=other)]
+        threads[0].start()
+        self.assertTrue(db.entered.wait(5))
+        threads[1].start()
+        time.sleep(0.05)
+        db.release.set()
+        for thread in threads:
+            thread.join()
+
+    def test_outcome_belongs_to_its_own_transaction(self):
+        db = BlockingPayrollDatabaseMock(fail=True)
+        with TransactionJournal(self.__directory.name, db, group_size=1) as journal:
+            journal.execute(t.AddHourlyEmployeeTransaction(806, 'Bill', 'Home', db, 15.25))
+            self.__run_while_blocked(db, journal, t.AddTimeCardTransaction(date(2001, 11, 30), 8.0, 806, db),
+                                     lambda: journal.execute(t.ChangeNameTransaction(db, 806, 'Tom')))
+        restored = self.__restored()
+        self.assertEqual(2, self.__replayed)
+        self.assertEqual('Tom', restored.get_employee(806).name)
+        self.assertIsNone(restored.get_employee(806).classification.get_time_card(date(2001, 11, 30)))
+
+    def test_snapshot_waits_for_applying_transactions(self):
+        db = BlockingPayrollDatabaseMock(fail=False)
+        with TransactionJournal(self.__directory.name, db, group_size=1) as journal:
+            journal.execute(t.AddHourlyEmployeeTransaction(807, 'Bill', 'Home', db, 15.25))
+            self.__run_while_blocked(db, journal, t.AddTimeCardTransaction(date(2001, 11, 30), 8.0, 807, db), journal.snapshot)
+            journal.prune()
+        self.assertEqual(8.0, self.__restored().get_employee(807).classification.get_time_card(date(2001, 11, 30)).hours)
+
+    def test_replay_raises_unrecorded_failures(self):
+        with TransactionJournal(self.__directory.name, self.__db, group_size=1) as journal:
+            # Added behind the journal's back, so replaying the time card fails where it succeeded
+            t.AddHourlyEmployeeTransaction(808, 'Bill', 'Home', self.__db, 15.25).execute()
+            journal.execute(t.AddTimeCardTransaction(date(2001, 11, 30), 8.0, 808, self.__db))
+        # As the newest frame it may have failed just before the process stopped
+        self.__restored()
+        self.assertEqual(0, self.__replayed)
+        with TransactionJournal(self.__directory.name, self.__db, group_size=1) as journal:
+            journal.execute(t.AddSalariedEmployeeTransaction(809, 'Bob', 'Home', self.__db, 1000.00))
+        with self.assertRaises(Exception):
+            self.__restored()
+
+    def test_compaction_is_replayed(self):
+        with TransactionJournal(self.__directory.name, self.__db, group_size=100) as journal:
+            journal.execute(t.AddHourlyEmployeeTransaction(811, 'Bill', 'Home', self.__db, 15.25))
+            journal.execute(t.ChangeMemberTransaction(self.__db, 811, 7744, 9.42))
+            for day in range(1, 31):
+                journal.execute(t.AddTimeCardTransaction(date(2001, 11, day), 8.0, 811, self.__db))
+                journal.execute(t.AddServiceChargeTransaction(self.__db, date(2001, 11, day), 1.0, 7744))
+            archive = DocumentArchive(os.path.join(self.__directory.name, 'archive.db'))
+            try:
+                journal.execute(t.PaydayTransaction(self.__db, date(2001, 11, 30), archive=archive))
+                self.assertEqual({'time_cards': 23, 'sales_receipts': 0, 'service_charges': 23}, archive.count())
+            finally:
+                archive.close()
+        employee = self.__restored().get_employee(811)
+        self.assertEqual(7, len(employee.classification.time_cards_between(date.min, date.max)))
+        self.assertEqual(7, len(employee.affiliation.service_charges_between(date.min, date.max)))
+
+    def test_torn_frame_is_dropped(self):
+        with TransactionJournal(self.__directory.name, self.__db, group_size=1) as journal:
+            journal.execute(t.AddSalariedEmployeeTransaction(803, 'Bob', 'Home', self.__db, 1000.00))
+        path = os.path.join(self.__directory.name, SEGMENT_NAME.format(0))
+        with open(path, 'ab') as file:
+            file.write(b'\x40\x00\x00\x00torn')
+        with TransactionJournal(self.__directory.name, self.__db, group_size=1) as journal:
+            journal.execute(t.ChangeNameTransaction(self.__db, 803, 'Tom'))
+        db = self.__restored()
+        self.assertEqual(2, self.__replayed)
+        self.assertEqual('Tom', db.get_employee(803).name)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+from datetime import date
+import core.classes.transaction as t
+from core import metrics
+from core.metrics import InstrumentedDatabase, MetricsRegistry
+from core.sqlitedatabase import SqlitePayrollDatabase
+from unit_tests.mocks import PayrollDatabaseMock
+
+
+class Test_TestMetrics(unittest.TestCase):
+    def setUp(self) -> None:
+        self.__db = PayrollDatabaseMock()
+        super().setUp()
+
+    def tearDown(self):
+        metrics.disable()
+        self.__db.clear()
+
+    def test_disabled_by_default(self):
+        self.assertIsNone(metrics.get_registry())
+        db = InstrumentedDatabase(self.__db)
+        with mock.patch.object(MetricsRegistry, 'record') as record:
+            t.AddHourlyEmployeeTransaction(501, 'Bill', 'Home', db, 15.25).execute()
+            t.AddTimeCardTransaction(date(2001, 11, 30), 8.0, 501, db).execute()
+            with self.assertRaises(Exception):
+                t.AddTimeCardTransaction(date(2001, 11, 30), 8.0, 599, db).execute()
+            t.PaydayTransaction(db, date(2001, 11, 30)).execute()
+        record.assert_not_called()
+
+    def test_subclass_calling_super_is_counted_once(self):
+        class AddAuditedHourlyEmployeeTransaction(t.AddHourlyEmployeeTransaction):
+            def execute(self) -> None:
+                super().execute()
+
+        registry = metrics.enable()
+        AddAuditedHourlyEmployeeTransaction(504, 'Bill', 'Home', self.__db, 15.25).execute()
+        t.AddTimeCardTransaction(date(2001, 11, 30), 8.0, 504, self.__db).execute()
+        snapshot = registry.snapshot()['transaction']
+        self.assertEqual({'AddAuditedHourlyEmployeeTransaction', 'AddTimeCardTransaction'}, set(snapshot))
+        self.assertEqual(1, snapshot['AddAuditedHourlyEmployeeTransaction']['count'])
+
+    def test_database_forwards_lifecycle(self):
+        registry = metrics.enable()
+        with InstrumentedDatabase(SqlitePayrollDatabase()) as db:
+            t.AddHourlyEmployeeTransaction(505, 'Bill', 'Home', db, 15.25).execute()
+            db.clear()
+            self.assertEqual([], list(db.get_all_employee_ids()))
+            self.assertIsNone(db._reopen)
+        self.assertEqual(1, registry.snapshot()['database']['close']['count'])
+        with self.assertRaises(Exception):
+            db.get_employee(505)
+
+    def test_transaction_and_database_metrics(self):
+        registry = metrics.enable()
+        db = InstrumentedDatabase(self.__db)
+        t.AddHourlyEmployeeTransaction(502, 'Bill', 'Home', db, 15.25).execute()
+        t.AddTimeCardTransaction(date(2001, 11, 30), 8.0, 502, db).execute()
+        with self.assertRaises(Exception):
+            t.AddTimeCardTransaction(date(2001, 11, 30), 8.0, 502, db).execute()
+        with self.assertRaises(Exception):
+            t.AddTimeCardTransaction(date(2001, 11, 30), 8.0, 503, db).execute()
+        payday_t = t.PaydayTransaction(db, date(2001, 11, 30))
+        payday_t.execute()
+        self.assertEqual(8 * 15.25, payday_t.get_paycheck(502).gross_pay)
+
+        snapshot = registry.snapshot()
+        time_cards = snapshot['transaction']['AddTimeCardTransaction']
+        self.assertEqual(3, time_cards['count'])
+        self.assertEqual(2, time_cards['error_count'])
+        self.assertEqual({'Exception': 2}, time_cards['errors'])
+        self.assertEqual(3, time_cards['buckets'][-1][1])
+        self.assertEqual(1, snapshot['transaction']['PaydayTransaction']['count'])
+        self.assertEqual(1, snapshot['database']['get_employee_ids_paid_on']['count'])
+        self.assertEqual(4, snapshot['database']['get_employee']['count'])
+
+        text = registry.to_prometheus()
+        self.assertIn('payroll_transactions_total{transaction="AddTimeCardTransaction"} 3', text)
+        self.assertIn('payroll_transaction_errors_total{transaction="AddTimeCardTransaction",error="Exception"} 2', text)
+        self.assertIn('payroll_database_call_duration_seconds_count{database="get_employee"} 4', text)
+        self.assertIn('payroll_transaction_duration_seconds_bucket{transaction="PaydayTransaction",le="+Inf"} 1', text)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'payroll.prom')
+            registry.write_prometheus(path)
+            with open(path, encoding='utf-8') as file:
+                self.assertEqual(text, file.read())
+
+        metrics.disable()
+        t.AddTimeCardTransaction(date(2001, 11, 29), 8.0, 502, db).execute()
+        self.assertEqual(3, registry.snapshot()['transaction']['AddTimeCardTransaction']['count'])
+        registry.reset()
+        self.assertEqual({}, registry.snapshot()['transaction'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,130 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+from datetime import date
+import core.classes.transaction as t
+from core.paycheckarchive import PaycheckArchive, PaycheckArchiveWriter, as_paycheck
+from unit_tests.mocks import PayrollDatabaseMock
+
+
+class Test_TestPaycheckArchive(unittest.TestCase):
+    def setUp(self) -> None:
+        self.__db = PayrollDatabaseMock()
+        self.__directory = tempfile.TemporaryDirectory()
+        self.__path = os.path.join(self.__directory.name, 'paychecks.bin')
+        t.AddSalariedEmployeeTransaction(601, 'Bob', 'Home', self.__db, 1000.00).execute()
+        t.AddHourlyEmployeeTransaction(602, 'Bill', 'Home', self.__db, 15.25).execute()
+        t.ChangeMemberTransaction(self.__db, 602, 7741, 9.42).execute()
+        for day in (2, 9, 16, 23, 30):
+            t.AddTimeCardTransaction(date(2001, 11, day), 8.0, 602, self.__db).execute()
+        super().setUp()
+
+    def tearDown(self):
+        self.__db.clear()
+        self.__directory.cleanup()
+
+    def test_archive_paydays(self):
+        pay_dates = [date(2001, 11, day) for day in (2, 9, 16, 23, 30)]
+        with PaycheckArchiveWriter(self.__path) as writer:
+            for pay_date in pay_dates[:2]:
+                t.PaydayTransaction(self.__db, pay_date, sink=writer).execute()
+        with PaycheckArchive(self.__path) as archive:
+            self.assertEqual(2, len(archive))
+            with PaycheckArchiveWriter(self.__path) as writer:
+                for pay_date in pay_dates[2:]:
+                    t.PaydayTransaction(self.__db, pay_date, sink=writer).execute()
+            self.assertEqual(2, len(archive))
+            archive.refresh()
+            self.assertEqual(6, len(archive))
+
+            history = archive.history(602)
+            self.assertEqual([pay_date.toordinal() for pay_date in pay_dates], [record[1] for record in history])
+            self.assertEqual((602, date(2001, 11, 30).toordinal(), date(2001, 11, 24).toordinal(), 122.0, 9.42, 122.0 - 9.42),
+                             archive.get(602, date(2001, 11, 30)))
+            self.assertEqual(2, len(archive.history(602, date(2001, 11, 10), date(2001, 11, 23))))
+            self.assertIsNone(archive.get(601, date(2001, 11, 23)))
+            self.assertEqual([601, 602], sorted(record[0] for record in archive.on(date(2001, 11, 30))))
+            self.assertEqual(pay_dates, archive.pay_dates())
+            totals = archive.totals(date(2001, 1, 1), date(2001, 12, 31))
+            self.assertEqual([1000.00, 0.0, 1000.00], totals[601])
+            self.assertEqual(5 * 122.0, totals[602][0])
+            self.assertEqual(1, len(list(archive.scan(date(2001, 11, 1), date(2001, 11, 2)))))
+
+            paycheck = as_paycheck(archive.get(601, date(2001, 11, 30)))
+            self.assertEqual(date(2001, 11, 1), paycheck.pay_period.start_date)
+            self.assertEqual(1000.00, paycheck.net_pay)
+
+    def test_index_is_kept_beside_the_archive(self):
+        pay_dates = [date(2001, 11, day) for day in (2, 9, 16, 23, 30)]
+        with mock.patch('core.paycheckarchive.MIN_INDEX_TAIL', 0):
+            with PaycheckArchiveWriter(self.__path) as writer:
+                for pay_date in pay_dates[:2]:
+                    t.PaydayTransaction(self.__db, pay_date, sink=writer).execute()
+            with PaycheckArchive(self.__path) as archive:
+                self.assertTrue(os.path.exists(self.__path + '.idx'))
+                with PaycheckArchiveWriter(self.__path) as writer:
+                    for pay_date in pay_dates[2:]:
+                        t.PaydayTransaction(self.__db, pay_date, sink=writer).execute()
+                archive.refresh()
+                expected = (archive.history(602), archive.on(date(2001, 11, 30)), archive.pay_dates())
+
+        # Opening an indexed archive maps the sidecar instead of reading the records
+        def records(start, end):
+            self.assertEqual(start, end)
+            return iter(())
+
+        with mock.patch.object(PaycheckArchive, '_PaycheckArchive__records', side_effect=records) as read:
+            with PaycheckArchive(self.__path) as archive:
+                self.assertEqual(6, len(archive))
+                self.assertEqual(expected, (archive.history(602), archive.on(date(2001, 11, 30)), archive.pay_dates()))
+                self.assertEqual(5, len(archive.history(602)))
+                self.assertEqual([], archive.history(603))
+                self.assertIsNone(archive.get(601, date(2001, 11, 23)))
+                self.assertEqual(1000.00, archive.get(601, date(2001, 11, 30))[5])
+            read.assert_called_once_with(6, 6)
+
+        # A damaged sidecar is ignored and the archive indexes its records again
+        with open(self.__path + '.idx', 'r+b') as file:
+            file.truncate(48)
+        with PaycheckArchive(self.__path) as archive:
+            self.assertEqual(expected, (archive.history(602), archive.on(date(2001, 11, 30)), archive.pay_dates()))
+
+    def test_close_during_scan(self):
+        with PaycheckArchiveWriter(self.__path) as writer:
+            t.PaydayTransaction(self.__db, date(2001, 11, 30), sink=writer).execute()
+        archive = PaycheckArchive(self.__path)
+        scan = archive.scan()
+        self.assertEqual(601, next(scan)[0])
+        with PaycheckArchiveWriter(self.__path) as writer:
+            t.PaydayTransaction(self.__db, date(2001, 11, 23), sink=writer).execute()
+        archive.refresh()
+        self.assertEqual(602, next(scan)[0])
+        archive.close()
+
+    def test_torn_record_is_dropped(self):
+        pay_dates = [date(2001, 11, day) for day in (2, 9, 16, 23, 30)]
+        with mock.patch('core.paycheckarchive.MIN_INDEX_TAIL', 0):
+            with PaycheckArchiveWriter(self.__path) as writer:
+                for pay_date in pay_dates[:2]:
+                    t.PaydayTransaction(self.__db, pay_date, sink=writer).execute()
+            PaycheckArchive(self.__path).close()
+            with open(self.__path, 'ab') as file:
+                file.write(b'torn')
+            with PaycheckArchiveWriter(self.__path) as writer:
+                t.PaydayTransaction(self.__db, pay_dates[2], sink=writer).execute()
+            with PaycheckArchive(self.__path) as archive:
+                self.assertEqual(3, len(archive))
+                self.assertEqual([pay_date.toordinal() for pay_date in pay_dates[:3]], [record[1] for record in archive.history(602)])
+                self.assertEqual(pay_dates[:3], archive.pay_dates())
+
+    def test_rejects_other_files(self):
+        with open(self.__path, 'wb') as file:
+            file.write(b'not an archive')
+        with self.assertRaises(ValueError):
+            PaycheckArchive(self.__path)
+        with self.assertRaises(ValueError):
+            PaycheckArchiveWriter(self.__path)
+
+if __name__ == '__main__':
+    unittest.main()
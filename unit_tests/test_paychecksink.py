@@ -0,0 +1,85 @@
+import csv
+import json
+import os
+import tempfile
+import unittest
+from datetime import date
+import core.classes.transaction as t
+from core.paychecksink import CallbackPaycheckSink, PaycheckRegisterWriter
+from unit_tests.mocks import PayrollDatabaseMock
+
+
+class Test_TestPaycheckSink(unittest.TestCase):
+    def setUp(self) -> None:
+        self.__db = PayrollDatabaseMock()
+        self.__directory = tempfile.TemporaryDirectory()
+        self.__pay_date = date(2001, 11, 30)
+        for emp_id in range(301, 306):
+            t.AddHourlyEmployeeTransaction(emp_id, 'Bill', 'Home', self.__db, 15.25).execute()
+            t.AddTimeCardTransaction(self.__pay_date, 8.0, emp_id, self.__db).execute()
+        t.AddSalariedEmployeeTransaction(306, 'Bob', 'Home', self.__db, 1000.00).execute()
+        super().setUp()
+
+    def tearDown(self):
+        self.__db.clear()
+        self.__directory.cleanup()
+
+    def test_callback_sink(self):
+        paychecks = {}
+        batch_sizes = []
+
+        def callback(batch):
+            batch_sizes.append(len(batch))
+            paychecks.update(batch)
+
+        payday_t = t.PaydayTransaction(self.__db, self.__pay_date, sink=CallbackPaycheckSink(callback))
+        payday_t.execute()
+        self.assertEqual([1] * 6, batch_sizes)
+        self.assertEqual(set(range(301, 307)), set(paychecks))
+        self.assertEqual(8 * 15.25, paychecks[301].gross_pay)
+        with self.assertRaises(Exception):
+            payday_t.get_paycheck(301)
+
+        batches = []
+        for batch in (False, True):
+            payday_t = t.PaydayTransaction(
+                self.__db, self.__pay_date, batch=batch, shard_size=4,
+                sink=CallbackPaycheckSink(batches.append, batch_size=4), keep_paychecks=True
+            )
+            payday_t.execute()
+            self.assertEqual([4, 2], [len(paychecks) for paychecks in batches])
+            self.assertIs(batches[1][-1][1], payday_t.get_paycheck(batches[1][-1][0]))
+            batches.clear()
+        with self.assertRaises(ValueError):
+            CallbackPaycheckSink(batches.append, batch_size=0)
+
+    def test_iter_paychecks(self):
+        payday_t = t.PaydayTransaction(self.__db, self.__pay_date, keep_paychecks=False)
+        paychecks = dict(payday_t.iter_paychecks())
+        self.assertEqual(1000.00, paychecks[306].gross_pay)
+        self.assertEqual('Hold', paychecks[306].disposition)
+        with self.assertRaises(Exception):
+            payday_t.get_paycheck(306)
+
+    def test_register_writer(self):
+        for format in ('csv', 'jsonl'):
+            path = os.path.join(self.__directory.name, f'register.{format}')
+            with PaycheckRegisterWriter(path) as writer:
+                t.PaydayTransaction(self.__db, self.__pay_date, sink=writer).execute()
+                self.assertEqual(6, writer.count)
+            with open(path, newline='', encoding='utf-8') as file:
+                if format == 'csv':
+                    rows = list(csv.DictReader(file))
+                else:
+                    rows = [json.loads(line) for line in file]
+            self.assertEqual(6, len(rows))
+            row = next(row for row in rows if int(row['emp_id']) == 301)
+            self.assertEqual('2001-11-30', row['pay_date'])
+            self.assertEqual('2001-11-24', row['pay_period_start_date'])
+            self.assertEqual(8 * 15.25, float(row['net_pay']))
+            self.assertEqual('Hold', row['disposition'])
+        with self.assertRaises(ValueError):
+            PaycheckRegisterWriter(os.path.join(self.__directory.name, 'register.txt'))
+
+if __name__ == '__main__':
+    unittest.main()
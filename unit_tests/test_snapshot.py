@@ -0,0 +1,141 @@
+import os
+import tempfile
+import unittest
+from datetime import date
+from unittest import mock
+import core.classes.transaction as t
+from core.classes.paymentclassification import *
+from core.classes.paymentmethod import *
+from core.classes.paymentschedule import *
+from core.ingest import ingest_records
+from core.snapshot import HEADER, LEGACY_HEADER, LEGACY_MAGIC, SnapshotPayrollDatabase, write_snapshot
+from unit_tests.mocks import PayrollDatabaseMock
+
+
+class Test_TestSnapshotPayrollDatabase(unittest.TestCase):
+    def setUp(self) -> None:
+        self.__db = PayrollDatabaseMock()
+        self.__directory = tempfile.TemporaryDirectory()
+        self.__path = os.path.join(self.__directory.name, 'payroll.snap')
+        t.AddSalariedEmployeeTransaction(901, 'Bob', 'Home', self.__db, 1000.00).execute()
+        t.AddHourlyEmployeeTransaction(902, 'Bill', 'Home', self.__db, 15.25).execute()
+        self.__db.get_employee(902).classification = HourlyClassification(15.25, columnar=True)
+        t.AddCommissionedEmployeeTransaction(903, 'Sam', 'Home', self.__db, 0.1, 1500.00, date(2005, 7, 15)).execute()
+        t.AddTimeCardTransaction(date(2005, 7, 28), 9.0, 902, self.__db).execute()
+        t.AddTimeCardTransaction(date(2005, 7, 29), 7.5, 902, self.__db).execute()
+        t.AddSalesReceiptTransaction(self.__db, date(2005, 7, 25), 150.00, 903).execute()
+        t.ChangeDirectTransaction(self.__db, 901, 'Bank', 'Account').execute()
+        t.ChangeMailTransaction(self.__db, 902, 'Mail address').execute()
+        t.ChangeMemberTransaction(self.__db, 903, 7735, 9.42).execute()
+        t.AddServiceChargeTransaction(self.__db, date(2005, 7, 27), 19.42, 7735).execute()
+        super().setUp()
+
+    def tearDown(self):
+        self.__db.clear()
+        self.__directory.cleanup()
+
+    def test_employees_materialize_lazily(self):
+        self.assertEqual(3, write_snapshot(self.__path, self.__db))
+        with SnapshotPayrollDatabase(self.__path) as snapshot:
+            self.assertEqual([901, 902, 903], list(snapshot.get_all_employee_ids()))
+            self.assertEqual(0, snapshot.materialized)
+
+            salaried = snapshot.get_employee(901)
+            self.assertEqual(1, snapshot.materialized)
+            self.assertIs(salaried, snapshot.get_employee(901))
+            self.assertEqual('Bob', salaried.name)
+            self.assertIs(type(salaried.schedule), MonthlySchedule)
+            self.assertEqual('Account', salaried.method.account)
+
+            hourly = snapshot.get_employee(902)
+            self.assertTrue(hourly.classification.columnar)
+            self.assertEqual(7.5, hourly.classification.get_time_card(date(2005, 7, 29)).hours)
+            self.assertEqual('Mail address', hourly.method.address)
+
+            commissioned = snapshot.get_union_member(7735)
+            self.assertEqual(903, commissioned.emp_id)
+            self.assertEqual(date(2005, 7, 15), commissioned.schedule.work_start_date)
+            self.assertIs(type(commissioned.method), HoldMethod)
+            self.assertEqual(19.42, commissioned.affiliation.get_service_charge(date(2005, 7, 27)).amount)
+            self.assertIsNone(snapshot.get_employee(999))
+
+    def test_numeric_accounts_are_written_as_text(self):
+        report = ingest_records([{'type': 'change_direct', 'emp_id': 902, 'bank': 'B', 'account': 12345}], self.__db)
+        self.assertEqual(1, report.accepted)
+        self.__db.get_employee(903).method = DirectMethod(7, 67890)
+        write_snapshot(self.__path, self.__db)
+        with SnapshotPayrollDatabase(self.__path) as snapshot:
+            self.assertEqual('12345', snapshot.get_employee(902).method.account)
+            self.assertEqual(('7', '67890'), (snapshot.get_employee(903).method.bank, snapshot.get_employee(903).method.account))
+
+    def test_payday_touches_only_paid_employees(self):
+        write_snapshot(self.__path, self.__db)
+        with SnapshotPayrollDatabase(self.__path) as snapshot:
+            payday_t = t.PaydayTransaction(snapshot, date(2005, 7, 29))
+            payday_t.execute()
+            expected_t = t.PaydayTransaction(self.__db, date(2005, 7, 29))
+            expected_t.execute()
+            self.assertEqual(1, snapshot.materialized)
+            self.assertIsNone(payday_t.get_paycheck(901))
+            self.assertEqual(expected_t.get_paycheck(902).net_pay, payday_t.get_paycheck(902).net_pay)
+
+            payday_t = t.PaydayTransaction(snapshot, date(2005, 7, 31))
+            payday_t.execute()
+            self.assertEqual(1000.00, payday_t.get_paycheck(901).net_pay)
+
+    def test_writes_overlay_the_snapshot(self):
+        write_snapshot(self.__path, self.__db)
+        with SnapshotPayrollDatabase(self.__path) as snapshot:
+            t.ChangeHourlyTransaction(snapshot, 901, 20.00).execute()
+            t.DeleteEmployeeTransaction(902, snapshot).execute()
+            t.AddSalariedEmployeeTransaction(904, 'Tom', 'Home', snapshot, 2000.00).execute()
+            self.assertEqual([901, 903, 904], sorted(snapshot.get_all_employee_ids()))
+            self.assertIsNone(snapshot.get_employee(902))
+            self.assertEqual([901, 903], sorted(snapshot.get_employee_ids_paid_on(date(2005, 7, 22))))
+            self.assertEqual([904], sorted(snapshot.get_employee_ids_paid_on(date(2005, 7, 31))))
+            write_snapshot(self.__path, snapshot)
+        with SnapshotPayrollDatabase(self.__path) as snapshot:
+            self.assertEqual([901, 903, 904], list(snapshot.get_all_employee_ids()))
+            self.assertIs(type(snapshot.get_employee(901).schedule), WeeklySchedule)
+
+    def test_written_in_shards(self):
+        t.AddSalariedEmployeeTransaction(904, 'Tom', 'Home', self.__db, 2000.00).execute()
+        t.AddSalariedEmployeeTransaction(905, 'Ann', 'Home', self.__db, 3000.00).execute()
+        with mock.patch('core.snapshot.SHARD_SIZE', 2), \
+                mock.patch.object(PayrollDatabaseMock, 'get_employees', autospec=True,
+                                  side_effect=PayrollDatabaseMock.get_employees) as get_employees:
+            self.assertEqual(5, write_snapshot(self.__path, self.__db))
+        self.assertEqual([2, 2, 1], [len(call.args[1]) for call in get_employees.call_args_list])
+
+        # Copying a snapshot reuses its stored employees without materializing them
+        copy_path = os.path.join(self.__directory.name, 'copy.snap')
+        with SnapshotPayrollDatabase(self.__path) as snapshot:
+            t.ChangeNameTransaction(snapshot, 904, 'Tommy').execute()
+            with mock.patch('core.snapshot.SHARD_SIZE', 2):
+                write_snapshot(copy_path, snapshot)
+            self.assertEqual(1, snapshot.materialized)
+        with SnapshotPayrollDatabase(copy_path) as snapshot:
+            self.assertEqual([901, 902, 903, 904, 905], list(snapshot.get_all_employee_ids()))
+            self.assertEqual('Tommy', snapshot.get_employee(904).name)
+            self.assertEqual(903, snapshot.get_union_member(7735).emp_id)
+            self.assertEqual(7.5, snapshot.get_employee(902).classification.get_time_card(date(2005, 7, 29)).hours)
+            self.assertEqual([902], sorted(snapshot.get_employee_ids_paid_on(date(2005, 7, 29))))
+            self.assertEqual([901, 904, 905], sorted(snapshot.get_employee_ids_paid_on(date(2005, 7, 31))))
+
+    def test_reads_version_one_snapshots(self):
+        write_snapshot(self.__path, self.__db)
+        with open(self.__path, 'rb') as file:
+            data = file.read()
+        _, count, member_count, columns_position = HEADER.unpack_from(data)
+        legacy_path = os.path.join(self.__directory.name, 'legacy.snap')
+        with open(legacy_path, 'wb') as file:
+            file.write(LEGACY_HEADER.pack(LEGACY_MAGIC, count, member_count))
+            file.write(data[columns_position:])
+            file.write(data[HEADER.size:columns_position])
+        with SnapshotPayrollDatabase(legacy_path) as snapshot:
+            self.assertEqual([901, 902, 903], list(snapshot.get_all_employee_ids()))
+            self.assertEqual('Account', snapshot.get_employee(901).method.account)
+            self.assertEqual(19.42, snapshot.get_union_member(7735).affiliation.get_service_charge(date(2005, 7, 27)).amount)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,227 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+from datetime import date
+from unittest import mock
+from core.classes.affiliation import UnionAffiliation
+import core.classes.transaction as t
+from core.classes.paymentclassification import *
+from core.classes.paymentmethod import *
+from core.classes.paymentschedule import *
+from core.sqlitedatabase import SqlitePayrollDatabase
+
+
+class Test_TestSqlitePayrollDatabase(unittest.TestCase):
+    def setUp(self) -> None:
+        self.__directory = tempfile.TemporaryDirectory()
+        self.__path = os.path.join(self.__directory.name, 'payroll.db')
+        self.__db = SqlitePayrollDatabase(self.__path)
+        super().setUp()
+
+    def tearDown(self):
+        self.__db.close()
+        self.__directory.cleanup()
+
+    def test_employee_round_trip(self):
+        t.AddSalariedEmployeeTransaction(1, 'Bob', 'Home', self.__db, 1000.00).execute()
+        t.AddHourlyEmployeeTransaction(2, 'Bill', 'Home', self.__db, 15.25).execute()
+        t.AddCommissionedEmployeeTransaction(3, 'Sam', 'Home', self.__db, 0.1, 1500.00, date(2005, 7, 31)).execute()
+        t.AddTimeCardTransaction(date(2005, 8, 5), 9.0, 2, self.__db).execute()
+        t.AddSalesReceiptTransaction(self.__db, date(2005, 8, 5), 150.00, 3).execute()
+        t.ChangeDirectTransaction(self.__db, 1, 'Bank', 'Account').execute()
+        t.ChangeMailTransaction(self.__db, 2, 'Mail address').execute()
+        t.ChangeMemberTransaction(self.__db, 3, 7734, 9.42).execute()
+        t.AddServiceChargeTransaction(self.__db, date(2005, 8, 5), 19.42, 7734).execute()
+        self.__db.close()
+        self.__db = SqlitePayrollDatabase(self.__path)
+
+        self.assertEqual([1, 2, 3], list(self.__db.get_all_employee_ids()))
+        salaried = self.__db.get_employee(1)
+        self.assertEqual('Bob', salaried.name)
+        self.assertEqual(1000.00, salaried.classification.salary)
+        self.assertIs(type(salaried.schedule), MonthlySchedule)
+        self.assertIs(type(salaried.method), DirectMethod)
+        self.assertEqual('Bank', salaried.method.bank)
+        self.assertEqual('Account', salaried.method.account)
+
+        hourly = self.__db.get_employee(2)
+        self.assertEqual(15.25, hourly.classification.hourly_rate)
+        self.assertEqual(9.0, hourly.classification.get_time_card(date(2005, 8, 5)).hours)
+        self.assertIs(type(hourly.schedule), WeeklySchedule)
+        self.assertEqual('Mail address', hourly.method.address)
+
+        commissioned = self.__db.get_employee(3)
+        self.assertEqual(0.1, commissioned.classification.commission_rate)
+        self.assertEqual(150.00, commissioned.classification.get_sales_receipt(date(2005, 8, 5)).amount)
+        self.assertEqual(date(2005, 7, 31), commissioned.schedule.work_start_date)
+        self.assertIs(type(commissioned.method), HoldMethod)
+        self.assertEqual(9.42, commissioned.affiliation.dues)
+        self.assertEqual(19.42, commissioned.affiliation.get_service_charge(date(2005, 8, 5)).amount)
+        self.assertEqual(3, self.__db.get_union_member(7734).emp_id)
+
+    def test_delete_employee_removes_union_membership(self):
+        t.AddHourlyEmployeeTransaction(4, 'Bill', 'Home', self.__db, 15.25).execute()
+        t.ChangeMemberTransaction(self.__db, 4, 7735, 9.42).execute()
+        t.DeleteEmployeeTransaction(4, self.__db).execute()
+        self.assertIsNone(self.__db.get_employee(4))
+        self.assertIsNone(self.__db.get_union_member(7735))
+
+    def test_change_unaffiliated_transaction(self):
+        t.AddHourlyEmployeeTransaction(5, 'Bill', 'Home', self.__db, 15.25).execute()
+        t.ChangeMemberTransaction(self.__db, 5, 7736, 9.42).execute()
+        t.AddServiceChargeTransaction(self.__db, date(2005, 8, 5), 19.42, 7736).execute()
+        t.ChangeUnaffiliatedTransaction(self.__db, 5).execute()
+        self.assertIsNone(self.__db.get_employee(5).affiliation)
+        self.assertIsNone(self.__db.get_union_member(7736))
+
+    def test_duplicate_time_card_is_rejected(self):
+        t.AddHourlyEmployeeTransaction(6, 'Bill', 'Home', self.__db, 15.25).execute()
+        t.AddTimeCardTransaction(date(2005, 8, 5), 8.0, 6, self.__db).execute()
+        with self.assertRaises(Exception):
+            t.AddTimeCardTransaction(date(2005, 8, 5), 2.0, 6, self.__db).execute()
+        self.assertEqual(8.0, self.__db.get_employee(6).classification.get_time_card(date(2005, 8, 5)).hours)
+
+    def test_payday(self):
+        t.AddHourlyEmployeeTransaction(7, 'Bill', 'Home', self.__db, 15.24).execute()
+        t.ChangeMemberTransaction(self.__db, 7, 7737, 9.42).execute()
+        pay_date = date(2001, 11, 30)
+        t.AddServiceChargeTransaction(self.__db, pay_date, 19.42, 7737).execute()
+        t.AddTimeCardTransaction(pay_date, 8.0, 7, self.__db).execute()
+        payday_t = t.PaydayTransaction(self.__db, pay_date)
+        payday_t.execute()
+        paycheck = payday_t.get_paycheck(7)
+        self.assertEqual(date(2001, 11, 24), paycheck.pay_period.start_date)
+        self.assertEqual(8 * 15.24, paycheck.gross_pay)
+        self.assertEqual(9.42 + 19.42, paycheck.deductions)
+        self.assertEqual(8 * 15.24 - (9.42 + 19.42), paycheck.net_pay)
+        self.assertEqual('Hold', paycheck.disposition)
+
+    def test_loaded_employees_pay_without_a_scan(self):
+        t.AddHourlyEmployeeTransaction(8, 'Bill', 'Home', self.__db, 15.24).execute()
+        t.ChangeMemberTransaction(self.__db, 8, 7738, 9.42).execute()
+        for day in (19, 20, 26, 28):
+            t.AddTimeCardTransaction(date(2001, 11, day), 9.0, 8, self.__db).execute()
+            t.AddServiceChargeTransaction(self.__db, date(2001, 11, day), 1.17, 7738).execute()
+        self.__db.close()
+        self.__db = SqlitePayrollDatabase(self.__path)
+        employee = self.__db.get_employee(8)
+        # Added out of date order after loading, so the loaded period is summed again
+        t.AddTimeCardTransaction(date(2001, 11, 27), 7.0, 8, self.__db).execute()
+        t.AddTimeCardTransaction(date(2001, 11, 29), 6.0, 8, self.__db).execute()
+        with mock.patch.object(HourlyClassification, 'time_cards_between', side_effect=AssertionError), \
+             mock.patch.object(UnionAffiliation, 'service_charges_between', side_effect=AssertionError):
+            payday_t = t.PaydayTransaction(self.__db, date(2001, 11, 30))
+            payday_t.execute()
+        expected_pay = 0.0
+        for hours in (9.0, 7.0, 9.0, 6.0):
+            overtime_hours = max(0.0, hours - 8.0)
+            expected_pay += 15.24 * (hours - overtime_hours) + 15.24 * 1.5 * overtime_hours
+        self.assertIs(employee, self.__db.get_employee(8))
+        self.assertEqual(expected_pay, payday_t.get_paycheck(8).gross_pay)
+        self.assertEqual(9.42 + 1.17 + 1.17, payday_t.get_paycheck(8).deductions)
+
+    def test_parallel_payday_reads_in_workers(self):
+        pay_date = date(2001, 11, 30)
+        for emp_id in range(11, 16):
+            t.AddHourlyEmployeeTransaction(emp_id, 'Bill', 'Home', self.__db, 15.24).execute()
+            t.AddTimeCardTransaction(pay_date, emp_id / 2, emp_id, self.__db).execute()
+        t.ChangeDirectTransaction(self.__db, 15, 'Bank', 'Account').execute()
+        self.assertEqual((SqlitePayrollDatabase, (self.__path,)), self.__db._reopen)
+        payday_t = t.PaydayTransaction(self.__db, pay_date)
+        payday_t.execute()
+        parallel_payday_t = t.PaydayTransaction(self.__db, pay_date, workers=2, shard_size=2)
+        parallel_payday_t.execute()
+        for emp_id in range(11, 16):
+            self.assertEqual(payday_t.get_paycheck(emp_id).net_pay, parallel_payday_t.get_paycheck(emp_id).net_pay)
+            self.assertEqual(payday_t.get_paycheck(emp_id).disposition, parallel_payday_t.get_paycheck(emp_id).disposition)
+        self.assertEqual('Account', parallel_payday_t.get_paycheck(15).method.account)
+        memory_db = SqlitePayrollDatabase()
+        self.assertIsNone(memory_db._reopen)
+        memory_db.close()
+
+    def test_targeted_writes_keep_other_rows(self):
+        connection = sqlite3.connect(self.__path)
+        with connection:
+            connection.execute('CREATE TABLE deleted_time_cards (date INTEGER)')
+            connection.execute(
+                'CREATE TRIGGER count_deleted_time_cards AFTER DELETE ON time_cards '
+                'BEGIN INSERT INTO deleted_time_cards VALUES (old.date); END'
+            )
+        t.AddHourlyEmployeeTransaction(20, 'Bill', 'Home', self.__db, 15.25).execute()
+        for day in range(1, 8):
+            t.AddTimeCardTransaction(date(2005, 8, day), 8.0, 20, self.__db).execute()
+        t.ChangeNameTransaction(self.__db, 20, 'Bob').execute()
+        t.ChangeMemberTransaction(self.__db, 20, 7739, 9.42).execute()
+        t.ChangeDirectTransaction(self.__db, 20, 'Bank', 'Account').execute()
+        t.TransactionBatch(self.__db, [
+            t.AddTimeCardTransaction(date(2005, 8, 8), 8.0, 20, self.__db),
+            t.AddServiceChargeTransaction(self.__db, date(2005, 8, 8), 19.42, 7739),
+        ]).execute()
+        self.assertEqual(0, connection.execute('SELECT count(*) FROM deleted_time_cards').fetchone()[0])
+        employee = self.__db.get_employee(20)
+        self.assertEqual('Bob', employee.name)
+        self.assertEqual(8, len(employee.classification.time_cards_between(date(2005, 8, 1), date(2005, 8, 8))))
+        self.assertEqual(19.42, employee.affiliation.get_service_charge(date(2005, 8, 8)).amount)
+        self.assertEqual('Account', employee.method.account)
+
+        t.ChangeSalariedTransaction(self.__db, 20, 1000.00).execute()
+        self.assertEqual(8, connection.execute('SELECT count(*) FROM deleted_time_cards').fetchone()[0])
+        self.assertEqual(9.42, self.__db.get_employee(20).affiliation.dues)
+        connection.close()
+
+    def test_employee_cache(self):
+        t.AddHourlyEmployeeTransaction(21, 'Bill', 'Home', self.__db, 15.25).execute()
+        employee = self.__db.get_employee(21)
+        self.assertIs(employee, self.__db.get_employee(21))
+        # A row written behind the cache's back makes the next insert fail, which drops the stale employee
+        connection = sqlite3.connect(self.__path)
+        with connection:
+            connection.execute('INSERT INTO time_cards VALUES (21, ?, 6.0)', (date(2005, 8, 1).toordinal(),))
+        connection.close()
+        with self.assertRaises(sqlite3.IntegrityError):
+            t.AddTimeCardTransaction(date(2005, 8, 1), 8.0, 21, self.__db).execute()
+        self.assertIsNot(employee, self.__db.get_employee(21))
+        self.assertEqual(6.0, self.__db.get_employee(21).classification.get_time_card(date(2005, 8, 1)).hours)
+        t.DeleteEmployeeTransaction(21, self.__db).execute()
+        self.assertIsNone(self.__db.get_employee(21))
+        with self.assertRaises(ValueError):
+            SqlitePayrollDatabase(cache_size=-1)
+
+    def test_transaction_batch(self):
+        t.AddHourlyEmployeeTransaction(8, 'Bill', 'Home', self.__db, 15.25).execute()
+        batch = t.TransactionBatch(self.__db, [
+            t.AddTimeCardTransaction(date(2005, 8, 1), 8.0, 8, self.__db),
+            t.AddSalariedEmployeeTransaction(9, 'Bob', 'Home', self.__db, 1000.00),
+            t.AddTimeCardTransaction(date(2005, 8, 2), 6.0, 8, self.__db),
+            t.AddTimeCardTransaction(date(2005, 8, 1), 2.0, 8, self.__db),
+            t.AddTimeCardTransaction(date(2005, 8, 1), 2.0, 9, self.__db),
+            t.ChangeMemberTransaction(self.__db, 9, 7738, 9.42),
+            t.AddServiceChargeTransaction(self.__db, date(2005, 8, 1), 19.42, 7738),
+            t.ChangeNameTransaction(self.__db, 10, 'Sam'),
+        ])
+        batch.execute()
+        self.assertEqual(
+            [True, True, True, False, False, True, True, False],
+            [result.succeeded for result in batch.results]
+        )
+        self.assertEqual('Employee not found', str(batch.results[7].error))
+        hourly = self.__db.get_employee(8)
+        self.assertEqual(8.0, hourly.classification.get_time_card(date(2005, 8, 1)).hours)
+        self.assertEqual(6.0, hourly.classification.get_time_card(date(2005, 8, 2)).hours)
+        salaried = self.__db.get_union_member(7738)
+        self.assertEqual(9, salaried.emp_id)
+        self.assertEqual(19.42, salaried.affiliation.get_service_charge(date(2005, 8, 1)).amount)
+
+    def test_employee_ids_paid_on(self):
+        t.AddSalariedEmployeeTransaction(11, 'Bob', 'Home', self.__db, 1000.00).execute()
+        t.AddHourlyEmployeeTransaction(12, 'Bill', 'Home', self.__db, 15.25).execute()
+        t.AddCommissionedEmployeeTransaction(13, 'Sam', 'Home', self.__db, 0.1, 1500.00, date(2001, 11, 17)).execute()
+        self.assertEqual([11, 12, 13], list(self.__db.get_employee_ids_paid_on(date(2001, 11, 30))))
+        self.assertEqual([12], list(self.__db.get_employee_ids_paid_on(date(2001, 11, 23))))
+        self.assertEqual([], list(self.__db.get_employee_ids_paid_on(date(2001, 11, 22))))
+        t.ChangeHourlyTransaction(self.__db, 13, 20.00).execute()
+        self.assertEqual([12, 13], list(self.__db.get_employee_ids_paid_on(date(2001, 11, 23))))
+
+if __name__ == '__main__':
+    unittest.main()
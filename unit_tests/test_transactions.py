@@ -2,12 +2,19 @@ from ast import Assert
 import email
 import unittest
 import datetime
+import pickle
+from unittest import mock
 from core.classes.affiliation import *
 import core.classes.transaction as t
 from core.classes.employee import *
 from core.classes.paymentclassification import *
 from core.classes.paymentmethod import *
 from core.classes.paymentschedule import *
+from core.classes.dateutils import count_fridays
+from core.classes.doc import Paycheck, TimeCard
+from core.classes.periodtotals import MAX_TRACKED_PERIODS, PeriodTotals
+from core.classes.timecardstore import ColumnarTimeCardStore
+from core.paydateindex import MONTHLY_BUCKET, WEEKLY_BUCKET, pay_date_bucket, pay_date_buckets
 from unit_tests.mocks import PayrollDatabaseMock
 
 
@@ -578,6 +585,278 @@ class Test_TestAddEmployee(unittest.TestCase):
             deductions=(9.42 + 19.42)
         )
 
+    def test_time_cards_between(self):
+        emp_id = 35
+        add_hourly_emp_t = t.AddHourlyEmployeeTransaction(emp_id, 'Bill', 'Home', self.__db, 15.25)
+        add_hourly_emp_t.execute()
+        card_dates = [date(2001, 11, 9), date(2001, 11, 2), date(2001, 11, 6), date(2001, 11, 10)]
+        for card_date in card_dates:
+            t.AddTimeCardTransaction(card_date, 4.0, emp_id, self.__db).execute()
+        classification = self.__db.get_employee(emp_id).classification
+        time_cards = classification.time_cards_between(date(2001, 11, 3), date(2001, 11, 9))
+        self.assertEqual([date(2001, 11, 6), date(2001, 11, 9)], [time_card.date for time_card in time_cards])
+        self.assertEqual([], classification.time_cards_between(date(2001, 11, 11), date(2001, 11, 30)))
+        self.assertIs(time_cards[1], classification.get_time_card(date(2001, 11, 9)))
+        with self.assertRaises(Exception):
+            t.AddTimeCardTransaction(date(2001, 11, 6), 1.0, emp_id, self.__db).execute()
+
+    def test_pay_hourly_employee_with_columnar_time_cards(self):
+        emp_id = 36
+        add_hourly_emp_t = t.AddHourlyEmployeeTransaction(emp_id, 'Bill', 'Home', self.__db, 15.25)
+        add_hourly_emp_t.execute()
+        employee = self.__db.get_employee(emp_id)
+        employee.classification = HourlyClassification(15.25, columnar=True)
+        pay_date = date(2001, 11, 9) #friday
+        add_time_card_ts = [
+            t.AddTimeCardTransaction(date(2001, 11, 9), 9.0, emp_id, self.__db),
+            t.AddTimeCardTransaction(date(2001, 11, 2), 5.0, emp_id, self.__db),
+            t.AddTimeCardTransaction(date(2001, 11, 6), 5.0, emp_id, self.__db),
+            t.AddTimeCardTransaction(date(2001, 11, 3), 2.0, emp_id, self.__db)
+        ]
+        for add_time_card_t in add_time_card_ts:
+            add_time_card_t.execute()
+        with self.assertRaises(Exception):
+            t.AddTimeCardTransaction(date(2001, 11, 6), 1.0, emp_id, self.__db).execute()
+        time_card = employee.classification.get_time_card(date(2001, 11, 6))
+        self.assertEqual(date(2001, 11, 6), time_card.date)
+        self.assertEqual(5.0, time_card.hours)
+        self.assertIsNone(employee.classification.get_time_card(date(2001, 11, 7)))
+        payday_t = t.PaydayTransaction(self.__db, pay_date)
+        payday_t.execute()
+        expected_pay = (8 + 1.5 + 5 + 2) * 15.25
+        self.__validate_pay_check(payday_t, emp_id, pay_date, date(2001, 11, 3), expected_pay, expected_pay, 0.0)
+
+    def test_columnar_pay_adds_in_date_order(self):
+        store = ColumnarTimeCardStore()
+        classification = HourlyClassification(15.37)
+        for day in range(1, 32):
+            time_card = TimeCard(date(2001, 10, day), 0.1 + (day * 0.73) % 11)
+            store.add(time_card)
+            classification.add_time_card(time_card)
+        expected_pay = 0.0
+        for time_card in classification.time_cards_between(date(2001, 10, 1), date(2001, 10, 31)):
+            overtime_hours = max(0.0, time_card.hours - 8.0)
+            expected_pay += 15.37 * (time_card.hours - overtime_hours) + 15.37 * 1.5 * overtime_hours
+        self.assertEqual(expected_pay, store.calculate_pay(15.37, date(2001, 10, 1), date(2001, 10, 31)))
+
+    def test_batch_payday_matches_per_employee_payday(self):
+        pay_date = date(2001, 11, 30)
+        t.AddSalariedEmployeeTransaction(37, 'Bob', 'Home', self.__db, 1000.00).execute()
+        t.AddHourlyEmployeeTransaction(38, 'Bill', 'Home', self.__db, 15.24).execute()
+        t.AddCommissionedEmployeeTransaction(39, 'Sam', 'Home', self.__db, 0.1, 1500.00, date(2001, 11, 17)).execute()
+        t.AddHourlyEmployeeTransaction(40, 'Tom', 'Home', self.__db, 20.00).execute()
+        self.__db.get_employee(40).classification = HourlyClassification(20.00, columnar=True)
+        t.ChangeMemberTransaction(self.__db, 37, 7736, 9.42).execute()
+        t.ChangeMemberTransaction(self.__db, 38, 7737, 9.42).execute()
+        transactions = [
+            t.AddTimeCardTransaction(date(2001, 11, 26), 9.5, 38, self.__db),
+            t.AddTimeCardTransaction(date(2001, 11, 30), 7.25, 38, self.__db),
+            t.AddTimeCardTransaction(date(2001, 11, 23), 8.0, 38, self.__db),
+            t.AddTimeCardTransaction(date(2001, 11, 28), 10.0, 40, self.__db),
+            t.AddServiceChargeTransaction(self.__db, date(2001, 11, 27), 19.42, 7737),
+            t.AddServiceChargeTransaction(self.__db, date(2001, 11, 29), 3.17, 7737),
+            t.AddSalesReceiptTransaction(self.__db, date(2001, 11, 20), 310.00, 39),
+            t.AddSalesReceiptTransaction(self.__db, date(2001, 11, 29), 125.50, 39),
+        ]
+        for transaction in transactions:
+            transaction.execute()
+        payday_t = t.PaydayTransaction(self.__db, pay_date)
+        payday_t.execute()
+        batch_payday_t = t.PaydayTransaction(self.__db, pay_date, batch=True)
+        batch_payday_t.execute()
+        for emp_id in (37, 38, 39, 40):
+            paycheck = payday_t.get_paycheck(emp_id)
+            batch_paycheck = batch_payday_t.get_paycheck(emp_id)
+            self.assertIsNotNone(batch_paycheck)
+            self.assertEqual(paycheck.pay_period.start_date, batch_paycheck.pay_period.start_date)
+            self.assertEqual(paycheck.gross_pay, batch_paycheck.gross_pay)
+            self.assertEqual(paycheck.deductions, batch_paycheck.deductions)
+            self.assertEqual(paycheck.net_pay, batch_paycheck.net_pay)
+            self.assertEqual(paycheck.disposition, batch_paycheck.disposition)
+
+    def test_parallel_payday_matches_serial_payday(self):
+        pay_date = date(2001, 11, 30)
+        for emp_id in range(41, 47):
+            t.AddHourlyEmployeeTransaction(emp_id, 'Bill', 'Home', self.__db, 15.25).execute()
+            t.AddTimeCardTransaction(pay_date, emp_id / 5, emp_id, self.__db).execute()
+        t.AddSalariedEmployeeTransaction(47, 'Bob', 'Home', self.__db, 1000.00).execute()
+        t.ChangeMemberTransaction(self.__db, 47, 7738, 9.42).execute()
+        t.ChangeDirectTransaction(self.__db, 47, 'Bank', 'Account').execute()
+        payday_t = t.PaydayTransaction(self.__db, pay_date)
+        payday_t.execute()
+        for batch in (False, True):
+            parallel_payday_t = t.PaydayTransaction(self.__db, pay_date, batch=batch, workers=2, shard_size=3)
+            parallel_payday_t.execute()
+            for emp_id in range(41, 48):
+                paycheck = payday_t.get_paycheck(emp_id)
+                parallel_paycheck = parallel_payday_t.get_paycheck(emp_id)
+                self.assertIsNotNone(parallel_paycheck)
+                self.assertEqual(paycheck.gross_pay, parallel_paycheck.gross_pay)
+                self.assertEqual(paycheck.deductions, parallel_paycheck.deductions)
+                self.assertEqual(paycheck.net_pay, parallel_paycheck.net_pay)
+                self.assertEqual(paycheck.disposition, parallel_paycheck.disposition)
+            self.assertIs(self.__db.get_employee(47).method, parallel_payday_t.get_paycheck(47).method)
+        with self.assertRaises(ValueError):
+            t.PaydayTransaction(self.__db, pay_date, workers=0)
+
+    def test_transaction_batch(self):
+        t.AddHourlyEmployeeTransaction(48, 'Bill', 'Home', self.__db, 15.25).execute()
+        batch = t.TransactionBatch(self.__db)
+        batch.add(t.AddTimeCardTransaction(date(2001, 11, 9), 8.0, 48, self.__db))
+        batch.add(t.AddSalesReceiptTransaction(self.__db, date(2001, 11, 9), 150.00, 48))
+        batch.add(t.DeleteEmployeeTransaction(48, self.__db))
+        batch.add(t.ChangeNameTransaction(self.__db, 48, 'Bob'))
+        batch.execute()
+        self.assertEqual([True, False, True, False], [result.succeeded for result in batch.results])
+        self.assertIsNone(self.__db.get_employee(48))
+
+    def test_employee_ids_paid_on(self):
+        t.AddSalariedEmployeeTransaction(49, 'Bob', 'Home', self.__db, 1000.00).execute()
+        t.AddHourlyEmployeeTransaction(50, 'Bill', 'Home', self.__db, 15.25).execute()
+        t.AddCommissionedEmployeeTransaction(51, 'Sam', 'Home', self.__db, 0.1, 1500.00, date(2001, 11, 17)).execute()
+        t.AddCommissionedEmployeeTransaction(52, 'Tom', 'Home', self.__db, 0.1, 1500.00, date(2001, 11, 10)).execute()
+        self.assertEqual({49, 50, 51}, set(self.__db.get_employee_ids_paid_on(date(2001, 11, 30))))
+        self.assertEqual({50, 52}, set(self.__db.get_employee_ids_paid_on(date(2001, 11, 23))))
+        self.assertEqual([], list(self.__db.get_employee_ids_paid_on(date(2001, 11, 22))))
+        t.ChangeHourlyTransaction(self.__db, 52, 20.00).execute()
+        t.ChangeSalariedTransaction(self.__db, 50, 2000.00).execute()
+        t.DeleteEmployeeTransaction(51, self.__db).execute()
+        self.assertEqual({49, 50, 52}, set(self.__db.get_employee_ids_paid_on(date(2001, 11, 30))))
+        self.assertEqual({52}, set(self.__db.get_employee_ids_paid_on(date(2001, 11, 23))))
+
+    def test_pay_date_buckets_reuse_schedules(self):
+        pay_date = date(2001, 11, 30)
+        with mock.patch.object(BeweeklySchedule, '__new__', side_effect=AssertionError):
+            buckets = pay_date_buckets(pay_date)
+        self.assertIn(MONTHLY_BUCKET, buckets)
+        self.assertIn(WEEKLY_BUCKET, buckets)
+        self.assertIn(pay_date_bucket(BeweeklySchedule(date(2001, 11, 17))), buckets)
+        self.assertNotIn(pay_date_bucket(BeweeklySchedule(date(2001, 11, 10))), buckets)
+
+    def test_schedules_and_pay_periods_are_shared(self):
+        self.assertIs(WeeklySchedule(), WeeklySchedule())
+        self.assertIs(MonthlySchedule(), MonthlySchedule())
+        self.assertIs(BeweeklySchedule(date(2001, 11, 17)), BeweeklySchedule(date(2001, 11, 17)))
+        self.assertIsNot(BeweeklySchedule(date(2001, 11, 17)), BeweeklySchedule(date(2001, 11, 10)))
+        self.assertIs(WeeklySchedule(), pickle.loads(pickle.dumps(WeeklySchedule())))
+        with self.assertRaises(TypeError):
+            BeweeklySchedule('2001-11-17')
+        pay_date = date(2001, 11, 30)
+        t.AddHourlyEmployeeTransaction(53, 'Bill', 'Home', self.__db, 15.25).execute()
+        t.AddHourlyEmployeeTransaction(54, 'Tom', 'Home', self.__db, 20.00).execute()
+        payday_t = t.PaydayTransaction(self.__db, pay_date)
+        payday_t.execute()
+        pay_period = payday_t.get_paycheck(53).pay_period
+        self.assertIs(pay_period, payday_t.get_paycheck(54).pay_period)
+        self.assertEqual(date(2001, 11, 24), pay_period.start_date)
+        self.assertIs(pay_period, pickle.loads(pickle.dumps(pay_period)))
+
+    def test_pay_period_running_totals(self):
+        emp_id = 55
+        t.AddHourlyEmployeeTransaction(emp_id, 'Bill', 'Home', self.__db, 15.25).execute()
+        t.ChangeMemberTransaction(self.__db, emp_id, 7739, 9.42).execute()
+        card_dates = [date(2001, 11, 5), date(2001, 11, 9), date(2001, 11, 7), date(2001, 11, 10), date(2001, 11, 16)]
+        for hours, card_date in enumerate(card_dates, 5):
+            t.AddTimeCardTransaction(card_date, float(hours), emp_id, self.__db).execute()
+        t.AddServiceChargeTransaction(self.__db, date(2001, 11, 10), 19.42, 7739).execute()
+        t.AddServiceChargeTransaction(self.__db, date(2001, 11, 6), 3.17, 7739).execute()
+        payday_t = t.PaydayTransaction(self.__db, date(2001, 11, 9))
+        payday_t.execute()
+        expected_pay = 5 * 15.25 + 6 * 15.25 + 7 * 15.25
+        self.__validate_pay_check(payday_t, emp_id, date(2001, 11, 9), date(2001, 11, 3), expected_pay, expected_pay - (9.42 + 3.17), 9.42 + 3.17)
+        payday_t = t.PaydayTransaction(self.__db, date(2001, 11, 16))
+        payday_t.execute()
+        expected_pay = 8 * 15.25 + (8 + 1.5) * 15.25
+        self.__validate_pay_check(payday_t, emp_id, date(2001, 11, 16), date(2001, 11, 10), expected_pay, expected_pay - (9.42 + 19.42), 9.42 + 19.42)
+
+        employee = self.__db.get_employee(emp_id)
+        employee.schedule = MonthlySchedule()
+        self.__db.add_emplyee(emp_id, employee)
+        payday_t = t.PaydayTransaction(self.__db, date(2001, 11, 30))
+        payday_t.execute()
+        paycheck = payday_t.get_paycheck(emp_id)
+        self.assertEqual(date(2001, 11, 1), paycheck.pay_period.start_date)
+        self.assertEqual(sum((min(hours, 8) + 1.5 * max(hours - 8, 0)) * 15.25 for hours in range(5, 10)), paycheck.gross_pay)
+        self.assertEqual(9.42 * 5 + (0.0 + 3.17 + 19.42), paycheck.deductions)
+
+    def test_pay_period_totals_stay_bounded(self):
+        schedule = WeeklySchedule()
+        totals = PeriodTotals(schedule)
+        friday = date(2001, 11, 2)
+        for week in range(12):
+            totals.add(friday + datetime.timedelta(weeks=week), 8.0, None)
+        self.assertEqual(MAX_TRACKED_PERIODS, len(totals))
+        self.assertIsNone(totals.get(date(2001, 10, 27), date(2001, 11, 2)))
+        last_friday = friday + datetime.timedelta(weeks=11)
+        self.assertEqual(8.0, totals.get(last_friday - datetime.timedelta(days=6), last_friday))
+        self.assertEqual(0.0, totals.get(last_friday + datetime.timedelta(days=1), last_friday + datetime.timedelta(weeks=1)))
+
+        # Time cards stored before the schedule is attached are summed once when it is attached, later ones incrementally
+        classification = HourlyClassification(15.25)
+        classification.add_time_card(TimeCard(date(2001, 11, 8), 9.0))
+        employee = Employee(56, 'Bill', 'Home')
+        employee.classification = classification
+        employee.schedule = schedule
+        employee.method = HoldMethod()
+        classification.add_time_card(TimeCard(date(2001, 11, 9), 4.0))
+        classification.add_time_card(TimeCard(date(2001, 11, 12), 2.0))
+        paycheck = Paycheck(date(2001, 11, 9), date(2001, 11, 3))
+        employee.payday(paycheck)
+        self.assertEqual((8 + 1.5) * 15.25 + 4 * 15.25, paycheck.gross_pay)
+        paycheck = Paycheck(date(2001, 11, 16), date(2001, 11, 10))
+        employee.payday(paycheck)
+        self.assertEqual(2 * 15.25, paycheck.gross_pay)
+
+    def test_pay_period_end_date(self):
+        self.assertEqual(date(2001, 11, 30), MonthlySchedule().get_pay_period_end_date(date(2001, 11, 1)))
+        self.assertEqual(date(2001, 12, 31), MonthlySchedule().get_pay_period_end_date(date(2001, 12, 31)))
+        self.assertEqual(date(2001, 11, 9), WeeklySchedule().get_pay_period_end_date(date(2001, 11, 3)))
+        self.assertEqual(date(2001, 11, 9), WeeklySchedule().get_pay_period_end_date(date(2001, 11, 9)))
+        schedule = BeweeklySchedule(date(2001, 11, 17))
+        self.assertIsNone(schedule.get_pay_period_end_date(date(2001, 11, 16)))
+        self.assertEqual(date(2001, 11, 30), schedule.get_pay_period_end_date(date(2001, 11, 17)))
+        self.assertEqual(date(2001, 12, 14), schedule.get_pay_period_end_date(date(2001, 12, 1)))
+
+    def test_count_fridays(self):
+        self.assertEqual(5, count_fridays(date(2001, 11, 1), date(2001, 11, 30)))
+        self.assertEqual(1, count_fridays(date(2001, 11, 24), date(2001, 11, 30)))
+        self.assertEqual(1, count_fridays(date(2001, 11, 30), date(2001, 11, 30)))
+        self.assertEqual(0, count_fridays(date(2001, 11, 24), date(2001, 11, 29)))
+        self.assertEqual(0, count_fridays(date(2001, 11, 30), date(2001, 11, 24)))
+
+    def test_range_run_matches_daily_payday(self):
+        t.AddHourlyEmployeeTransaction(56, 'Bill', 'Home', self.__db, 15.25).execute()
+        t.AddCommissionedEmployeeTransaction(57, 'Sam', 'Home', self.__db, 0.1, 1500.00, date(2001, 11, 2)).execute()
+        t.AddSalariedEmployeeTransaction(58, 'Bob', 'Home', self.__db, 1000.00).execute()
+        t.ChangeMemberTransaction(self.__db, 56, 7756, 9.42).execute()
+        for day in range(1, 31):
+            document_date = date(2001, 11, day)
+            t.AddTimeCardTransaction(document_date, 6.0 + day % 5, 56, self.__db).execute()
+            t.AddSalesReceiptTransaction(self.__db, document_date, 10.0 * day, 57).execute()
+            if day % 3 == 0:
+                t.AddServiceChargeTransaction(self.__db, document_date, 3.17 * day, 7756).execute()
+
+        range_t = t.PayrollRangeRun(self.__db, date(2001, 10, 20), date(2001, 12, 31))
+        self.assertEqual(10 + 4 + 3, sum(1 for _ in range_t.iter_paychecks()))
+        pay_date = date(2001, 10, 20)
+        while pay_date <= date(2001, 12, 31):
+            payday_t = t.PaydayTransaction(self.__db, pay_date)
+            payday_t.execute()
+            for emp_id in (56, 57, 58):
+                expected = payday_t.get_paycheck(emp_id)
+                paycheck = range_t.get_paycheck(emp_id, pay_date)
+                if expected is None:
+                    self.assertIsNone(paycheck)
+                    continue
+                self.assertEqual(expected.pay_period, paycheck.pay_period)
+                self.assertEqual(expected.gross_pay, paycheck.gross_pay)
+                self.assertEqual(expected.deductions, paycheck.deductions)
+                self.assertEqual(expected.net_pay, paycheck.net_pay)
+                self.assertEqual('Hold', paycheck.disposition)
+            pay_date += timedelta(days=1)
+        with self.assertRaises(ValueError):
+            t.PayrollRangeRun(self.__db, date(2001, 12, 31), date(2001, 10, 20))
+
     def __validate_pay_check(self, payday_t : t.PaydayTransaction, emp_id: int, pay_date: date, start_date: date, gross_pay: float, net_pay: float, deductions: float):
         paycheck = payday_t.get_paycheck(emp_id)
         self.assertIsNotNone(paycheck)